@@ -0,0 +1,8 @@
+"""
+Shared Environmental Risk Assessment (ERA) computations.
+
+The ERA notebooks and scripts import these modules after adding the
+project root to ``sys.path``. Every function takes an open DuckDB
+connection and materializes its output as a table so that notebooks
+and reports can read precomputed results directly.
+"""
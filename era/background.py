@@ -0,0 +1,238 @@
+"""
+Site versus background two-sample tests for every exposure unit,
+analyte and matrix in one vectorized pass.
+
+Locations carry an explicit role (dim_locations.location_role, 'Site' or
+'Background') and site locations are grouped into exposure units by
+ref_exposure_units (unassigned site locations form the 'Site' unit).
+Each exposure unit is compared with the pooled background locations of
+the same matrix, one-sided (site greater than background):
+
+    Wilcoxon-Mann-Whitney   non-detects and detects below the highest
+                            DL of the comparison are recensored as one
+                            tied value, normal approximation with tie
+                            and continuity corrections
+    Gehan                   generalized Wilcoxon scores for left-censored
+                            data (each value scored by how many others
+                            are known to be below it minus how many are
+                            known to be above it), permutation variance
+
+The Gehan test is used for the conclusion when either population has
+non-detects, the WMW test otherwise. Results go to
+stat_background_comparison.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import special
+
+from era.duplicates import ensure_statistics_results
+from era.segments import Segments
+
+COMPARISON_KEYS = ("exposure_unit", "cas_rn", "matrix_code")
+
+LOCATION_ROLES = ("Site", "Background")
+DEFAULT_EXPOSURE_UNIT = "Site"
+
+SIGNIFICANCE = 0.05
+MIN_SAMPLES = 3
+
+COMPARISON_SQL = f"""
+    WITH results AS (
+        SELECT
+            coalesce(e.exposure_unit, '{DEFAULT_EXPOSURE_UNIT}') as exposure_unit,
+            coalesce(l.location_role, 'Site') as location_role,
+            r.cas_rn,
+            r.matrix_code,
+            r.result_value_norm as result_value,
+            r.detection_limit_norm as detection_limit,
+            r.detect_flag
+        FROM stat_results r
+        LEFT JOIN dim_locations l ON r.location_id = l.location_id
+        LEFT JOIN ref_exposure_units e ON r.location_id = e.location_id
+    ),
+    units AS (
+        SELECT DISTINCT exposure_unit, cas_rn, matrix_code
+        FROM results
+        WHERE location_role = 'Site'
+    )
+    SELECT exposure_unit, cas_rn, matrix_code, TRUE as is_site,
+           result_value, detection_limit, detect_flag
+    FROM results
+    WHERE location_role = 'Site'
+    UNION ALL
+    -- Background results are repeated for every exposure unit they are
+    -- compared with
+    SELECT u.exposure_unit, b.cas_rn, b.matrix_code, FALSE,
+           b.result_value, b.detection_limit, b.detect_flag
+    FROM results b
+    JOIN units u ON b.cas_rn = u.cas_rn AND b.matrix_code = u.matrix_code
+    WHERE b.location_role = 'Background'
+"""
+
+
+def ensure_location_roles(conn):
+    """
+    Add dim_locations.location_role and ref_exposure_units to databases
+    created before they existed. Locations without a role are assigned
+    one from their name once, so older databases keep their background
+    wells; new locations get an explicit role at ingest.
+    """
+    conn.execute("ALTER TABLE dim_locations ADD COLUMN IF NOT EXISTS location_role VARCHAR")
+    conn.execute("""
+        UPDATE dim_locations
+        SET location_role = CASE
+            WHEN location_name ILIKE '%background%' THEN 'Background' ELSE 'Site'
+        END
+        WHERE location_role IS NULL
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS ref_exposure_units (
+            location_id VARCHAR PRIMARY KEY,
+            exposure_unit VARCHAR NOT NULL
+        )
+    """)
+
+
+def load_comparison_data(conn):
+    """Site and background results, one row per result per comparison."""
+    ensure_location_roles(conn)
+    ensure_statistics_results(conn)
+    return conn.execute(COMPARISON_SQL).fetchdf()
+
+
+def _group_keys(seg, values):
+    """
+    Integer keys that order (group, value) pairs, so per-group counts of
+    values below or above a threshold are single searchsorted calls.
+    """
+    _, rank = np.unique(values, return_inverse=True)
+    return seg.ids.astype(np.int64) * (len(values) + 1) + rank
+
+
+def gehan_scores(seg, observed, detect):
+    """
+    Gehan score per row: observations known to be below it minus those
+    known to be above it, within its group. A detect is above a non-detect
+    when it is at or above the detection limit; two non-detects, or a
+    non-detect with a higher DL than a detect, are indeterminate.
+    """
+    keys = _group_keys(seg, observed)
+    detect_keys = np.sort(keys[detect])
+    nd_keys = np.sort(keys[~detect])
+    group_start = seg.ids.astype(np.int64) * (len(observed) + 1)
+    group_end = group_start + len(observed)
+
+    below = np.where(
+        detect,
+        np.searchsorted(detect_keys, keys, "left") - np.searchsorted(detect_keys, group_start, "left")
+        + np.searchsorted(nd_keys, keys, "right") - np.searchsorted(nd_keys, group_start, "left"),
+        0,
+    )
+    above = np.where(
+        detect,
+        np.searchsorted(detect_keys, group_end, "left") - np.searchsorted(detect_keys, keys, "right"),
+        np.searchsorted(detect_keys, group_end, "left") - np.searchsorted(detect_keys, keys, "left"),
+    )
+    return (below - above).astype(float)
+
+
+def compare_populations(seg, observed, detect, is_site):
+    """
+    One-sided WMW and Gehan tests of site > background for every group.
+
+    Returns a dict of per-group arrays.
+    """
+    n_site = seg.count(is_site).astype(float)
+    n_background = seg.counts - n_site
+    n = seg.counts.astype(float)
+
+    # WMW on values recensored at the group's highest detection limit
+    censor_limit = seg.max(observed, where=~detect)
+    limit = seg.broadcast(censor_limit)
+    with np.errstate(invalid="ignore"):
+        censored = ~detect | (observed < limit)
+    recensored = np.where(censored, limit / 2, observed)
+    ranks = (
+        pd.DataFrame({"group": seg.ids, "value": recensored})
+        .groupby("group")["value"].rank(method="average").to_numpy()
+    )
+    u = seg.sum(np.where(is_site, ranks, 0.0)) - n_site * (n_site + 1) / 2
+
+    ties = pd.DataFrame({"group": seg.ids, "value": recensored}).value_counts().reset_index()
+    t = ties["count"].to_numpy(dtype=float)
+    tie_term = np.bincount(ties["group"], t ** 3 - t, minlength=len(seg))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        var_u = n_site * n_background / 12 * ((n + 1) - tie_term / (n * (n - 1)))
+        wmw_z = np.where(var_u > 0, (u - n_site * n_background / 2 - 0.5) / np.sqrt(var_u), np.nan)
+
+    # Gehan: sum of site scores, permutation variance of the pooled scores
+    scores = gehan_scores(seg, observed, detect)
+    gehan = seg.sum(np.where(is_site, scores, 0.0))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        var_gehan = n_site * n_background * seg.sum(scores ** 2) / (n * (n - 1))
+        gehan_z = np.where(var_gehan > 0, gehan / np.sqrt(var_gehan), np.nan)
+
+    return {
+        "n_site": n_site,
+        "n_background": n_background,
+        "wmw_u": u,
+        "wmw_z": wmw_z,
+        "wmw_p": special.ndtr(-wmw_z),
+        "gehan_statistic": gehan,
+        "gehan_z": gehan_z,
+        "gehan_p": special.ndtr(-gehan_z),
+    }
+
+
+def compute_background_comparison(data, keys=COMPARISON_KEYS):
+    """
+    Site versus background tests for every group in a
+    load_comparison_data() frame, one row per group.
+    """
+    detect_flag = data["detect_flag"] == "Y"
+    data = data.assign(
+        observed_value=np.where(detect_flag, data["result_value"], data["detection_limit"]),
+        detected=detect_flag,
+    ).dropna(subset=["observed_value"])
+    seg = Segments(data, keys, ["observed_value"])
+    observed = seg.column("observed_value")
+    detect = seg.column("detected", bool)
+    is_site = seg.column("is_site", bool)
+    tests = compare_populations(seg, observed, detect, is_site)
+
+    has_nondetects = seg.count(~detect) > 0
+    enough = (tests["n_site"] >= MIN_SAMPLES) & (tests["n_background"] >= MIN_SAMPLES)
+    p_value = np.where(has_nondetects, tests["gehan_p"], tests["wmw_p"])
+
+    comparison = seg.groups.copy()
+    comparison["n_site"] = tests["n_site"].astype(int)
+    comparison["n_site_detect"] = seg.count(detect & is_site)
+    comparison["n_background"] = tests["n_background"].astype(int)
+    comparison["n_background_detect"] = seg.count(detect & ~is_site)
+    comparison["site_max_detect"] = seg.max(observed, where=detect & is_site)
+    comparison["background_max_detect"] = seg.max(observed, where=detect & ~is_site)
+    for name in ("wmw_u", "wmw_z", "wmw_p", "gehan_statistic", "gehan_z", "gehan_p"):
+        comparison[name] = tests[name]
+    comparison["test_used"] = np.where(has_nondetects, "Gehan", "WMW")
+    comparison["p_value"] = np.where(enough, p_value, np.nan)
+    comparison["conclusion"] = np.select(
+        [~enough, p_value < SIGNIFICANCE],
+        ["Insufficient Data", "Site > Background"],
+        default="Not Different",
+    )
+    return comparison
+
+
+def materialize_background_comparison(conn, keys=COMPARISON_KEYS):
+    """Site versus background tests for all groups, stored as stat_background_comparison."""
+    comparison = compute_background_comparison(load_comparison_data(conn), keys)
+    conn.register("comparison_frame", comparison)
+    try:
+        conn.execute("""
+            CREATE OR REPLACE TABLE stat_background_comparison AS
+            SELECT * FROM comparison_frame
+        """)
+    finally:
+        conn.unregister("comparison_frame")
+    return comparison
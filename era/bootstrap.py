@@ -0,0 +1,136 @@
+"""
+Bootstrap UCL95s (percentile, BCa and bootstrap-t) for every EPC group.
+
+Each group is resampled in one shot: a (B x n) index matrix is drawn and
+the bootstrap means and standard deviations are reductions along axis 1.
+Every group gets its own generator seeded from the base seed and a
+stable hash of its key, so results do not depend on how groups are
+split across worker processes and are identical run to run.
+"""
+
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy import stats
+
+from era.censored import CENSORED_ORDER, with_observed_value
+from era.segments import Segments
+from era.ucl import EPC_KEYS, load_epc_inputs, substitute_nondetects
+
+N_BOOTSTRAP = 2000
+BASE_SEED = 20240601
+
+# Below this many resampled values (sum of B * n) the pool start-up cost
+# outweighs the parallel speed-up
+PARALLEL_THRESHOLD = 5_000_000
+
+
+def group_seed(key, base_seed=BASE_SEED):
+    """Seed sequence for a group key, stable across processes and runs."""
+    digest = hashlib.sha256("|".join(map(str, key)).encode()).digest()
+    return np.random.SeedSequence([base_seed, int.from_bytes(digest[:8], "little")])
+
+
+def bootstrap_group(values, seed, n_boot=N_BOOTSTRAP, confidence=0.95):
+    """Percentile, BCa and bootstrap-t UCLs for one group's values."""
+    n = len(values)
+    if n < 3 or np.ptp(values) == 0:
+        return np.nan, np.nan, np.nan
+
+    rng = np.random.default_rng(seed)
+    samples = values[rng.integers(0, n, size=(n_boot, n))]
+    boot_mean = samples.mean(axis=1)
+    boot_sd = samples.std(axis=1, ddof=1)
+
+    mean = values.mean()
+    se = values.std(ddof=1) / np.sqrt(n)
+
+    percentile_ucl = np.quantile(boot_mean, confidence)
+
+    # BCa: bias correction from the bootstrap distribution, acceleration
+    # from the jackknife means
+    z0 = stats.norm.ppf(np.clip(np.mean(boot_mean < mean), 1 / n_boot, 1 - 1 / n_boot))
+    jack = (values.sum() - values) / (n - 1)
+    spread = jack.mean() - jack
+    accel = np.sum(spread ** 3) / (6 * np.sum(spread ** 2) ** 1.5)
+    z_alpha = stats.norm.ppf(confidence)
+    level = stats.norm.cdf(z0 + (z0 + z_alpha) / (1 - accel * (z0 + z_alpha)))
+    bca_ucl = np.quantile(boot_mean, level)
+
+    # Bootstrap-t: studentize each resample, use the lower tail of t*
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t_star = (boot_mean - mean) / (boot_sd / np.sqrt(n))
+    t_star = t_star[np.isfinite(t_star)]
+    boot_t_ucl = mean - np.quantile(t_star, 1 - confidence) * se
+
+    return percentile_ucl, bca_ucl, boot_t_ucl
+
+
+def _bootstrap_chunk(chunk, n_boot, base_seed):
+    return [
+        bootstrap_group(values, group_seed(key, base_seed), n_boot)
+        for key, values in chunk
+    ]
+
+
+def bootstrap_ucls(groups, n_boot=N_BOOTSTRAP, base_seed=BASE_SEED, max_workers=None):
+    """
+    Bootstrap UCLs for a list of (key, values) pairs.
+
+    Large jobs are spread over a process pool in round-robin chunks; each
+    group's seed depends only on its key, so the output is the same
+    serial or parallel. Returns an (n_groups x 3) array of percentile,
+    BCa and bootstrap-t UCL95s.
+    """
+    work = n_boot * sum(len(values) for _, values in groups)
+    workers = max_workers or os.cpu_count() or 1
+    if workers == 1 or work < PARALLEL_THRESHOLD or len(groups) < 2:
+        return np.array(_bootstrap_chunk(groups, n_boot, base_seed)).reshape(-1, 3)
+
+    # Round-robin chunks balance large and small groups across workers
+    stride = workers * 4
+    chunks = [groups[i::stride] for i in range(min(len(groups), stride))]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunk_results = list(pool.map(
+            _bootstrap_chunk, chunks, [n_boot] * len(chunks), [base_seed] * len(chunks)
+        ))
+
+    results = np.empty((len(groups), 3))
+    for i, chunk_result in enumerate(chunk_results):
+        results[i::stride] = chunk_result
+    return results
+
+
+def materialize_bootstrap_ucls(conn, ros_imputed=None, n_boot=N_BOOTSTRAP,
+                               base_seed=BASE_SEED, max_workers=None, keys=EPC_KEYS,
+                               exclude_outliers=False):
+    """
+    Bootstrap UCL95s for all analyte/matrix groups, on the same values as
+    the EPC engine (non-detects at ROS value or 1/2 DL, optionally without
+    flagged outliers), stored as stat_bootstrap_ucls.
+    """
+    data = load_epc_inputs(conn, ros_imputed, exclude_outliers)
+    seg = Segments(with_observed_value(data), keys, CENSORED_ORDER)
+    values, _ = substitute_nondetects(seg)
+    groups = list(zip(
+        seg.groups.itertuples(index=False, name=None),
+        np.split(values, seg.starts[1:]),
+    ))
+    ucls = bootstrap_ucls(groups, n_boot, base_seed, max_workers)
+
+    boot = seg.groups.copy()
+    boot["n_total"] = seg.counts
+    boot["mean"] = seg.mean(values)
+    boot["n_bootstrap"] = n_boot
+    boot["ucl95_percentile"] = ucls[:, 0]
+    boot["ucl95_bca"] = ucls[:, 1]
+    boot["ucl95_bootstrap_t"] = ucls[:, 2]
+
+    conn.register("boot_frame", boot)
+    try:
+        conn.execute("CREATE OR REPLACE TABLE stat_bootstrap_ucls AS SELECT * FROM boot_frame")
+    finally:
+        conn.unregister("boot_frame")
+    return boot
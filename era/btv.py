@@ -0,0 +1,182 @@
+"""
+Background threshold values (BTVs) for every background analyte/matrix
+group at once.
+
+Background results are those from locations with location_role
+'Background' (see era.background). For each group the module computes
+upper tolerance limits (UTL95-95: 95% confidence, 95% coverage), upper
+prediction limits for one future observation (UPL95) and upper
+simultaneous limits (USL95):
+
+    normal        mean + factor * SD; Kaplan-Meier mean and SD when the
+                  group has non-detects
+    gamma         Wilson-Hilferty: normal limits on x^(1/3), cubed
+    lognormal     normal limits on log(x), exponentiated
+    nonparametric order statistics of the observed values (UTL: the
+                  smallest rank with 95% binomial confidence of 95%
+                  coverage, UPL: rank (n + 1) * 0.95, USL: maximum)
+
+Non-detects enter the gamma and lognormal limits at their robust ROS
+value, or half their detection limit where ROS could not be fitted.
+Tolerance and USL factors come from the lookup tables in
+era.critical_values. The BTV is the UTL95-95 for the distribution the
+detects fit (era.gof), or the nonparametric UTL otherwise. Results go to
+ref_background_thresholds, keyed by cas_rn and matrix_code in the
+normalized result unit so screening queries can join it directly.
+"""
+
+import numpy as np
+from scipy import stats
+
+from era.background import ensure_location_roles
+from era.censored import CENSORED_ORDER, kaplan_meier, ros_impute, with_observed_value
+from era.critical_values import tolerance_factor, usl_factor
+from era.duplicates import ensure_statistics_results
+from era.gof import goodness_of_fit
+from era.segments import Segments
+
+BTV_KEYS = ("cas_rn", "matrix_code")
+
+COVERAGE = 0.95
+CONFIDENCE = 0.95
+
+# Fewer detects than this and the BTV falls back to the maximum detect
+MIN_DETECTS = 4
+
+DISTRIBUTIONS = ("normal", "gamma", "lognormal")
+
+# Column prefix for each limit in ref_background_thresholds
+LIMIT_LABELS = {"utl": "utl95_95", "upl": "upl95", "usl": "usl95"}
+
+BACKGROUND_SQL = """
+    SELECT
+        r.cas_rn,
+        r.matrix_code,
+        r.result_value_norm as result_value,
+        r.detection_limit_norm as detection_limit,
+        r.detect_flag,
+        r.result_unit_norm as result_unit
+    FROM stat_results r
+    JOIN dim_locations l ON r.location_id = l.location_id
+    WHERE l.location_role = 'Background'
+"""
+
+
+def load_background_results(conn):
+    """Results from background locations, one row per result."""
+    ensure_location_roles(conn)
+    ensure_statistics_results(conn)
+    return conn.execute(BACKGROUND_SQL).fetchdf()
+
+
+def _normal_limits(n, center, spread, coverage, confidence):
+    """UTL, UPL and USL from a location and scale on the (transformed) scale."""
+    with np.errstate(invalid="ignore"):
+        t_crit = stats.t.ppf(confidence, np.maximum(n - 1, 1))
+        utl = center + tolerance_factor(n, coverage, confidence) * spread
+        upl = center + t_crit * np.sqrt(1 + 1 / n) * spread
+        usl = center + usl_factor(n, confidence) * spread
+    return utl, upl, usl
+
+
+def parametric_limits(seg, observed, detect, coverage=COVERAGE, confidence=CONFIDENCE):
+    """
+    Normal, gamma (Wilson-Hilferty) and lognormal UTL, UPL and USL per
+    group. Returns a dict keyed by (limit, distribution).
+    """
+    n = seg.counts.astype(float)
+    has_nondetects = seg.count(~detect) > 0
+
+    km = kaplan_meier(seg, observed, detect)
+    mean = np.where(has_nondetects, km["mean"], seg.mean(observed))
+    sd = np.where(has_nondetects, km["sd"], np.sqrt(seg.var(observed)))
+
+    ros = ros_impute(seg, observed, detect)
+    filled = np.where(detect, observed, np.where(np.isnan(ros), observed / 2, ros))
+    cube_root = np.cbrt(filled)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        log_filled = np.log(np.where(filled > 0, filled, np.nan))
+
+    limits = {}
+    for name, center, spread, back in [
+        ("normal", mean, sd, lambda x: x),
+        ("gamma", seg.mean(cube_root), np.sqrt(seg.var(cube_root)), lambda x: np.maximum(x, 0) ** 3),
+        ("lognormal", seg.mean(log_filled), np.sqrt(seg.var(log_filled)), np.exp),
+    ]:
+        for limit, value in zip(LIMIT_LABELS, _normal_limits(n, center, spread, coverage, confidence)):
+            limits[limit, name] = back(value)
+    return limits
+
+
+def nonparametric_limits(seg, observed, coverage=COVERAGE, confidence=CONFIDENCE):
+    """
+    Order-statistic UTL, UPL and USL per group from values sorted within
+    groups. Also returns the UTL rank (n when the maximum is used because
+    the sample is too small for the requested confidence).
+    """
+    n = seg.counts
+    utl_rank = np.minimum(stats.binom.ppf(confidence, n, coverage).astype(int) + 1, n)
+    upl_rank = np.minimum(np.ceil((n + 1) * confidence).astype(int), n)
+    return {
+        "utl": observed[seg.starts + utl_rank - 1],
+        "upl": observed[seg.starts + upl_rank - 1],
+        "usl": observed[seg.starts + n - 1],
+        "utl_rank": utl_rank,
+    }
+
+
+def compute_btvs(data, keys=BTV_KEYS, coverage=COVERAGE, confidence=CONFIDENCE):
+    """BTVs for every group in a load_background_results() frame."""
+    data = with_observed_value(data).dropna(subset=["observed_value"])
+    seg = Segments(data, keys, CENSORED_ORDER)
+    observed = seg.column("observed_value")
+    detect = seg.data["detect_flag"].to_numpy() == "Y"
+
+    parametric = parametric_limits(seg, observed, detect, coverage, confidence)
+    nonparametric = nonparametric_limits(seg, observed, coverage, confidence)
+
+    n_detect = seg.count(detect)
+    tested = detect & seg.broadcast(n_detect >= MIN_DETECTS)
+    gof = seg.groups.merge(
+        goodness_of_fit(seg.data.loc[tested, [*keys, "result_value"]], keys), on=list(keys), how="left"
+    )
+    distribution = gof["gof_distribution"].fillna("Nonparametric").to_numpy()
+
+    max_detect = seg.max(observed, where=detect)
+    choices = [
+        (n_detect == 0, np.nan, "No Detects"),
+        (n_detect < MIN_DETECTS, max_detect, "Max Detect"),
+        (distribution == "Normal", parametric["utl", "normal"], "Normal UTL95-95"),
+        (distribution == "Gamma", parametric["utl", "gamma"], "Gamma UTL95-95"),
+        (distribution == "Lognormal", parametric["utl", "lognormal"], "Lognormal UTL95-95"),
+    ]
+
+    btvs = seg.groups.copy()
+    btvs["result_unit"] = seg.first(seg.data["result_unit"].to_numpy())
+    btvs["n_background"] = seg.counts
+    btvs["n_detect"] = n_detect
+    btvs["max_detect"] = max_detect
+    btvs["gof_distribution"] = distribution
+    for limit, label in LIMIT_LABELS.items():
+        for name in DISTRIBUTIONS:
+            btvs[f"{label}_{name}"] = parametric[limit, name]
+        btvs[f"{label}_nonparametric"] = nonparametric[limit]
+    btvs["nonparametric_utl_rank"] = nonparametric["utl_rank"]
+    btvs["btv"] = np.select(
+        [c for c, _, _ in choices], [v for _, v, _ in choices], nonparametric["utl"]
+    )
+    btvs["btv_method"] = np.select(
+        [c for c, _, _ in choices], [m for _, _, m in choices], "Nonparametric UTL95-95"
+    )
+    return btvs
+
+
+def materialize_btvs(conn, keys=BTV_KEYS):
+    """BTVs for all background groups, stored as ref_background_thresholds."""
+    btvs = compute_btvs(load_background_results(conn), keys)
+    conn.register("btv_frame", btvs)
+    try:
+        conn.execute("CREATE OR REPLACE TABLE ref_background_thresholds AS SELECT * FROM btv_frame")
+    finally:
+        conn.unregister("btv_frame")
+    return btvs
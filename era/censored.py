@@ -0,0 +1,209 @@
+"""
+Estimators for left-censored (non-detect) data, vectorized across groups.
+
+All functions take a Segments whose rows are sorted within each group by
+observed value (the result for detects, the detection limit for
+non-detects) and then detect_flag, so that non-detects sort before
+detects at a tied value.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from era.segments import Segments
+
+# Sort order expected within each group
+CENSORED_ORDER = ("observed_value", "detect_flag")
+
+
+def with_observed_value(data):
+    """Add observed_value: the result for detects, the detection limit otherwise."""
+    detect = data["detect_flag"] == "Y"
+    return data.assign(
+        observed_value=np.where(detect, data["result_value"], data["detection_limit"])
+    )
+
+
+def _detect_runs(seg, observed, detect):
+    """
+    Collapse each group's detects into runs of tied values.
+
+    Returns a DataFrame with one row per distinct detected value per group:
+    group (index into seg.groups), value, d (detects at the value) and
+    b (observations at or below the value, i.e. the KM risk set).
+    """
+    rank = seg.position() + 1
+    rows = np.flatnonzero(detect)
+    group = seg.ids[rows]
+    value = observed[rows]
+
+    if not len(rows):
+        return pd.DataFrame({"group": group, "value": value, "d": [], "b": []})
+
+    run_start = np.ones(len(rows), dtype=bool)
+    run_start[1:] = (group[1:] != group[:-1]) | (value[1:] != value[:-1])
+    starts = np.flatnonzero(run_start)
+    ends = np.append(starts[1:], len(rows)) - 1
+
+    return pd.DataFrame({
+        "group": group[starts],
+        "value": value[starts],
+        "d": (ends - starts + 1).astype(float),
+        # Non-detects sort before detects at a tie, so the last detect's
+        # rank counts every observation at or below the value
+        "b": rank[rows[ends]].astype(float),
+    })
+
+
+def kaplan_meier(seg, observed, detect):
+    """
+    Left-censored Kaplan-Meier mean, standard deviation and standard error.
+
+    The cumulative distribution is F(z_m) = 1 at the largest detect and
+    F(z_{j-1}) = F(z_j) * (1 - d_j / b_j) below it; mass below the
+    smallest detect is placed at the smallest detect. The standard error
+    uses the Greenwood-type variance with the k / (k - 1) small-sample
+    correction (k = number of detects) used by ProUCL.
+
+    Returns a dict of arrays (mean, sd, se), NaN for groups without detects.
+    """
+    n_groups = len(seg)
+    runs = _detect_runs(seg, observed, detect)
+    result = {name: np.full(n_groups, np.nan) for name in ("mean", "sd", "se")}
+    if runs.empty:
+        return result
+
+    rs = Segments(runs, ["group"])
+    z = rs.column("value")
+    d = rs.column("d")
+    b = rs.column("b")
+    last = rs.position() == rs.broadcast(rs.counts) - 1
+
+    # F(z_j) = product of (1 - d_i / b_i) over larger detects i > j. The
+    # factor is zero only at a group's smallest detect (no non-detects
+    # below it), which never enters an exclusive product above it.
+    factor = 1.0 - d / b
+    log_factor = np.log(np.where(factor > 0, factor, 1.0))
+    cdf = np.exp(rs.reverse_cumsum(log_factor) - log_factor)
+
+    previous = np.where(rs.position() == 0, 0.0, np.roll(cdf, 1))
+    mass = cdf - previous
+    mean = rs.sum(z * mass)
+    variance = np.maximum(rs.sum(z ** 2 * mass) - mean ** 2, 0.0)
+
+    # Variance of the mean: sum of A_j^2 d_{j+1} / (b_{j+1} (b_{j+1} - d_{j+1}))
+    # with A_j = sum over i <= j of (z_{i+1} - z_i) F(z_i)
+    next_z = np.where(last, z, np.roll(z, -1))
+    next_d = np.where(last, 0.0, np.roll(d, -1))
+    next_b = np.where(last, 1.0, np.roll(b, -1))
+    area = rs.cumsum((next_z - z) * cdf)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        term = np.where(last, 0.0, area ** 2 * next_d / (next_b * (next_b - next_d)))
+        k = rs.sum(d)
+        var_mean = np.where(k > 1, k / (k - 1) * rs.sum(term), np.nan)
+
+    groups = rs.groups["group"].to_numpy()
+    result["mean"][groups] = mean
+    result["sd"][groups] = np.sqrt(variance)
+    result["se"][groups] = np.sqrt(var_mean)
+    return result
+
+
+def ros_impute(seg, observed, detect, min_detects=3):
+    """
+    Robust regression on order statistics (ROS) with multiple detection limits.
+
+    Plotting positions follow Helsel's method: for each detection limit
+    DL_j, A_j counts detects in [DL_j, DL_j+1) and B_j counts observations
+    below DL_j (detects below it plus non-detects at or below it). The
+    exceedance probability is pe_j = 1 - prod over i >= j of B_i / (A_i + B_i).
+    A lognormal line fitted to the detects (log value vs normal score) is
+    then used to impute each non-detect from its own plotting position.
+
+    Returns one imputed value per row, NaN for detects and for groups with
+    fewer than min_detects detects or no non-detects.
+    """
+    n_rows = len(observed)
+    imputed = np.full(n_rows, np.nan)
+    group = seg.ids
+    nondetect = ~detect
+    if not nondetect.any():
+        return imputed
+
+    # Detection-limit levels per group: 0 plus each distinct non-detect DL
+    nd_levels = pd.DataFrame({"group": group[nondetect], "dl": observed[nondetect]})
+    levels = (
+        pd.concat([nd_levels, pd.DataFrame({"group": np.unique(nd_levels["group"]), "dl": 0.0})])
+        .drop_duplicates()
+        .sort_values(["group", "dl"], kind="mergesort")
+        .reset_index(drop=True)
+    )
+    levels["level"] = np.arange(len(levels))
+    lv = Segments(levels, ["group"])
+
+    # Assign every observation to the highest level at or below its value
+    rows = pd.DataFrame({"row": np.arange(n_rows), "group": group, "observed": observed})
+    rows = rows[rows["group"].isin(levels["group"]) & np.isfinite(observed)]
+    rows = rows.sort_values("observed", kind="mergesort")
+    rows = pd.merge_asof(
+        rows,
+        levels.sort_values("dl", kind="mergesort"),
+        left_on="observed",
+        right_on="dl",
+        by="group",
+        direction="backward",
+    ).sort_values("row", kind="mergesort")
+    row_index = rows["row"].to_numpy()
+    row_level = rows["level"].to_numpy()
+    row_detect = detect[row_index]
+
+    n_levels = len(levels)
+    a = np.bincount(row_level[row_detect], minlength=n_levels).astype(float)
+    c = np.bincount(row_level[~row_detect], minlength=n_levels).astype(float)
+    b = (lv.cumsum(a) - a) + lv.cumsum(c)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        factor = np.where(a + b > 0, b / (a + b), 1.0)
+    log_factor = np.log(np.where(factor > 0, factor, 1.0))
+    pe = np.where(lv.position() == 0, 1.0, 1.0 - np.exp(lv.reverse_cumsum(log_factor)))
+    last = lv.position() == lv.broadcast(lv.counts) - 1
+    pe_next = np.where(last, 0.0, np.roll(pe, -1))
+
+    # Rank within (level, detect status); rows are in value order within each
+    order = np.lexsort((observed[row_index], row_detect, row_level))
+    sorted_key = row_level[order] * 2 + row_detect[order]
+    run_start = np.ones(len(order), dtype=bool)
+    run_start[1:] = sorted_key[1:] != sorted_key[:-1]
+    first = np.maximum.accumulate(np.where(run_start, np.arange(len(order)), 0))
+    rank = np.empty(len(order))
+    rank[order] = np.arange(len(order)) - first + 1
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pp = np.where(
+            row_detect,
+            (1 - pe[row_level]) + (pe[row_level] - pe_next[row_level]) * rank / (a[row_level] + 1),
+            (1 - pe[row_level]) * rank / (c[row_level] + 1),
+        )
+    score = stats.norm.ppf(pp)
+
+    # Per-group least-squares fit of log(detect) on normal score
+    row_group = group[row_index]
+    fit = row_detect & (observed[row_index] > 0)
+    n_groups = len(seg)
+    log_value = np.log(np.where(fit, observed[row_index], 1.0))
+    n = np.bincount(row_group[fit], minlength=n_groups).astype(float)
+    sx = np.bincount(row_group[fit], score[fit], minlength=n_groups)
+    sy = np.bincount(row_group[fit], log_value[fit], minlength=n_groups)
+    sxx = np.bincount(row_group[fit], score[fit] ** 2, minlength=n_groups)
+    sxy = np.bincount(row_group[fit], score[fit] * log_value[fit], minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slope = (n * sxy - sx * sy) / (n * sxx - sx ** 2)
+        intercept = (sy - slope * sx) / n
+
+    usable = (n >= min_detects) & np.isfinite(slope)
+    impute = ~row_detect & usable[row_group]
+    imputed[row_index[impute]] = np.exp(
+        intercept[row_group[impute]] + slope[row_group[impute]] * score[impute]
+    )
+    return imputed
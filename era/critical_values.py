@@ -0,0 +1,233 @@
+"""
+Critical-value lookup tables for the UCL methods.
+
+Each table is computed once per process on a fixed grid (functools
+lru_cache) and then interpolated for whole arrays of groups, so no
+per-group quantile or root-finding calls are needed.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+from scipy import special, stats
+from scipy.interpolate import RegularGridInterpolator
+
+# Adjusted significance level for the adjusted gamma UCL95 (ProUCL)
+ADJUSTED_GAMMA_LEVELS = [(5, 0.0086), (10, 0.0267), (20, 0.0380), (40, 0.0440), (np.inf, 0.05)]
+
+# Lilliefors 5% critical values of D for n <= 30; 0.886 / sqrt(n) above
+LILLIEFORS_05 = [
+    (4, 0.381), (5, 0.337), (6, 0.319), (7, 0.300), (8, 0.285), (9, 0.271),
+    (10, 0.258), (11, 0.249), (12, 0.242), (13, 0.234), (14, 0.227), (15, 0.220),
+    (16, 0.213), (17, 0.206), (18, 0.200), (19, 0.195), (20, 0.190), (25, 0.173),
+    (30, 0.161),
+]
+
+# Anderson-Darling 5% critical values of A^2 for the gamma distribution
+# with estimated shape k (D'Agostino and Stephens, Table 4.21)
+ANDERSON_DARLING_GAMMA_05 = [
+    (1, 0.786), (2, 0.768), (3, 0.762), (4, 0.759), (5, 0.758), (6, 0.757),
+    (8, 0.755), (10, 0.754), (12, 0.754), (15, 0.754), (20, 0.753), (np.inf, 0.752),
+]
+
+# Dixon's test 5% critical values for n = 3..25 (EPA QA/G-9, Table A-5),
+# for the ratio statistic used at each n (r10, r11, r21, r22)
+DIXON_05 = [
+    (3, 0.941), (4, 0.765), (5, 0.642), (6, 0.560), (7, 0.507), (8, 0.554),
+    (9, 0.512), (10, 0.477), (11, 0.576), (12, 0.546), (13, 0.521), (14, 0.546),
+    (15, 0.525), (16, 0.507), (17, 0.490), (18, 0.475), (19, 0.462), (20, 0.450),
+    (21, 0.440), (22, 0.430), (23, 0.421), (24, 0.413), (25, 0.406),
+]
+
+ROSNER_MAX_N = 10000
+
+CHI_SQUARE_DF = np.geomspace(0.5, 1e6, 481)
+CHI_SQUARE_LEVELS = special.expit(np.linspace(special.logit(0.001), special.logit(0.999), 300))
+
+TOLERANCE_N = np.unique(np.r_[2:101, np.round(np.geomspace(101, 10000, 60))]).astype(float)
+
+LAND_H_N = np.unique(np.r_[3:21, np.round(np.geomspace(21, 5000, 30))]).astype(float)
+LAND_H_S = np.r_[np.arange(0.05, 4.0001, 0.1), np.arange(4.5, 10.0001, 0.5)]
+
+
+@lru_cache(maxsize=None)
+def _chi_square_table():
+    # log quantile is smooth in (log df, logit level), which keeps linear
+    # interpolation accurate in both tails and down to fractional degrees
+    # of freedom
+    grid = np.log(stats.chi2.ppf(CHI_SQUARE_LEVELS[None, :], CHI_SQUARE_DF[:, None]))
+    return RegularGridInterpolator((np.log(CHI_SQUARE_DF), special.logit(CHI_SQUARE_LEVELS)), grid)
+
+
+def chi_square_quantile(level, df):
+    """Chi-square quantile at probability level for arrays of df."""
+    level, df = np.broadcast_arrays(np.asarray(level, dtype=float), np.asarray(df, dtype=float))
+    valid = np.isfinite(df) & (df > 0)
+    points = np.stack([
+        np.log(np.clip(np.where(valid, df, 1.0), CHI_SQUARE_DF[0], CHI_SQUARE_DF[-1])),
+        special.logit(np.clip(level, CHI_SQUARE_LEVELS[0], CHI_SQUARE_LEVELS[-1])),
+    ], axis=-1)
+    quantile = np.exp(_chi_square_table()(points.reshape(-1, 2)).reshape(df.shape))
+    return np.where(valid, quantile, np.nan)
+
+
+def adjusted_gamma_level(n):
+    """Adjusted significance level by sample size, interpolated in 1/n."""
+    sizes, levels = zip(*ADJUSTED_GAMMA_LEVELS)
+    inverse = 1 / np.asarray(sizes, dtype=float)
+    return np.interp(1 / np.maximum(np.asarray(n, dtype=float), sizes[0]), inverse[::-1], levels[::-1])
+
+
+def lilliefors_critical(n):
+    """5% critical value of the Lilliefors D statistic (NaN for n < 4)."""
+    n = np.asarray(n, dtype=float)
+    sizes, values = zip(*LILLIEFORS_05)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        critical = np.where(n <= sizes[-1], np.interp(n, sizes, values), 0.886 / np.sqrt(n))
+    return np.where(n >= sizes[0], critical, np.nan)
+
+
+def anderson_darling_gamma_critical(k):
+    """
+    5% critical value of A^2 for a gamma fit with estimated shape k,
+    interpolated in 1/k. Shapes below 1 use the k = 1 value.
+    """
+    shapes, values = zip(*ANDERSON_DARLING_GAMMA_05)
+    inverse = 1 / np.asarray(shapes, dtype=float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        inverse_k = 1 / np.maximum(np.asarray(k, dtype=float), 1.0)
+    return np.interp(inverse_k, inverse[::-1], values[::-1])
+
+
+@lru_cache(maxsize=None)
+def _land_h_table(confidence, nodes=400):
+    """
+    Land's exact H on the (n, s_y) grid, from the conditional test of
+    theta = mu + sigma^2 / 2 that Land's UCL inverts.
+
+    With y_bar = 0, the UCL theta = s^2 / 2 + s H / sqrt(n - 1) is the
+    theta at which P(Y_bar <= 0 | V) = 1 - confidence, V = sum(y^2) -
+    2 n theta y_bar. Given V, x = (1 + (Y_bar - theta) sqrt(n) / R) / 2
+    with R^2 = (n - 1) s^2 + n theta^2 has density proportional to
+    exp(-sqrt(n) R x) (x (1 - x))^((n - 3) / 2) on (0, 1). The density and
+    its tail below the observed x are integrated in logit(x) by the
+    midpoint rule from 14 Laplace spreads below the mode, and H is found
+    by bisection on log H for the whole grid at once.
+    """
+    n = LAND_H_N[:, None]
+    s = LAND_H_S[None, :]
+    a = (n - 1) / 2
+    nodes = (np.arange(nodes) + 0.5) / nodes
+
+    def log_density(logit, c):
+        x = special.expit(logit)
+        return -2 * c[..., None] * x + a[..., None] * (np.log(x) + np.log1p(-x))
+
+    def lower_tail(h):
+        theta = s ** 2 / 2 + s * h / np.sqrt(n - 1)
+        r = np.sqrt((n - 1) * s ** 2 + n * theta ** 2)
+        c = np.sqrt(n) * r / 2
+        x_observed = (n - 1) * s ** 2 / (2 * r * (r + theta * np.sqrt(n)))
+        # Mode of the density in logit(x) and its spread there
+        b = 2 * (c + a)
+        mode = 2 * a / (b + np.sqrt(b ** 2 - 8 * c * a))
+        spread = 1 / np.sqrt(2 * mode * (1 - mode) * (c * (1 - 2 * mode) + a))
+        start = np.log(mode / (1 - mode)) - 14 * spread
+        stop = np.maximum(special.logit(x_observed), start)
+        whole = start[..., None] + 28 * spread[..., None] * nodes
+        tail = start[..., None] + (stop - start)[..., None] * nodes
+        peak = log_density(whole, c).max(axis=-1, keepdims=True)
+        return (
+            (stop - start) * np.exp(log_density(tail, c) - peak).sum(axis=-1)
+            / (28 * spread * np.exp(log_density(whole, c) - peak).sum(axis=-1))
+        )
+
+    low = np.full((len(LAND_H_N), len(LAND_H_S)), np.log(0.5))
+    high = np.full_like(low, np.log(1e4))
+    for _ in range(40):
+        mid = (low + high) / 2
+        above = lower_tail(np.exp(mid)) > 1 - confidence
+        low = np.where(above, mid, low)
+        high = np.where(above, high, mid)
+
+    return RegularGridInterpolator((np.log(LAND_H_N), LAND_H_S), np.exp((low + high) / 2))
+
+
+def land_h(n, s_y, confidence=0.95):
+    """Land's H statistic for arrays of sample size and log-scale SD."""
+    n, s_y = np.broadcast_arrays(np.asarray(n, dtype=float), np.asarray(s_y, dtype=float))
+    valid = (n >= 3) & np.isfinite(s_y) & (s_y > 0)
+    points = np.stack([
+        np.log(np.clip(np.where(valid, n, 3.0), LAND_H_N[0], LAND_H_N[-1])),
+        np.clip(np.where(valid, s_y, 1.0), LAND_H_S[0], LAND_H_S[-1]),
+    ], axis=-1)
+    h = _land_h_table(confidence)(points.reshape(-1, 2)).reshape(n.shape)
+    return np.where(valid, h, np.nan)
+
+
+@lru_cache(maxsize=None)
+def _tolerance_table(coverage, confidence):
+    # One-sided normal tolerance factor from the noncentral t distribution
+    n = TOLERANCE_N
+    return stats.nct.ppf(confidence, n - 1, stats.norm.ppf(coverage) * np.sqrt(n)) / np.sqrt(n)
+
+
+def tolerance_factor(n, coverage=0.95, confidence=0.95):
+    """
+    One-sided normal tolerance factor K (UTL = mean + K sd) for arrays of
+    sample size, interpolated in log n. NaN for n < 2.
+    """
+    n = np.asarray(n, dtype=float)
+    valid = n >= 2
+    table = _tolerance_table(coverage, confidence)
+    k = np.interp(np.log(np.clip(np.where(valid, n, 2.0), 2.0, TOLERANCE_N[-1])), np.log(TOLERANCE_N), table)
+    return np.where(valid, k, np.nan)
+
+
+@lru_cache(maxsize=None)
+def _usl_table(confidence):
+    # Critical value of the largest squared Mahalanobis distance, from the
+    # scaled beta distribution with a Bonferroni level (ProUCL's d2max)
+    n = TOLERANCE_N[TOLERANCE_N >= 3]
+    d2max = (n - 1) ** 2 / n * stats.beta.ppf(1 - (1 - confidence) / n, 0.5, (n - 2) / 2)
+    return n, np.sqrt(d2max)
+
+
+def usl_factor(n, confidence=0.95):
+    """
+    Upper simultaneous limit factor (USL = mean + factor sd) for arrays of
+    sample size, interpolated in log n. NaN for n < 3.
+    """
+    n = np.asarray(n, dtype=float)
+    valid = n >= 3
+    sizes, table = _usl_table(confidence)
+    factor = np.interp(np.log(np.clip(np.where(valid, n, 3.0), 3.0, sizes[-1])), np.log(sizes), table)
+    return np.where(valid, factor, np.nan)
+
+
+def dixon_critical(n):
+    """5% critical value of Dixon's ratio for n = 3..25 (NaN otherwise)."""
+    n = np.asarray(n, dtype=float)
+    sizes, values = zip(*DIXON_05)
+    critical = np.interp(n, sizes, values)
+    return np.where((n >= sizes[0]) & (n <= sizes[-1]), critical, np.nan)
+
+
+@lru_cache(maxsize=None)
+def _rosner_table(alpha):
+    # Generalized ESD critical value for a step with m observations left:
+    # (m - 1) t / sqrt((m - 2 + t^2) m), t at 1 - alpha / (2m) with m - 2 df
+    m = np.arange(3, ROSNER_MAX_N + 1, dtype=float)
+    t = stats.t.ppf(1 - alpha / (2 * m), m - 2)
+    return np.r_[np.full(3, np.nan), (m - 1) * t / np.sqrt((m - 2 + t ** 2) * m)]
+
+
+def rosner_critical(m, alpha=0.05):
+    """
+    Rosner (generalized ESD) critical value for arrays of the number of
+    observations remaining at a step. NaN below 3; sizes above
+    ROSNER_MAX_N use the largest tabulated value.
+    """
+    m = np.asarray(m)
+    table = _rosner_table(alpha)
+    return table[np.clip(m, 0, ROSNER_MAX_N).astype(int)]
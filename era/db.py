@@ -0,0 +1,47 @@
+"""
+Small DuckDB helpers shared by the ERA modules.
+"""
+
+
+def table_exists(conn, table_name):
+    """Return True if a table or view with this name exists."""
+    count = conn.execute("""
+        SELECT COUNT(*) FROM (
+            SELECT table_name AS name FROM duckdb_tables()
+            UNION ALL
+            SELECT view_name FROM duckdb_views() WHERE NOT internal
+        )
+        WHERE name = ?
+    """, [table_name]).fetchone()[0]
+    return count > 0
+
+
+def start_ingest_batch(conn, source=None):
+    """Record a new ingest batch and return its batch_id."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS meta_ingest_batches (
+            batch_id INTEGER PRIMARY KEY,
+            ingested_at TIMESTAMP,
+            source VARCHAR
+        )
+    """)
+    batch_id = conn.execute("""
+        SELECT COALESCE(MAX(batch_id), 0) + 1 FROM meta_ingest_batches
+    """).fetchone()[0]
+    conn.execute("""
+        INSERT INTO meta_ingest_batches VALUES (?, current_localtimestamp(), ?)
+    """, [batch_id, source])
+    return batch_id
+
+
+def data_version(conn):
+    """
+    Latest ingest batch_id (0 before the first batch). Ingest records a
+    batch after results are loaded and normalized, so in-memory caches of
+    fact tables are stale once this changes.
+    """
+    if not table_exists(conn, "meta_ingest_batches"):
+        return 0
+    return conn.execute("""
+        SELECT COALESCE(MAX(batch_id), 0) FROM meta_ingest_batches
+    """).fetchone()[0]
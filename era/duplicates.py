@@ -0,0 +1,169 @@
+"""
+Statistics-ready results: field duplicates combined with their parent
+samples and QC samples left out, in one set-based pass.
+
+fact_samples.sample_type separates normal samples (N) from field
+duplicates (FD), trip blanks (TB), equipment blanks (EB) and matrix
+spikes (MS). Only N and FD samples describe site conditions, and a
+duplicate is a second measurement of its parent sample, not an
+independent sample. Each duplicate is paired with its parent:
+
+    declared   fact_samples.parent_sample_id, when it names a normal sample
+    inferred   otherwise, the normal sample from the same location, date,
+               matrix and depth interval
+
+and each (parent, analyte) pair is reduced to one result by
+DUPLICATE_RULES:
+
+    max        highest detected value
+    mean       mean of the detected values
+    parent     the parent's result; the duplicate only stands in when
+               the parent has no result for the analyte
+
+A pair with no detects is a non-detect at its lowest detection limit.
+Duplicates without a parent are kept as samples of their own.
+
+The result is stat_results, one row per sample and analyte with the
+normalized fact_results columns, which the statistics modules (era.ucl,
+era.outliers, era.trends, era.background, era.btv) read instead of
+fact_results. Screening (era.screening) still uses every result. The
+table is rebuilt by ensure_statistics_results() when the data version
+(era.db.data_version) or the duplicate rule has changed.
+"""
+
+from era.db import data_version, table_exists
+
+DUPLICATE_RULES = ("max", "mean", "parent")
+DEFAULT_DUPLICATE_RULE = "max"
+
+# Sample types that describe site conditions; everything else is QC
+STATISTICS_SAMPLE_TYPES = ("N", "FD")
+
+STATISTICS_RESULTS_SQL = """
+    CREATE OR REPLACE TABLE stat_results AS
+    WITH samples AS (
+        SELECT
+            sample_id,
+            location_id,
+            sample_date,
+            matrix_code,
+            depth_top_ft,
+            depth_bottom_ft,
+            parent_sample_id,
+            coalesce(sample_type, 'N') as sample_type
+        FROM fact_samples
+        WHERE coalesce(sample_type, 'N') = ANY($sample_types)
+    ),
+    parents AS (
+        SELECT
+            d.sample_id,
+            coalesce(declared.sample_id, min(p.sample_id), d.sample_id) as parent_sample_id
+        FROM samples d
+        LEFT JOIN samples declared
+          ON d.sample_type = 'FD'
+         AND declared.sample_id = d.parent_sample_id
+         AND declared.sample_type = 'N'
+        LEFT JOIN samples p
+          ON d.sample_type = 'FD'
+         AND p.sample_type = 'N'
+         AND p.location_id = d.location_id
+         AND p.sample_date = d.sample_date
+         AND p.matrix_code = d.matrix_code
+         AND p.depth_top_ft IS NOT DISTINCT FROM d.depth_top_ft
+         AND p.depth_bottom_ft IS NOT DISTINCT FROM d.depth_bottom_ft
+        GROUP BY d.sample_id, declared.sample_id
+    ),
+    results AS (
+        SELECT
+            pa.parent_sample_id,
+            pa.sample_id <> pa.parent_sample_id as is_duplicate,
+            r.result_id,
+            r.cas_rn,
+            r.result_value_norm,
+            r.detection_limit_norm,
+            r.result_unit_norm,
+            r.detect_flag = 'Y' as detected,
+            r.lab_qualifier
+        FROM fact_results r
+        JOIN parents pa ON r.sample_id = pa.sample_id
+        WHERE r.result_unit_norm IS NOT NULL
+        QUALIFY $rule <> 'parent'
+             OR NOT is_duplicate
+             OR NOT bool_or(NOT is_duplicate) OVER (PARTITION BY pa.parent_sample_id, r.cas_rn)
+    )
+    SELECT
+        coalesce(min(r.result_id) FILTER (WHERE NOT r.is_duplicate), min(r.result_id)) as result_id,
+        r.parent_sample_id as sample_id,
+        s.location_id,
+        s.sample_date,
+        s.matrix_code,
+        s.sample_type,
+        r.cas_rn,
+        CASE
+            WHEN NOT bool_or(r.detected) THEN min(r.detection_limit_norm)
+            WHEN $rule = 'mean' THEN avg(r.result_value_norm) FILTER (WHERE r.detected)
+            ELSE max(r.result_value_norm) FILTER (WHERE r.detected)
+        END as result_value_norm,
+        CASE
+            WHEN bool_or(r.detected) THEN min(r.detection_limit_norm) FILTER (WHERE r.detected)
+            ELSE min(r.detection_limit_norm)
+        END as detection_limit_norm,
+        r.result_unit_norm,
+        CASE WHEN bool_or(r.detected) THEN 'Y' ELSE 'N' END as detect_flag,
+        first(r.lab_qualifier ORDER BY r.is_duplicate, r.result_id) as lab_qualifier,
+        count(*) as n_results,
+        $rule as duplicate_rule
+    FROM results r
+    JOIN samples s ON r.parent_sample_id = s.sample_id
+    GROUP BY r.parent_sample_id, s.location_id, s.sample_date, s.matrix_code, s.sample_type,
+             r.cas_rn, r.result_unit_norm
+"""
+
+
+def ensure_sample_parents(conn):
+    """Add fact_samples.parent_sample_id to databases created before it existed."""
+    conn.execute("ALTER TABLE fact_samples ADD COLUMN IF NOT EXISTS parent_sample_id VARCHAR")
+
+
+def materialize_statistics_results(conn, rule=DEFAULT_DUPLICATE_RULE):
+    """
+    Build stat_results with the given duplicate rule and record the data
+    version and rule it was built from. Returns the number of rows.
+    """
+    if rule not in DUPLICATE_RULES:
+        raise ValueError(f"Unknown duplicate rule {rule!r}; expected one of {DUPLICATE_RULES}")
+    ensure_sample_parents(conn)
+    conn.execute(STATISTICS_RESULTS_SQL, {"rule": rule, "sample_types": list(STATISTICS_SAMPLE_TYPES)})
+    conn.execute("""
+        CREATE OR REPLACE TABLE meta_statistics_results AS
+        SELECT ? as data_version, ? as duplicate_rule, current_localtimestamp() as built_at
+    """, [data_version(conn), rule])
+    return conn.execute("SELECT COUNT(*) FROM stat_results").fetchone()[0]
+
+
+def statistics_results_state(conn):
+    """(data_version, duplicate_rule) stat_results was built from, or None."""
+    if not (table_exists(conn, "stat_results") and table_exists(conn, "meta_statistics_results")):
+        return None
+    return conn.execute("""
+        SELECT data_version, duplicate_rule FROM meta_statistics_results
+    """).fetchone()
+
+
+def current_duplicate_rule(conn):
+    """Duplicate rule stat_results was last built with, or the default."""
+    state = statistics_results_state(conn)
+    return DEFAULT_DUPLICATE_RULE if state is None else state[1]
+
+
+def ensure_statistics_results(conn, rule=None):
+    """
+    Rebuild stat_results if it is missing, older than the current data
+    version, or (when rule is given) built with another duplicate rule.
+    Without a rule, a rebuild keeps the rule last used.
+    """
+    state = statistics_results_state(conn)
+    current_rule = DEFAULT_DUPLICATE_RULE if state is None else state[1]
+    rule = rule or current_rule
+    if state is None or state[0] != data_version(conn) or rule != current_rule:
+        materialize_statistics_results(conn, rule)
@@ -0,0 +1,211 @@
+"""
+Goodness-of-fit tests for every EPC group in one vectorized sweep.
+
+Tests run on each group's detected values (as ProUCL does for censored
+data), sorted within the group:
+
+    Shapiro-Wilk (Royston's AS R94 coefficients and p-value), n 3..5000,
+        on the values and on their logs
+    Lilliefors D with the tabulated 5% critical values, on values and logs
+    Anderson-Darling A^2 for a gamma fit with estimated shape
+
+ProUCL uses Shapiro-Wilk up to n = 50 and Lilliefors above. Results are
+cached in stat_gof_cache by a content hash of each group's detects, so
+unchanged groups are not retested.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import special
+
+from era.critical_values import anderson_darling_gamma_critical, lilliefors_critical
+from era.segments import Segments
+
+# Bump when a test or its inputs change so cached statistics are recomputed
+GOF_VERSION = "gof-2"
+
+SIGNIFICANCE = 0.05
+
+GOF_COLUMNS = [
+    "n_gof", "sw_w", "sw_p", "sw_log_w", "sw_log_p",
+    "lilliefors_d", "lilliefors_log_d", "lilliefors_crit",
+    "ad_gamma", "ad_gamma_crit", "gof_distribution",
+]
+
+
+def _poly(coefficients, x):
+    return sum(c * x ** i for i, c in enumerate(coefficients))
+
+
+def shapiro_wilk(seg, x):
+    """Shapiro-Wilk W and p-value per group for values sorted within groups."""
+    n = seg.broadcast(seg.counts).astype(float)
+    i = seg.position() + 1.0
+    last = i == n
+    second_last = i == n - 1
+
+    m = special.ndtri((i - 0.375) / (n + 0.25))
+    summ2 = seg.broadcast(seg.sum(m ** 2))
+    u = 1 / np.sqrt(n)
+    m_n = seg.broadcast(seg.max(m))
+    m_n1 = seg.broadcast(seg.sum(np.where(second_last, m, 0.0)))
+
+    a_n = m_n / np.sqrt(summ2) + _poly([0, 0.221157, -0.147981, -2.071190, 4.434685, -2.706056], u)
+    a_n1 = m_n1 / np.sqrt(summ2) + _poly([0, 0.042981, -0.293762, -1.752461, 5.682633, -3.582633], u)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        phi = np.where(
+            n > 5,
+            (summ2 - 2 * m_n ** 2 - 2 * m_n1 ** 2) / (1 - 2 * a_n ** 2 - 2 * a_n1 ** 2),
+            (summ2 - 2 * m_n ** 2) / (1 - 2 * a_n ** 2),
+        )
+        a = m / np.sqrt(phi)
+    a = np.where(last, a_n, np.where(i == 1, -a_n, a))
+    a = np.where((n > 5) & second_last, a_n1, np.where((n > 5) & (i == 2), -a_n1, a))
+    a = np.where(n == 3, np.sign(m) * np.sqrt(0.5), a)
+
+    mean = seg.broadcast(seg.mean(x))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        w = np.minimum(seg.sum(a * x) ** 2 / seg.sum((x - mean) ** 2), 1.0)
+
+    size = seg.counts.astype(float)
+    y = np.log1p(-w)
+    log_n = np.log(size)
+    small = size <= 11
+    gamma = _poly([-2.273, 0.459], size)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        small_y = -np.log(gamma - y)
+        z = np.where(
+            small,
+            (small_y - _poly([0.5440, -0.39978, 0.025054, -0.0006714], size))
+            / np.exp(_poly([1.3822, -0.77857, 0.062767, -0.0020322], size)),
+            (y - _poly([-1.5861, -0.31082, -0.083751, 0.0038915], log_n))
+            / np.exp(_poly([-0.4803, -0.082676, 0.0030302], log_n)),
+        )
+        p = special.ndtr(-z)
+        p = np.where(small & (y >= gamma), 0.0, p)
+        p_three = 6 / np.pi * (np.arcsin(np.sqrt(w)) - np.arcsin(np.sqrt(0.75)))
+    p = np.where(size == 3, np.maximum(p_three, 0.0), p)
+
+    valid = (size >= 3) & (size <= 5000) & (seg.max(x) > seg.min(x))
+    return np.where(valid, w, np.nan), np.where(valid, p, np.nan)
+
+
+def lilliefors(seg, x):
+    """Lilliefors (KS with estimated mean and SD) D statistic per group."""
+    n = seg.broadcast(seg.counts).astype(float)
+    i = seg.position() + 1.0
+    mean = seg.broadcast(seg.mean(x))
+    sd = seg.broadcast(np.sqrt(seg.var(x)))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cdf = special.ndtr((x - mean) / sd)
+    d = seg.max(np.maximum(i / n - cdf, cdf - (i - 1) / n))
+    return np.where(seg.counts >= 4, d, np.nan)
+
+
+def anderson_darling_gamma(seg, x):
+    """Anderson-Darling A^2 for a gamma fit (Thom's shape estimate) per group."""
+    n = seg.broadcast(seg.counts).astype(float)
+    i = seg.position() + 1.0
+    positive = seg.min(x) > 0
+    log_x = np.log(np.where(x > 0, x, 1.0))
+    mean = seg.mean(x)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        a = np.log(mean) - seg.mean(log_x)
+        k = (3 - a + np.sqrt((a - 3) ** 2 + 24 * a)) / (12 * a)
+        cdf = special.gammainc(seg.broadcast(k), x * seg.broadcast(k / mean))
+    cdf = np.clip(cdf, 1e-300, 1 - 1e-16)
+    reverse = seg.broadcast(seg.starts) + seg.broadcast(seg.counts) - 1 - seg.position()
+    terms = (2 * i - 1) * (np.log(cdf) + np.log1p(-cdf[reverse]))
+    a2 = -seg.counts - seg.sum(terms) / seg.counts
+    valid = positive & (seg.counts >= 3) & (a > 0)
+    return np.where(valid, a2, np.nan), np.where(valid, k, np.nan)
+
+
+def goodness_of_fit(detects, keys):
+    """
+    Run every test on detects (one row per detected result with the key
+    columns and result_value). Returns one row per group with the test
+    statistics and the first distribution that fits (Normal, Gamma,
+    Lognormal) or Nonparametric.
+    """
+    seg = Segments(detects, keys, ["result_value"])
+    x = seg.column("result_value")
+    log_x = np.log(np.where(x > 0, x, np.nan))
+
+    sw_w, sw_p = shapiro_wilk(seg, x)
+    sw_log_w, sw_log_p = shapiro_wilk(seg, log_x)
+    d = lilliefors(seg, x)
+    log_d = lilliefors(seg, log_x)
+    critical = lilliefors_critical(seg.counts)
+    a2, k = anderson_darling_gamma(seg, x)
+    a2_critical = anderson_darling_gamma_critical(k)
+
+    # Shapiro-Wilk up to n = 50, Lilliefors above (ProUCL)
+    use_sw = seg.counts <= 50
+    normal = np.where(use_sw, sw_p >= SIGNIFICANCE, d < critical)
+    lognormal = np.where(use_sw, sw_log_p >= SIGNIFICANCE, log_d < critical)
+    gamma = a2 < a2_critical
+
+    gof = seg.groups.copy()
+    gof["n_gof"] = seg.counts
+    gof["sw_w"] = sw_w
+    gof["sw_p"] = sw_p
+    gof["sw_log_w"] = sw_log_w
+    gof["sw_log_p"] = sw_log_p
+    gof["lilliefors_d"] = d
+    gof["lilliefors_log_d"] = log_d
+    gof["lilliefors_crit"] = critical
+    gof["ad_gamma"] = a2
+    gof["ad_gamma_crit"] = a2_critical
+    gof["gof_distribution"] = np.select(
+        [normal, gamma, lognormal], ["Normal", "Gamma", "Lognormal"], default="Nonparametric"
+    )
+    return gof
+
+
+def cached_goodness_of_fit(conn, data, keys):
+    """
+    Goodness of fit for every group in data, retesting only groups whose
+    detects are not already in stat_gof_cache for the current GOF_VERSION.
+
+    Returns (gof, hits, misses).
+    """
+    detects = data.loc[data["detect_flag"] == "Y", [*keys, "result_value"]].dropna()
+    seg = Segments(detects, keys, ["result_value"])
+    groups = seg.groups.assign(data_hash=seg.hashes(["result_value"]))
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS stat_gof_cache (
+            data_hash VARCHAR,
+            gof_version VARCHAR,
+            n_gof BIGINT,
+            sw_w DOUBLE, sw_p DOUBLE, sw_log_w DOUBLE, sw_log_p DOUBLE,
+            lilliefors_d DOUBLE, lilliefors_log_d DOUBLE, lilliefors_crit DOUBLE,
+            ad_gamma DOUBLE, ad_gamma_crit DOUBLE,
+            gof_distribution VARCHAR,
+            PRIMARY KEY (data_hash, gof_version)
+        )
+    """)
+    cached = conn.execute(f"""
+        SELECT data_hash, {', '.join(GOF_COLUMNS)}
+        FROM stat_gof_cache
+        WHERE gof_version = ?
+    """, [GOF_VERSION]).fetchdf()
+
+    missing = groups[~groups["data_hash"].isin(cached["data_hash"])]
+    if len(missing):
+        stale = detects.merge(missing, on=list(keys))
+        fresh = goodness_of_fit(stale, keys).merge(missing, on=list(keys))
+        fresh = fresh[["data_hash", *GOF_COLUMNS]].drop_duplicates("data_hash")
+        conn.register("gof_frame", fresh)
+        try:
+            conn.execute(f"""
+                INSERT OR REPLACE INTO stat_gof_cache
+                SELECT data_hash, '{GOF_VERSION}', {', '.join(GOF_COLUMNS)} FROM gof_frame
+            """)
+        finally:
+            conn.unregister("gof_frame")
+        cached = pd.concat([cached, fresh], ignore_index=True)
+
+    gof = groups.merge(cached, on="data_hash", how="left")
+    return gof, len(groups) - len(missing), len(missing)
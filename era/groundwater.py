@@ -0,0 +1,277 @@
+"""
+Groundwater elevations, hydraulic gradient and flow direction from
+depth-to-water field measurements.
+
+Depth to water (DTW, feet below the well's measuring point) is read at
+every monitoring well during each sampling event and stored with the
+other field parameters in fact_field_measurements. The groundwater
+elevation is the well's dim_locations.elevation_ft less the depth to
+water; repeat readings at a well on one date are averaged.
+
+For every event with at least MIN_WELLS wells a plane
+
+    h = h0 + b x + c y
+
+is fitted by least squares on east (x) / north (y) feet around the
+site's well centroid (era.spatial.local_xy). All events are fitted
+together from their mean-centered sums (Segments), so the cost is one
+pass over the elevations. The hydraulic gradient is |(b, c)| ft/ft and
+groundwater flows down it, toward azimuth atan2(-b, -c) (degrees
+clockwise from north). Events whose wells are (nearly) collinear have no
+gradient.
+
+Elevations and gradients are stored as stat_gw_elevations and
+stat_gw_gradients and rebuilt by ensure_groundwater_gradients() when the
+data version (era.db.data_version) or the depth-to-water readings have
+changed, so the gradient history of a site is one query on
+stat_gw_gradients. The potentiometric surface of one event is gridded
+by era.interpolation.
+"""
+
+import numpy as np
+import pandas as pd
+
+from era.db import data_version, table_exists
+from era.interpolation import interpolate
+from era.segments import Segments
+from era.spatial import local_xy
+
+# Field parameter names in the field measurement EDD and their codes
+FIELD_PARAMETER_CODES = {
+    "pH": "PH",
+    "Specific Conductance": "SC",
+    "Temperature": "TEMP",
+    "Dissolved Oxygen": "DO",
+    "ORP": "ORP",
+    "Turbidity": "TURB",
+    "Depth to Water": "DTW",
+}
+DEPTH_TO_WATER = "DTW"
+FEET_PER_METER = 3.28084
+
+MIN_WELLS = 3
+# Wells closer to a line than this (relative spread) give no gradient
+COLLINEAR_TOLERANCE = 1e-6
+
+COMPASS_POINTS = (
+    "N", "NNE", "NE", "ENE", "E", "ESE", "SE", "SSE",
+    "S", "SSW", "SW", "WSW", "W", "WNW", "NW", "NNW",
+)
+
+FIELD_MEASUREMENT_SQL = """
+    INSERT INTO fact_field_measurements BY NAME
+    SELECT
+        f.measurement_id,
+        s.sample_id,
+        coalesce(f.location_id, s.location_id) as location_id,
+        coalesce(f.measurement_date, s.sample_date) as measurement_date,
+        f.parameter_code,
+        f.parameter_name,
+        f.result_value,
+        f.result_unit,
+        f.notes
+    FROM field_frame f
+    LEFT JOIN fact_samples s ON f.sample_id = s.sample_id
+"""
+
+ELEVATIONS_SQL = """
+    SELECT
+        f.measurement_date as sample_date,
+        f.location_id,
+        l.latitude::DOUBLE as latitude,
+        l.longitude::DOUBLE as longitude,
+        l.elevation_ft::DOUBLE as elevation_ft,
+        avg(CASE lower(f.result_unit)
+            WHEN 'm' THEN f.result_value * $feet_per_meter
+            ELSE f.result_value
+        END)::DOUBLE as depth_to_water_ft,
+        count(*) as n_readings
+    FROM fact_field_measurements f
+    JOIN dim_locations l ON f.location_id = l.location_id
+    WHERE f.parameter_code = $parameter_code
+      AND f.result_value IS NOT NULL
+      AND f.measurement_date IS NOT NULL
+      AND l.elevation_ft IS NOT NULL
+      AND l.latitude IS NOT NULL
+      AND l.longitude IS NOT NULL
+    GROUP BY f.measurement_date, f.location_id, l.latitude, l.longitude, l.elevation_ft
+    ORDER BY f.measurement_date, f.location_id
+"""
+
+
+def ensure_field_measurements(conn):
+    """
+    Create fact_field_measurements, and add location_id/measurement_date
+    to databases created before readings could be stored without a lab
+    sample.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS fact_field_measurements (
+            measurement_id INTEGER PRIMARY KEY,
+            sample_id VARCHAR,
+            parameter_code VARCHAR,
+            parameter_name VARCHAR,
+            result_value DECIMAL(12,4),
+            result_unit VARCHAR,
+            measurement_time TIME,
+            instrument_id VARCHAR,
+            notes TEXT
+        )
+    """)
+    conn.execute("ALTER TABLE fact_field_measurements ADD COLUMN IF NOT EXISTS location_id VARCHAR")
+    conn.execute("ALTER TABLE fact_field_measurements ADD COLUMN IF NOT EXISTS measurement_date DATE")
+
+
+def load_field_measurements(conn, measurements):
+    """
+    Replace fact_field_measurements with a field measurement EDD frame
+    (sample_id, location_id, measurement_date, parameter, result, unit,
+    notes). Readings whose sample_id is not a lab sample are kept with
+    their location and date only. Returns the number of rows.
+    """
+    ensure_field_measurements(conn)
+    parameter = measurements["parameter"].astype(str)
+    frame = pd.DataFrame({
+        "measurement_id": np.arange(1, len(measurements) + 1),
+        "sample_id": measurements["sample_id"].astype(object),
+        "location_id": measurements["location_id"].astype(object),
+        "measurement_date": pd.to_datetime(measurements["measurement_date"]).dt.date,
+        "parameter_code": parameter.map(FIELD_PARAMETER_CODES).fillna(parameter.str.upper()),
+        "parameter_name": parameter,
+        "result_value": pd.to_numeric(measurements["result"], errors="coerce"),
+        "result_unit": measurements["unit"].astype(object),
+        "notes": measurements["notes"].astype(object),
+    })
+    frame = frame.astype(object).where(frame.notna(), None)
+
+    conn.execute("DELETE FROM fact_field_measurements")
+    conn.register("field_frame", frame)
+    try:
+        conn.execute(FIELD_MEASUREMENT_SQL)
+    finally:
+        conn.unregister("field_frame")
+    return conn.execute("SELECT COUNT(*) FROM fact_field_measurements").fetchone()[0]
+
+
+def load_groundwater_elevations(conn):
+    """Groundwater elevation of every well and measurement date."""
+    ensure_field_measurements(conn)
+    elevations = conn.execute(
+        ELEVATIONS_SQL, {"feet_per_meter": FEET_PER_METER, "parameter_code": DEPTH_TO_WATER}
+    ).fetchdf()
+    elevations["gw_elevation_ft"] = elevations["elevation_ft"] - elevations["depth_to_water_ft"]
+    return elevations
+
+
+def compass_point(azimuth):
+    """16-point compass direction of azimuths in degrees (None for NaN)."""
+    azimuth = np.asarray(azimuth, dtype=float)
+    index = np.round(np.nan_to_num(azimuth) / 22.5).astype(int) % len(COMPASS_POINTS)
+    return np.where(np.isnan(azimuth), None, np.asarray(COMPASS_POINTS, dtype=object)[index])
+
+
+def fit_gradients(elevations):
+    """
+    Least-squares plane through each event's groundwater elevations, for
+    all events at once. One row per event with the gradient (ft/ft), flow
+    azimuth and compass direction, and the fit's R squared.
+    """
+    origin_latitude, origin_longitude = elevations["latitude"].mean(), elevations["longitude"].mean()
+    seg = Segments(elevations, ["sample_date"], ["location_id"])
+    x, y = local_xy(seg.column("latitude"), seg.column("longitude"), origin_latitude, origin_longitude)
+    h = seg.column("gw_elevation_ft")
+
+    mean_x, mean_y, mean_h = seg.mean(x), seg.mean(y), seg.mean(h)
+    dx, dy, dh = x - seg.broadcast(mean_x), y - seg.broadcast(mean_y), h - seg.broadcast(mean_h)
+    sxx, syy, sxy = seg.sum(dx * dx), seg.sum(dy * dy), seg.sum(dx * dy)
+    sxh, syh, shh = seg.sum(dx * dh), seg.sum(dy * dh), seg.sum(dh * dh)
+
+    det = sxx * syy - sxy ** 2
+    fitted = (seg.counts >= MIN_WELLS) & (det > COLLINEAR_TOLERANCE * sxx * syy) & (det > 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        b = np.where(fitted, (syy * sxh - sxy * syh) / det, np.nan)
+        c = np.where(fitted, (sxx * syh - sxy * sxh) / det, np.nan)
+        r_squared = np.where(shh > 0, 1 - (shh - b * sxh - c * syh) / shh, 1.0)
+
+    gradients = seg.groups.copy()
+    gradients["n_wells"] = seg.counts
+    gradients["mean_gw_elevation_ft"] = mean_h
+    gradients["min_gw_elevation_ft"] = seg.min(h)
+    gradients["max_gw_elevation_ft"] = seg.max(h)
+    gradients["dh_dx"] = b
+    gradients["dh_dy"] = c
+    gradients["gradient_ft_per_ft"] = np.hypot(b, c)
+    gradients["flow_azimuth_deg"] = np.degrees(np.arctan2(-b, -c)) % 360
+    gradients["flow_direction"] = compass_point(gradients["flow_azimuth_deg"])
+    gradients["r_squared"] = np.where(fitted, r_squared, np.nan)
+    return gradients
+
+
+def _state(conn):
+    """(data_version, depth-to-water reading count) the gradients reflect."""
+    ensure_field_measurements(conn)
+    readings = conn.execute("""
+        SELECT COUNT(*) FROM fact_field_measurements WHERE parameter_code = ?
+    """, [DEPTH_TO_WATER]).fetchone()[0]
+    return data_version(conn), readings
+
+
+def materialize_groundwater_gradients(conn):
+    """
+    Build stat_gw_elevations and stat_gw_gradients for every event and
+    record the state they were built from. Returns the gradients.
+    """
+    version, readings = _state(conn)
+    elevations = load_groundwater_elevations(conn)
+    gradients = fit_gradients(elevations)
+    for name, frame in [("stat_gw_elevations", elevations), ("stat_gw_gradients", gradients)]:
+        conn.register("gw_frame", frame)
+        try:
+            conn.execute(f"""
+                CREATE OR REPLACE TABLE {name} AS
+                SELECT * REPLACE (sample_date::DATE AS sample_date) FROM gw_frame
+            """)
+        finally:
+            conn.unregister("gw_frame")
+    conn.execute("""
+        CREATE OR REPLACE TABLE meta_gw_gradients AS
+        SELECT ? as data_version, ? as n_readings, current_localtimestamp() as built_at
+    """, [version, readings])
+    return gradients
+
+
+def ensure_groundwater_gradients(conn):
+    """Rebuild the gradient tables if missing or older than the data."""
+    built = None
+    if table_exists(conn, "stat_gw_gradients") and table_exists(conn, "meta_gw_gradients"):
+        built = conn.execute("SELECT data_version, n_readings FROM meta_gw_gradients").fetchone()
+    if built != _state(conn):
+        materialize_groundwater_gradients(conn)
+
+
+def gradient_history(conn, start_date=None, end_date=None):
+    """Cached gradient and flow direction of every event in a date range."""
+    ensure_groundwater_gradients(conn)
+    return conn.execute("""
+        SELECT * FROM stat_gw_gradients
+        WHERE sample_date >= coalesce(?::DATE, sample_date)
+          AND sample_date <= coalesce(?::DATE, sample_date)
+        ORDER BY sample_date
+    """, [start_date, end_date]).fetchdf()
+
+
+def potentiometric_surface(conn, sample_date, method="idw", **overrides):
+    """
+    Gridded groundwater elevations of one event (era.interpolation
+    (grid, cells)), or None with fewer than MIN_WELLS wells.
+    """
+    ensure_groundwater_gradients(conn)
+    points = conn.execute("""
+        SELECT location_id, latitude, longitude, gw_elevation_ft as value
+        FROM stat_gw_elevations
+        WHERE sample_date = ?::DATE
+        ORDER BY location_id
+    """, [str(sample_date)[:10]]).fetchdf()
+    if len(points) < MIN_WELLS:
+        return None
+    return interpolate(points, method, **overrides)
@@ -0,0 +1,391 @@
+"""
+Concentration grids for one analyte and sampling event by inverse
+distance weighting (IDW) or ordinary kriging.
+
+Input points are the event's stat_results (see era.duplicates) joined to
+dim_locations, one value per location: the highest detect, or half the
+highest detection limit where nothing was detected. Coordinates are
+projected to east/north feet around the points' centroid
+(era.spatial.local_xy) and the grid covers their bounding box plus a
+padding fraction on each side.
+
+    idw       weights 1 / d^power over the `neighbors` nearest points,
+              found for every grid node at once with a KD-tree
+    kriging   ordinary kriging with a spherical, exponential or gaussian
+              variogram (nugget, partial sill, range) fitted by weighted
+              least squares to the binned empirical semivariogram; the
+              kriging system is factored once and solved for blocks of
+              grid nodes together
+
+Grids are cached in stat_interpolation_grids (one row per grid) and
+stat_interpolation_cells (one row per node), keyed by a hash of the
+analyte, matrix, event, method, parameters, input points and
+INTERPOLATION_VERSION, so a map can be redrawn without recomputing its
+grid and a grid is recomputed when its inputs change.
+"""
+
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+from scipy import linalg, optimize
+from scipy.spatial import cKDTree
+
+from era.duplicates import ensure_statistics_results
+from era.spatial import local_to_latlon, local_xy
+
+# Bump when a change alters grid values, so cached grids are recomputed
+INTERPOLATION_VERSION = "interpolation-1"
+
+INTERPOLATION_METHODS = ("idw", "kriging")
+VARIOGRAM_MODELS = ("spherical", "exponential", "gaussian")
+
+MIN_POINTS = 3
+
+# Nodes along the longer side of the grid when no cell size is given
+GRID_CELLS = 50
+MIN_EXTENT_FT = 100.0
+
+# Upper bound on points * grid nodes per kriging solve
+KRIGING_BLOCK = 2_000_000
+
+COMMON_PARAMETERS = {"cell_size_ft": None, "padding": 0.1}
+METHOD_PARAMETERS = {
+    "idw": {"power": 2.0, "neighbors": 8},
+    "kriging": {"model": "spherical", "n_lags": 10},
+}
+
+POINTS_SQL = """
+    SELECT
+        r.sample_date,
+        r.location_id,
+        l.latitude::DOUBLE as latitude,
+        l.longitude::DOUBLE as longitude,
+        bool_or(r.detect_flag = 'Y') as detected,
+        coalesce(
+            max(r.result_value_norm) FILTER (WHERE r.detect_flag = 'Y'),
+            max(r.detection_limit_norm) / 2
+        ) as value
+    FROM stat_results r
+    JOIN dim_locations l ON r.location_id = l.location_id
+    WHERE r.cas_rn = ?
+      AND r.matrix_code = ?
+      AND l.latitude IS NOT NULL
+      AND l.longitude IS NOT NULL
+    GROUP BY r.sample_date, r.location_id, l.latitude, l.longitude
+    ORDER BY r.sample_date, r.location_id
+"""
+
+
+def load_event_points(conn, cas_rn, matrix_code="GW"):
+    """Interpolation input points of every event, one row per event and location."""
+    ensure_statistics_results(conn)
+    points = conn.execute(POINTS_SQL, [cas_rn, matrix_code]).fetchdf()
+    return points.dropna(subset=["value"])
+
+
+def grid_parameters(method, **overrides):
+    """Full parameter set for a method: defaults updated by overrides."""
+    if method not in INTERPOLATION_METHODS:
+        raise ValueError(f"Unknown interpolation method {method!r}; expected one of {INTERPOLATION_METHODS}")
+    parameters = {**COMMON_PARAMETERS, **METHOD_PARAMETERS[method]}
+    unknown = set(overrides) - set(parameters)
+    if unknown:
+        raise ValueError(f"Unknown {method} parameters: {sorted(unknown)}")
+    parameters.update(overrides)
+    if method == "kriging" and parameters["model"] not in VARIOGRAM_MODELS:
+        raise ValueError(f"Unknown variogram model {parameters['model']!r}; expected one of {VARIOGRAM_MODELS}")
+    return parameters
+
+
+def grid_axes(x, y, cell_size_ft=None, padding=COMMON_PARAMETERS["padding"]):
+    """Node coordinates along x and y covering the points' bounding box."""
+    extent = max(np.ptp(x), np.ptp(y), MIN_EXTENT_FT)
+    cell = cell_size_ft or extent / (GRID_CELLS - 1)
+    margin = padding * extent
+    xs = np.arange(x.min() - margin, x.max() + margin + cell / 2, cell)
+    ys = np.arange(y.min() - margin, y.max() + margin + cell / 2, cell)
+    return xs, ys, cell
+
+
+def idw(xy, values, nodes, power=2.0, neighbors=8):
+    """Inverse distance weighted estimate at every node."""
+    k = min(int(neighbors), len(values))
+    distance, index = cKDTree(xy).query(nodes, k=k)
+    distance, index = distance.reshape(len(nodes), k), index.reshape(len(nodes), k)
+    with np.errstate(divide="ignore"):
+        weights = 1.0 / distance ** power
+    # Nodes on top of a point take its value
+    exact = distance[:, 0] == 0
+    weights[exact] = 0.0
+    weights[exact, 0] = 1.0
+    return (weights * values[index]).sum(axis=1) / weights.sum(axis=1)
+
+
+def variogram_function(model, nugget, partial_sill, range_ft):
+    """Semivariance as a function of separation distance for a fitted model."""
+    def gamma(h):
+        r = np.asarray(h, dtype=float) / range_ft
+        if model == "spherical":
+            shape = np.where(r < 1, 1.5 * r - 0.5 * r ** 3, 1.0)
+        elif model == "exponential":
+            shape = 1 - np.exp(-3 * r)
+        else:
+            shape = 1 - np.exp(-3 * r ** 2)
+        return np.where(r > 0, nugget + partial_sill * shape, 0.0)
+    return gamma
+
+
+def empirical_variogram(xy, values, n_lags=10):
+    """
+    Binned semivariance of all point pairs out to half the largest
+    separation. Returns (lag, semivariance, pair count) per non-empty bin.
+    """
+    i, j = np.triu_indices(len(values), k=1)
+    distance = np.linalg.norm(xy[i] - xy[j], axis=1)
+    semivariance = 0.5 * (values[i] - values[j]) ** 2
+    edges = np.linspace(0, distance.max() / 2, n_lags + 1)
+    bins = np.digitize(distance, edges[1:-1])
+    keep = distance <= edges[-1]
+    counts = np.bincount(bins[keep], minlength=n_lags)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        lag = np.bincount(bins[keep], distance[keep], minlength=n_lags) / counts
+        gamma = np.bincount(bins[keep], semivariance[keep], minlength=n_lags) / counts
+    filled = counts > 0
+    return lag[filled], gamma[filled], counts[filled]
+
+
+def fit_variogram(xy, values, model="spherical", n_lags=10):
+    """
+    (nugget, partial_sill, range_ft) by pair-count weighted least squares.
+    Falls back to a pure sill at the sample variance over half the
+    largest separation when there are too few bins to fit.
+    """
+    lag, gamma, counts = empirical_variogram(xy, values, n_lags)
+    max_distance = np.linalg.norm(xy.max(axis=0) - xy.min(axis=0)) or MIN_EXTENT_FT
+    fallback = (0.0, float(np.var(values, ddof=1)), max_distance / 2)
+    if len(lag) < 3 or gamma.max() <= 0:
+        return fallback
+
+    def curve(h, nugget, partial_sill, range_ft):
+        return variogram_function(model, nugget, partial_sill, range_ft)(h)
+
+    try:
+        fitted, _ = optimize.curve_fit(
+            curve, lag, gamma,
+            p0=[0.0, gamma.max(), max_distance / 2],
+            bounds=([0.0, 0.0, max_distance / 100], [gamma.max(), 2 * gamma.max(), 2 * max_distance]),
+            sigma=1 / np.sqrt(counts),
+        )
+    except (RuntimeError, ValueError):
+        return fallback
+    return tuple(float(v) for v in fitted)
+
+
+def ordinary_kriging(xy, values, nodes, gamma):
+    """Ordinary kriging estimate and variance at every node."""
+    n = len(values)
+    system = np.ones((n + 1, n + 1))
+    system[:n, :n] = gamma(np.linalg.norm(xy[:, None] - xy[None, :], axis=2))
+    system[n, n] = 0.0
+    factor = linalg.lu_factor(system)
+
+    estimate = np.empty(len(nodes))
+    variance = np.empty(len(nodes))
+    block = max(KRIGING_BLOCK // (n + 1), 1)
+    for start in range(0, len(nodes), block):
+        chunk = nodes[start:start + block]
+        rhs = np.ones((n + 1, len(chunk)))
+        rhs[:n] = gamma(np.linalg.norm(xy[:, None] - chunk[None, :], axis=2))
+        weights = linalg.lu_solve(factor, rhs)
+        estimate[start:start + block] = values @ weights[:n]
+        variance[start:start + block] = (weights * rhs).sum(axis=0)
+    # Rounding can leave tiny negative variances at the data points
+    return estimate, np.maximum(variance, 0.0)
+
+
+def interpolate(points, method="idw", **overrides):
+    """
+    Grid for one event's points (latitude, longitude, value). Returns
+    (grid, cells): a dict of grid attributes and one row per node.
+    """
+    parameters = grid_parameters(method, **overrides)
+    origin_latitude, origin_longitude = points["latitude"].mean(), points["longitude"].mean()
+    x, y = local_xy(points["latitude"], points["longitude"], origin_latitude, origin_longitude)
+    xy = np.column_stack([x, y])
+    values = points["value"].to_numpy(dtype=float)
+
+    xs, ys, cell = grid_axes(x, y, parameters["cell_size_ft"], parameters["padding"])
+    grid_x, grid_y = np.meshgrid(xs, ys)
+    nodes = np.column_stack([grid_x.ravel(), grid_y.ravel()])
+
+    grid = {
+        "method": method,
+        "parameters": json.dumps(parameters, sort_keys=True),
+        "n_points": len(values),
+        "origin_latitude": origin_latitude,
+        "origin_longitude": origin_longitude,
+        "cell_size_ft": cell,
+        "n_rows": len(ys),
+        "n_cols": len(xs),
+        "nugget": np.nan,
+        "partial_sill": np.nan,
+        "range_ft": np.nan,
+    }
+    if method == "idw":
+        estimate = idw(xy, values, nodes, parameters["power"], parameters["neighbors"])
+        variance = np.full(len(nodes), np.nan)
+    else:
+        nugget, partial_sill, range_ft = fit_variogram(xy, values, parameters["model"], parameters["n_lags"])
+        grid.update(nugget=nugget, partial_sill=partial_sill, range_ft=range_ft)
+        if nugget + partial_sill > 0:
+            estimate, variance = ordinary_kriging(
+                xy, values, nodes, variogram_function(parameters["model"], nugget, partial_sill, range_ft)
+            )
+        else:
+            estimate, variance = np.full(len(nodes), values.mean()), np.zeros(len(nodes))
+
+    latitude, longitude = local_to_latlon(nodes[:, 0], nodes[:, 1], origin_latitude, origin_longitude)
+    cells = pd.DataFrame({
+        "row_index": np.repeat(np.arange(len(ys)), len(xs)),
+        "col_index": np.tile(np.arange(len(xs)), len(ys)),
+        "x_ft": nodes[:, 0],
+        "y_ft": nodes[:, 1],
+        "latitude": latitude,
+        "longitude": longitude,
+        "estimate": estimate,
+        "variance": variance,
+    })
+    return grid, cells
+
+
+def grid_id(cas_rn, matrix_code, sample_date, points, method, parameters):
+    """Cache key of a grid: hash of everything that determines its values."""
+    digest = hashlib.blake2b(digest_size=16)
+    key = [INTERPOLATION_VERSION, cas_rn, matrix_code, sample_date, method, parameters]
+    digest.update(json.dumps(key, sort_keys=True, default=str).encode())
+    for column in ("location_id", "latitude", "longitude", "value"):
+        array = points[column].to_numpy()
+        digest.update((array.astype("U") if array.dtype == object else array.astype(float)).tobytes())
+    return digest.hexdigest()
+
+
+def _ensure_grid_tables(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS stat_interpolation_grids (
+            grid_id VARCHAR PRIMARY KEY,
+            cas_rn VARCHAR,
+            matrix_code VARCHAR,
+            sample_date DATE,
+            method VARCHAR,
+            parameters VARCHAR,
+            n_points BIGINT,
+            origin_latitude DOUBLE,
+            origin_longitude DOUBLE,
+            cell_size_ft DOUBLE,
+            n_rows BIGINT,
+            n_cols BIGINT,
+            nugget DOUBLE,
+            partial_sill DOUBLE,
+            range_ft DOUBLE,
+            created_at TIMESTAMP
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS stat_interpolation_cells (
+            grid_id VARCHAR,
+            row_index INTEGER,
+            col_index INTEGER,
+            x_ft DOUBLE,
+            y_ft DOUBLE,
+            latitude DOUBLE,
+            longitude DOUBLE,
+            estimate DOUBLE,
+            variance DOUBLE
+        )
+    """)
+
+
+def interpolation_grids(conn, cas_rn, matrix_code="GW", method="idw", points=None, sample_dates=None,
+                        **overrides):
+    """
+    Grids for every event of one analyte (or the given sample_dates) with
+    at least MIN_POINTS locations. Cached grids are read in one query and
+    the missing ones computed and stored together. Pass points (a
+    load_event_points() frame) to avoid reloading them.
+
+    Returns (grids, cells): one row per grid in event order, and the nodes
+    of all grids with their grid_id.
+    """
+    if points is None:
+        points = load_event_points(conn, cas_rn, matrix_code)
+    dates = pd.to_datetime(points["sample_date"])
+    if sample_dates is not None:
+        keep = dates.isin(pd.to_datetime(list(sample_dates)))
+        points, dates = points[keep], dates[keep]
+
+    parameters = grid_parameters(method, **overrides)
+    events = {}
+    for sample_date, event in points.groupby(dates, sort=True):
+        if len(event) >= MIN_POINTS:
+            key = grid_id(cas_rn, matrix_code, sample_date.date().isoformat(), event, method,
+                          json.dumps(parameters, sort_keys=True))
+            events[key] = (sample_date, event)
+    if not events:
+        return pd.DataFrame(), pd.DataFrame()
+
+    _ensure_grid_tables(conn)
+    conn.register("grid_keys", pd.DataFrame({"grid_id": list(events)}))
+    try:
+        cached = conn.execute("""
+            SELECT * FROM stat_interpolation_grids
+            WHERE grid_id IN (SELECT grid_id FROM grid_keys)
+        """).fetchdf()
+        cached_cells = conn.execute("""
+            SELECT c.* FROM stat_interpolation_cells c
+            WHERE c.grid_id IN (SELECT grid_id FROM grid_keys)
+            ORDER BY c.grid_id, c.row_index, c.col_index
+        """).fetchdf()
+    finally:
+        conn.unregister("grid_keys")
+
+    known = set(cached["grid_id"])
+    fresh, fresh_cells = [], []
+    for key, (sample_date, event) in events.items():
+        if key in known:
+            continue
+        grid, cells = interpolate(event, method, **overrides)
+        fresh.append({"grid_id": key, "cas_rn": cas_rn, "matrix_code": matrix_code,
+                      "sample_date": sample_date, **grid, "created_at": pd.Timestamp.now()})
+        fresh_cells.append(cells.assign(grid_id=key))
+    if fresh:
+        fresh, fresh_cells = pd.DataFrame(fresh), pd.concat(fresh_cells, ignore_index=True)
+        conn.register("grid_frame", fresh)
+        conn.register("cell_frame", fresh_cells)
+        try:
+            conn.execute("INSERT INTO stat_interpolation_grids BY NAME SELECT * FROM grid_frame")
+            conn.execute("INSERT INTO stat_interpolation_cells BY NAME SELECT * FROM cell_frame")
+        finally:
+            conn.unregister("grid_frame")
+            conn.unregister("cell_frame")
+        cached = pd.concat([cached, fresh], ignore_index=True) if len(cached) else fresh
+        cached_cells = pd.concat([cached_cells, fresh_cells], ignore_index=True) if len(cached_cells) else fresh_cells
+
+    grids = cached.assign(sample_date=pd.to_datetime(cached["sample_date"]))
+    return grids.sort_values("sample_date", kind="mergesort").reset_index(drop=True), cached_cells
+
+
+def interpolation_grid(conn, cas_rn, sample_date, matrix_code="GW", method="idw", points=None,
+                       **overrides):
+    """
+    Grid for one analyte and event (see interpolation_grids). Returns
+    (grid, cells) or None when the event has fewer than MIN_POINTS
+    locations.
+    """
+    grids, cells = interpolation_grids(
+        conn, cas_rn, matrix_code, method, points, sample_dates=[sample_date], **overrides
+    )
+    if not len(grids):
+        return None
+    return grids.iloc[0].to_dict(), cells.drop(columns="grid_id")
@@ -0,0 +1,181 @@
+"""
+Outlier screening of detected results for every analyte/matrix group
+before EPCs are calculated.
+
+Tests run on the natural log of each group's detects: ERA data are
+right-skewed, and a mis-keyed unit (mg/kg entered as ug/kg) is a
+multiplicative error that stands out on the log scale. As in ProUCL,
+Dixon's test is used for 3 to 25 detects and Rosner's generalized ESD
+test above that; both use the 5% critical-value tables in
+era.critical_values. Tukey IQR fences are reported alongside as a
+supporting flag.
+
+    Dixon    ratio of the gap next to the highest (lowest) value to the
+             range, with r10/r11/r21/r22 by sample size
+    Rosner   up to ROSNER_MAX_OUTLIERS most extreme values removed one at
+             a time; the outliers are those removed up to the last step
+             whose R statistic exceeds its critical value
+    IQR      outside Q1 - 1.5 IQR or Q3 + 1.5 IQR
+
+Flagged results are written to stat_outlier_flags (one row per result
+with any flag). is_outlier is the Dixon or Rosner result; era.ucl can
+exclude those results from the EPC calculation.
+"""
+
+import numpy as np
+
+from era.critical_values import dixon_critical, rosner_critical
+from era.duplicates import ensure_statistics_results
+from era.segments import Segments
+
+OUTLIER_KEYS = ("cas_rn", "matrix_code")
+
+ALPHA = 0.05
+DIXON_MAX_N = 25
+ROSNER_MAX_OUTLIERS = 10
+IQR_MULTIPLIER = 1.5
+
+# (gap, trim) for Dixon's ratio by sample size: the gap spans `gap`
+# neighbours of the extreme value and the range excludes `trim` values
+# at the other end (r10, r11, r21, r22)
+DIXON_RATIOS = [(3, 7, 1, 0), (8, 10, 1, 1), (11, 13, 2, 1), (14, 25, 2, 2)]
+
+DETECTS_SQL = """
+    SELECT
+        r.result_id,
+        r.cas_rn,
+        r.matrix_code,
+        r.result_value_norm as result_value
+    FROM stat_results r
+    WHERE r.detect_flag = 'Y'
+      AND r.result_value_norm > 0
+"""
+
+
+def _at(seg, x, offset):
+    """Value at a per-group position (array of offsets from each start)."""
+    return x[seg.starts + np.clip(offset, 0, seg.counts - 1)]
+
+
+def dixon(seg, x):
+    """
+    Dixon's test for the highest and lowest value of each group (values
+    sorted within groups). Returns (high, low) boolean arrays per group.
+    """
+    n = seg.counts
+    gap = np.zeros(len(seg), dtype=int)
+    trim = np.zeros(len(seg), dtype=int)
+    for low_n, high_n, gap_n, trim_n in DIXON_RATIOS:
+        in_range = (n >= low_n) & (n <= high_n)
+        gap[in_range] = gap_n
+        trim[in_range] = trim_n
+
+    first, last = _at(seg, x, 0), _at(seg, x, n - 1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        high = (last - _at(seg, x, n - 1 - gap)) / (last - _at(seg, x, trim))
+        low = (_at(seg, x, gap) - first) / (_at(seg, x, n - 1 - trim) - first)
+    critical = dixon_critical(n)
+    return high > critical, low > critical
+
+
+def rosner(seg, x, max_outliers=ROSNER_MAX_OUTLIERS, alpha=ALPHA):
+    """
+    Rosner's generalized ESD test for every group at once. Returns a
+    boolean array per row marking the detected outliers.
+    """
+    n = seg.counts
+    active = np.ones(len(x), dtype=bool)
+    removed = np.full((max_outliers, len(seg)), -1)
+    exceeds = np.zeros((max_outliers, len(seg)), dtype=bool)
+
+    for step in range(max_outliers):
+        mean = seg.broadcast(seg.mean(x, where=active))
+        sd = np.sqrt(seg.var(x, where=active))
+        deviation = np.where(active, np.abs(x - mean), -np.inf)
+        largest = seg.max(deviation)
+
+        # First row in each group at the largest remaining deviation
+        rows = np.flatnonzero(active & (deviation == seg.broadcast(largest)))
+        groups, first = np.unique(seg.ids[rows], return_index=True)
+        removed[step, groups] = rows[first]
+        active[rows[first]] = False
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            exceeds[step] = largest / sd > rosner_critical(n - step, alpha)
+
+    # Outliers are everything removed up to the last exceeding step
+    steps = np.arange(max_outliers)[:, None]
+    last = np.where(exceeds.any(axis=0), max_outliers - 1 - np.argmax(exceeds[::-1], axis=0), -1)
+    flagged = (steps <= last) & (removed >= 0)
+    outlier = np.zeros(len(x), dtype=bool)
+    outlier[removed[flagged]] = True
+    return outlier
+
+
+def iqr_fences(seg, x, multiplier=IQR_MULTIPLIER):
+    """Rows outside the Tukey fences of their group (values sorted within groups)."""
+    n = seg.counts
+
+    def quantile(q):
+        position = (n - 1) * q
+        below = np.floor(position).astype(int)
+        fraction = position - below
+        return _at(seg, x, below) * (1 - fraction) + _at(seg, x, below + 1) * fraction
+
+    q1, q3 = quantile(0.25), quantile(0.75)
+    spread = multiplier * (q3 - q1)
+    return (x < seg.broadcast(q1 - spread)) | (x > seg.broadcast(q3 + spread))
+
+
+def screen_outliers(detects, keys=OUTLIER_KEYS):
+    """
+    Outlier flags for every detect in detects (result_id, keys and a
+    positive result_value). Returns one row per detect.
+    """
+    seg = Segments(detects, keys, ["result_value"])
+    x = np.log(seg.column("result_value"))
+    n = seg.broadcast(seg.counts)
+    dixon_range = (n >= 3) & (n <= DIXON_MAX_N)
+    rosner_range = n > DIXON_MAX_N
+
+    high, low = dixon(seg, x)
+    position = seg.position()
+    dixon_flag = dixon_range & (
+        (seg.broadcast(high) & (position == n - 1)) | (seg.broadcast(low) & (position == 0))
+    )
+    rosner_flag = rosner_range & rosner(seg, x)
+    iqr_flag = (n >= 4) & iqr_fences(seg, x)
+
+    flags = seg.data[["result_id", *keys, "result_value"]].copy()
+    flags["n_detect"] = n
+    flags["test_used"] = np.where(rosner_range, "Rosner", np.where(dixon_range, "Dixon", "None"))
+    flags["dixon_flag"] = dixon_flag
+    flags["rosner_flag"] = rosner_flag
+    flags["iqr_flag"] = iqr_flag
+    flags["is_outlier"] = dixon_flag | rosner_flag
+    return flags
+
+
+def materialize_outlier_flags(conn, keys=OUTLIER_KEYS):
+    """
+    Screen every group's detects and store the flagged results as
+    stat_outlier_flags. Returns the flagged rows.
+    """
+    ensure_statistics_results(conn)
+    flags = screen_outliers(conn.execute(DETECTS_SQL).fetchdf(), keys)
+    flagged = flags[flags["dixon_flag"] | flags["rosner_flag"] | flags["iqr_flag"]]
+    # Explicit types: a frame with no flagged rows has no types to infer
+    key_columns = "".join(f"{key} VARCHAR, " for key in keys)
+    conn.execute(f"""
+        CREATE OR REPLACE TABLE stat_outlier_flags (
+            result_id INTEGER, {key_columns}result_value DOUBLE, n_detect BIGINT,
+            test_used VARCHAR, dixon_flag BOOLEAN, rosner_flag BOOLEAN, iqr_flag BOOLEAN,
+            is_outlier BOOLEAN
+        )
+    """)
+    conn.register("outlier_frame", flagged)
+    try:
+        conn.execute("INSERT INTO stat_outlier_flags BY NAME SELECT * FROM outlier_frame")
+    finally:
+        conn.unregister("outlier_frame")
+    return flagged
@@ -0,0 +1,192 @@
+"""
+Plume area and contaminant mass per sampling event from interpolated
+concentration grids (era.interpolation), with Mann-Kendall stability
+trends across events.
+
+Each grid node stands for one square cell of cell_size_ft. A cell is in
+the plume when its estimate exceeds the analyte's screening level from
+ref_screening_levels (tap water RSL for groundwater, the scenario's soil
+RSL for soil). Mass is the estimate times the cell's water or soil mass:
+
+    GW   C [ug/L] x area x saturated thickness x effective porosity
+    SO   C [mg/kg] x area x depth x dry bulk density
+
+Grids for all events come from the grid cache; the cells of every grid
+are then stacked and the area, mass, maximum and mass centroid of every
+event are integrated together with bincount. Plume stability is the
+Mann-Kendall trend and Sen's slope (era.trends) of plume area and mass
+over the events: Expanding, Shrinking, Stable or Insufficient Data.
+"""
+
+import numpy as np
+import pandas as pd
+
+from era.duplicates import ensure_statistics_results
+from era.interpolation import interpolation_grids
+from era.screening import SCENARIOS
+from era.segments import Segments
+from era.trends import DAYS_PER_YEAR, MIN_SAMPLES, SIGNIFICANCE, mann_kendall
+
+PLUME_KEYS = ("cas_rn", "matrix_code")
+
+LITERS_PER_CUBIC_FOOT = 28.316847
+CUBIC_METERS_PER_CUBIC_FOOT = 0.028316847
+SQUARE_FEET_PER_ACRE = 43_560
+
+# Mass integration defaults per matrix
+MATRIX_DEFAULTS = {
+    "GW": {"thickness_ft": 10.0, "porosity": 0.25},
+    "SO": {"thickness_ft": 2.0, "bulk_density_kg_m3": 1600.0},
+}
+
+STABILITY_METRICS = ("plume_area_ft2", "plume_mass_kg")
+STABILITY_LABELS = {"Increasing": "Expanding", "Decreasing": "Shrinking", "No Trend": "Stable"}
+
+SCREENING_LEVEL_SQL = """
+    SELECT CASE ?
+        WHEN 'SO' THEN {soil_column}
+        ELSE rsl_residential_tap_ug_l
+    END::DOUBLE
+    FROM ref_screening_levels
+    WHERE cas_rn = ?
+"""
+
+
+def screening_level(conn, cas_rn, matrix_code="GW", scenario="Residential"):
+    """The analyte's screening level for the matrix (None if it has none)."""
+    row = conn.execute(
+        SCREENING_LEVEL_SQL.format(soil_column=SCENARIOS[scenario]), [matrix_code, cas_rn]
+    ).fetchone()
+    return None if row is None else row[0]
+
+
+def cell_mass_factor(matrix_code, cell_area_ft2, thickness_ft=None, porosity=None,
+                     bulk_density_kg_m3=None):
+    """kg of contaminant per unit of concentration in a cell."""
+    defaults = MATRIX_DEFAULTS.get(matrix_code, MATRIX_DEFAULTS["GW"])
+    thickness_ft = thickness_ft or defaults["thickness_ft"]
+    volume_ft3 = np.asarray(cell_area_ft2, dtype=float) * thickness_ft
+    if matrix_code == "SO":
+        density = bulk_density_kg_m3 or defaults["bulk_density_kg_m3"]
+        # mg/kg x kg of soil -> kg
+        return volume_ft3 * CUBIC_METERS_PER_CUBIC_FOOT * density * 1e-6
+    # ug/L x L of pore water -> kg
+    return volume_ft3 * (porosity or defaults["porosity"]) * LITERS_PER_CUBIC_FOOT * 1e-9
+
+
+def integrate_plumes(grids, cells, matrix_code="GW", **mass_parameters):
+    """
+    Area and mass above each grid's screening level, for all grids at
+    once. grids has one row per grid (grid_id, cell_size_ft,
+    screening_level); cells has the nodes of every grid.
+    """
+    grid_index = pd.Index(grids["grid_id"])
+    ids = grid_index.get_indexer(cells["grid_id"])
+    n = len(grids)
+
+    cell_area = grids["cell_size_ft"].to_numpy(dtype=float) ** 2
+    estimate = cells["estimate"].to_numpy(dtype=float)
+    above = estimate > grids["screening_level"].to_numpy(dtype=float)[ids]
+    mass = estimate * cell_mass_factor(matrix_code, cell_area[ids], **mass_parameters)
+    plume_mass = np.where(above, mass, 0.0)
+
+    n_above = np.bincount(ids, above, minlength=n)
+    plume_mass_kg = np.bincount(ids, plume_mass, minlength=n)
+    maximum = np.full(n, -np.inf)
+    np.maximum.at(maximum, ids, estimate)
+
+    metrics = grids.copy()
+    metrics["n_cells_above"] = n_above.astype(int)
+    metrics["plume_area_ft2"] = n_above * cell_area
+    metrics["plume_area_acres"] = metrics["plume_area_ft2"] / SQUARE_FEET_PER_ACRE
+    metrics["plume_mass_kg"] = plume_mass_kg
+    metrics["total_mass_kg"] = np.bincount(ids, mass, minlength=n)
+    metrics["max_estimate"] = maximum
+    with np.errstate(invalid="ignore", divide="ignore"):
+        metrics["centroid_latitude"] = np.bincount(ids, plume_mass * cells["latitude"], minlength=n) / plume_mass_kg
+        metrics["centroid_longitude"] = np.bincount(ids, plume_mass * cells["longitude"], minlength=n) / plume_mass_kg
+    return metrics
+
+
+def compute_plume_metrics(conn, cas_rn, matrix_code="GW", method="idw", scenario="Residential",
+                          mass_parameters=None, **grid_parameters):
+    """
+    Plume metrics for every sampling event of one analyte, one row per
+    event with enough locations to grid. Grids come from the grid cache
+    (era.interpolation.interpolation_grids).
+    """
+    grids, cells = interpolation_grids(conn, cas_rn, matrix_code, method, **grid_parameters)
+    if not len(grids):
+        return pd.DataFrame()
+    level = screening_level(conn, cas_rn, matrix_code, scenario)
+    grids = grids[["cas_rn", "matrix_code", "sample_date", "method", "grid_id", "n_points", "cell_size_ft"]]
+    grids = grids.assign(screening_level=np.nan if level is None else level)
+    return integrate_plumes(grids, cells, matrix_code, **(mass_parameters or {}))
+
+
+def plume_stability(metrics, keys=PLUME_KEYS, metric_names=STABILITY_METRICS):
+    """Mann-Kendall trend of each plume metric over events, per analyte."""
+    long = metrics.melt(
+        id_vars=[*keys, "sample_date"], value_vars=list(metric_names), var_name="metric", value_name="value"
+    ).dropna(subset=["value"])
+    seg = Segments(long, [*keys, "metric"], ["sample_date"])
+    dates = seg.data["sample_date"].to_numpy(dtype="datetime64[D]")
+    years = (dates - dates.min()).astype(float) / DAYS_PER_YEAR
+    mk = mann_kendall(seg, seg.column("value"), years)
+
+    enough = seg.counts >= MIN_SAMPLES
+    significant = enough & (mk["p"] < SIGNIFICANCE)
+    stability = seg.groups.copy()
+    stability["n_events"] = seg.counts
+    stability["first_value"] = seg.first(seg.column("value"))
+    stability["last_value"] = seg.column("value")[seg.starts + seg.counts - 1]
+    stability["mk_s"] = mk["s"]
+    stability["mk_p"] = mk["p"]
+    stability["sens_slope_per_year"] = mk["sens_slope"]
+    stability["stability"] = np.select(
+        [~enough, significant & (mk["s"] > 0), significant & (mk["s"] < 0)],
+        ["Insufficient Data", STABILITY_LABELS["Increasing"], STABILITY_LABELS["Decreasing"]],
+        default=STABILITY_LABELS["No Trend"],
+    )
+    return stability
+
+
+def materialize_plume_metrics(conn, analytes=None, matrix_code="GW", method="idw",
+                              scenario="Residential", mass_parameters=None, **grid_parameters):
+    """
+    Plume metrics for every event of every analyte (default: all analytes
+    with a screening level sampled in the matrix), stored as
+    stat_plume_metrics, and their stability trends as
+    stat_plume_stability. Returns (metrics, stability).
+    """
+    ensure_statistics_results(conn)
+    if analytes is None:
+        analytes = [row[0] for row in conn.execute("""
+            SELECT DISTINCT r.cas_rn
+            FROM stat_results r
+            JOIN ref_screening_levels sl ON r.cas_rn = sl.cas_rn
+            WHERE r.matrix_code = ?
+            ORDER BY r.cas_rn
+        """, [matrix_code]).fetchall()]
+
+    frames = [
+        compute_plume_metrics(conn, cas_rn, matrix_code, method, scenario, mass_parameters, **grid_parameters)
+        for cas_rn in analytes
+    ]
+    frames = [frame for frame in frames if len(frame)]
+    if not frames:
+        return pd.DataFrame(), pd.DataFrame()
+    metrics = pd.concat(frames, ignore_index=True)
+    stability = plume_stability(metrics)
+
+    # Event dates are stored as DATE, as in fact_samples and stat_trends
+    for name, frame, columns in [
+        ("stat_plume_metrics", metrics, "* REPLACE (sample_date::DATE AS sample_date)"),
+        ("stat_plume_stability", stability, "*"),
+    ]:
+        conn.register("plume_frame", frame)
+        try:
+            conn.execute(f"CREATE OR REPLACE TABLE {name} AS SELECT {columns} FROM plume_frame")
+        finally:
+            conn.unregister("plume_frame")
+    return metrics, stability
@@ -0,0 +1,673 @@
+"""
+Set-based screening of analytical results against reference criteria.
+
+Screening outputs are materialized as ``scr_*`` tables so the screening
+notebook and the report generator can read them without recomputing.
+``materialize_*`` functions rebuild their tables in full; ``refresh_*``
+and ``rescreen_*`` functions only touch the rows whose inputs changed.
+"""
+
+from era.db import table_exists
+
+# Ecological receptors and their Eco-SSL columns in ref_screening_levels
+ECO_RECEPTORS = {
+    "plants": ("Plants", "eco_ssl_plants_mg_kg"),
+    "soil_inverts": ("Soil Invertebrates", "eco_ssl_soil_inverts_mg_kg"),
+    "avian": ("Avian", "eco_ssl_avian_mg_kg"),
+    "mammalian": ("Mammalian", "eco_ssl_mammalian_mg_kg"),
+}
+
+# Eco-SSLs are soil values; sediment is screened against them as a Tier 1 surrogate
+ECO_MATRICES = ("SO", "SE")
+
+
+def materialize_eco_screening(conn):
+    """
+    Screen soil and sediment detects against all four Eco-SSL receptors.
+
+    Builds two tables:
+      - scr_eco_hq: one row per result with an HQ column per receptor,
+        plus the minimum (most conservative) criterion for the analyte
+      - scr_eco_hi: receptor-level hazard index per location and matrix,
+        summing the maximum HQ of each analyte at the location
+
+    Returns the number of screened results.
+    """
+    hq_columns = ",\n            ".join(
+        f"r.result_value_norm / NULLIF(sl.{column}, 0) AS hq_{key}"
+        for key, (_, column) in ECO_RECEPTORS.items()
+    )
+    min_criterion = ", ".join(f"sl.{column}" for _, column in ECO_RECEPTORS.values())
+    limiting_receptor = "\n                ".join(
+        f"WHEN sl.{column} = LEAST({min_criterion}) THEN '{label}'"
+        for label, column in ECO_RECEPTORS.values()
+    )
+    any_criterion = " OR ".join(
+        f"sl.{column} > 0" for _, column in ECO_RECEPTORS.values()
+    )
+    matrices = ", ".join(f"'{code}'" for code in ECO_MATRICES)
+
+    conn.execute(f"""
+        CREATE OR REPLACE TABLE scr_eco_hq AS
+        SELECT
+            r.result_id,
+            r.sample_id,
+            s.location_id,
+            s.sample_date,
+            s.matrix_code,
+            r.cas_rn,
+            r.result_value_norm as result_value,
+            r.result_unit_norm as result_unit,
+            {hq_columns},
+            LEAST({min_criterion}) AS eco_ssl_min_mg_kg,
+            CASE
+                {limiting_receptor}
+            END AS limiting_receptor,
+            r.result_value_norm / NULLIF(LEAST({min_criterion}), 0) AS hq_min,
+            CASE
+                WHEN r.result_value_norm > LEAST({min_criterion}) THEN 'EXCEEDS'
+                ELSE 'BELOW'
+            END AS screening_status
+        FROM fact_results r
+        JOIN fact_samples s ON r.sample_id = s.sample_id
+        JOIN ref_screening_levels sl ON r.cas_rn = sl.cas_rn
+        WHERE r.detect_flag = 'Y'
+        AND s.matrix_code IN ({matrices})
+        AND ({any_criterion})
+    """)
+
+    max_hq_columns = ",\n                ".join(
+        f"MAX(hq_{key}) AS hq_{key}" for key in ECO_RECEPTORS
+    )
+    receptor_names = ", ".join(
+        f'hq_{key} AS "{label}"' for key, (label, _) in ECO_RECEPTORS.items()
+    )
+
+    conn.execute(f"""
+        CREATE OR REPLACE TABLE scr_eco_hi AS
+        WITH location_max AS (
+            SELECT
+                location_id,
+                matrix_code,
+                cas_rn,
+                {max_hq_columns}
+            FROM scr_eco_hq
+            GROUP BY location_id, matrix_code, cas_rn
+        ),
+        receptor_hq AS (
+            UNPIVOT (SELECT location_id, matrix_code, cas_rn, {receptor_names} FROM location_max)
+            ON COLUMNS(* EXCLUDE (location_id, matrix_code, cas_rn))
+            INTO NAME receptor VALUE hq
+        )
+        SELECT
+            location_id,
+            matrix_code,
+            receptor,
+            COUNT(*) AS analyte_count,
+            ROUND(SUM(hq), 3) AS hazard_index,
+            arg_max(cas_rn, hq) AS dominant_cas_rn,
+            CASE WHEN SUM(hq) > 1 THEN 'EXCEEDS HI=1' ELSE 'BELOW HI=1' END AS status
+        FROM receptor_hq
+        GROUP BY location_id, matrix_code, receptor
+    """)
+
+    return conn.execute("SELECT COUNT(*) FROM scr_eco_hq").fetchone()[0]
+
+
+# Soil screening column per land-use scenario (water always uses tap water RSLs)
+SCENARIOS = {
+    "Residential": "rsl_residential_soil_mg_kg",
+    "Industrial/Commercial": "rsl_industrial_soil_mg_kg",
+}
+
+
+def refresh_analyte_organs(conn):
+    """
+    Rebuild the analyte-to-target-organ bridge from ref_screening_levels.
+
+    Multi-organ entries such as "Liver; Kidney" become one row per organ so
+    each HQ counts toward every organ it affects.
+    """
+    conn.execute("""
+        CREATE OR REPLACE TABLE ref_analyte_organs AS
+        SELECT DISTINCT
+            cas_rn,
+            COALESCE(NULLIF(NULLIF(trim(organ), ''), 'None'), 'Unspecified') AS target_organ
+        FROM (
+            SELECT cas_rn, unnest(regexp_split_to_array(COALESCE(target_organ, ''), '[;,]')) AS organ
+            FROM ref_screening_levels
+        )
+    """)
+
+
+def _screening_level_sql(scenario_column):
+    """CASE expression selecting the human-health screening level for a result."""
+    return f"""CASE s.matrix_code
+                WHEN 'SO' THEN sl.{scenario_column}
+                WHEN 'GW' THEN sl.rsl_residential_tap_ug_l
+                WHEN 'DW' THEN sl.rsl_residential_tap_ug_l
+            END"""
+
+
+def refresh_hazard_index(conn, full=False):
+    """
+    Incrementally maintain the hazard-index cube scr_hazard_index.
+
+    The cube is keyed by location, matrix, target organ and scenario. Each
+    location's inputs (results and the criteria they are screened against)
+    are fingerprinted; only locations whose fingerprint changed since the
+    last refresh are recomputed. Pass ``full=True`` to rebuild everything.
+
+    Returns the number of locations recomputed.
+    """
+    refresh_analyte_organs(conn)
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS scr_hazard_index (
+            location_id VARCHAR,
+            matrix_code VARCHAR,
+            target_organ VARCHAR,
+            scenario VARCHAR,
+            analyte_count INTEGER,
+            hazard_index DOUBLE,
+            max_hq DOUBLE,
+            dominant_cas_rn VARCHAR,
+            status VARCHAR
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS scr_hazard_index_state (
+            location_id VARCHAR PRIMARY KEY,
+            input_hash UBIGINT
+        )
+    """)
+    if full:
+        conn.execute("DELETE FROM scr_hazard_index")
+        conn.execute("DELETE FROM scr_hazard_index_state")
+
+    conn.execute("""
+        CREATE OR REPLACE TEMP TABLE hi_location_hash AS
+        SELECT
+            s.location_id,
+            bit_xor(hash(
+                r.result_id, r.cas_rn, r.result_value_norm, r.detect_flag, s.matrix_code,
+                sl.rsl_residential_soil_mg_kg, sl.rsl_industrial_soil_mg_kg,
+                sl.rsl_residential_tap_ug_l, sl.target_organ
+            )) AS input_hash
+        FROM fact_results r
+        JOIN fact_samples s ON r.sample_id = s.sample_id
+        LEFT JOIN ref_screening_levels sl ON r.cas_rn = sl.cas_rn
+        GROUP BY s.location_id
+    """)
+    conn.execute("""
+        CREATE OR REPLACE TEMP TABLE hi_changed_locations AS
+        SELECT COALESCE(h.location_id, st.location_id) AS location_id
+        FROM hi_location_hash h
+        FULL OUTER JOIN scr_hazard_index_state st ON h.location_id = st.location_id
+        WHERE h.input_hash IS DISTINCT FROM st.input_hash
+    """)
+    changed = conn.execute("SELECT COUNT(*) FROM hi_changed_locations").fetchone()[0]
+    if changed == 0:
+        return 0
+
+    conn.execute("""
+        DELETE FROM scr_hazard_index
+        WHERE location_id IN (SELECT location_id FROM hi_changed_locations)
+    """)
+
+    scenario_hq = "\n            UNION ALL\n".join(f"""
+            SELECT
+                s.location_id,
+                s.matrix_code,
+                r.cas_rn,
+                '{scenario}' AS scenario,
+                MAX(r.result_value_norm / NULLIF({_screening_level_sql(column)}, 0)) AS hq
+            FROM fact_results r
+            JOIN fact_samples s ON r.sample_id = s.sample_id
+            JOIN ref_screening_levels sl ON r.cas_rn = sl.cas_rn
+            WHERE r.detect_flag = 'Y'
+            AND s.location_id IN (SELECT location_id FROM hi_changed_locations)
+            GROUP BY s.location_id, s.matrix_code, r.cas_rn""" for scenario, column in SCENARIOS.items())
+
+    # One HQ per analyte per location (its maximum), summed over each organ it affects
+    conn.execute(f"""
+        INSERT INTO scr_hazard_index
+        WITH analyte_hq AS ({scenario_hq}
+        )
+        SELECT
+            q.location_id,
+            q.matrix_code,
+            o.target_organ,
+            q.scenario,
+            COUNT(*) AS analyte_count,
+            SUM(q.hq) AS hazard_index,
+            MAX(q.hq) AS max_hq,
+            arg_max(q.cas_rn, q.hq) AS dominant_cas_rn,
+            CASE WHEN SUM(q.hq) > 1 THEN 'EXCEEDS HI=1' ELSE 'BELOW HI=1' END AS status
+        FROM analyte_hq q
+        JOIN ref_analyte_organs o ON q.cas_rn = o.cas_rn
+        WHERE q.hq IS NOT NULL
+        GROUP BY q.location_id, q.matrix_code, o.target_organ, q.scenario
+    """)
+
+    conn.execute("""
+        DELETE FROM scr_hazard_index_state
+        WHERE location_id IN (SELECT location_id FROM hi_changed_locations)
+    """)
+    conn.execute("""
+        INSERT INTO scr_hazard_index_state
+        SELECT location_id, input_hash FROM hi_location_hash
+        WHERE location_id IN (SELECT location_id FROM hi_changed_locations)
+    """)
+    return changed
+
+
+# Target cancer risk the carcinogenic RSLs are derived at
+TARGET_RISK = 1e-6
+
+
+def materialize_cancer_risk(conn):
+    """
+    Compute excess lifetime cancer risk (ELCR) for carcinogens.
+
+    RSLs for carcinogens are risk-based at TARGET_RISK, so each detect's
+    risk scales linearly: ELCR = concentration / RSL * TARGET_RISK.
+
+    Builds two tables next to the HQ results:
+      - scr_cancer_risk: per-result ELCR for every scenario
+      - scr_cancer_risk_cumulative: per location, matrix and scenario, the
+        sum of each carcinogen's maximum ELCR at the location
+
+    Returns the number of per-result risk rows.
+    """
+    scenario_risk = "\n        UNION ALL\n".join(f"""
+        SELECT
+            r.result_id,
+            r.sample_id,
+            s.location_id,
+            s.sample_date,
+            s.matrix_code,
+            r.cas_rn,
+            '{scenario}' AS scenario,
+            r.result_value_norm AS result_value,
+            r.result_unit_norm AS result_unit,
+            {_screening_level_sql(column)} AS screening_level,
+            r.result_value_norm / NULLIF({_screening_level_sql(column)}, 0) * {TARGET_RISK} AS elcr
+        FROM fact_results r
+        JOIN fact_samples s ON r.sample_id = s.sample_id
+        JOIN ref_screening_levels sl ON r.cas_rn = sl.cas_rn
+        WHERE r.detect_flag = 'Y'
+        AND sl.carcinogen = 'Yes'""" for scenario, column in SCENARIOS.items())
+
+    conn.execute(f"""
+        CREATE OR REPLACE TABLE scr_cancer_risk AS
+        SELECT * FROM ({scenario_risk}
+        )
+        WHERE elcr IS NOT NULL
+    """)
+
+    conn.execute("""
+        CREATE OR REPLACE TABLE scr_cancer_risk_cumulative AS
+        WITH analyte_risk AS (
+            SELECT location_id, matrix_code, scenario, cas_rn, MAX(elcr) AS elcr
+            FROM scr_cancer_risk
+            GROUP BY location_id, matrix_code, scenario, cas_rn
+        )
+        SELECT
+            location_id,
+            matrix_code,
+            scenario,
+            COUNT(*) AS carcinogen_count,
+            SUM(elcr) AS cumulative_elcr,
+            arg_max(cas_rn, elcr) AS dominant_cas_rn,
+            CASE
+                WHEN SUM(elcr) > 1e-4 THEN 'Above 1E-04'
+                WHEN SUM(elcr) >= 1e-6 THEN 'Within 1E-06 to 1E-04'
+                ELSE 'Below 1E-06'
+            END AS risk_range
+        FROM analyte_risk
+        GROUP BY location_id, matrix_code, scenario
+    """)
+
+    return conn.execute("SELECT COUNT(*) FROM scr_cancer_risk").fetchone()[0]
+
+
+# Criteria columns whose changes create a new version in the history table
+CRITERIA_COLUMNS = [
+    "analyte_name",
+    "rsl_residential_soil_mg_kg",
+    "rsl_industrial_soil_mg_kg",
+    "rsl_residential_tap_ug_l",
+    "rsl_mcl_ug_l",
+    "eco_ssl_plants_mg_kg",
+    "eco_ssl_soil_inverts_mg_kg",
+    "eco_ssl_avian_mg_kg",
+    "eco_ssl_mammalian_mg_kg",
+    "carcinogen",
+    "target_organ",
+]
+
+# Screening level sources for the screening notebook's criteria basis selector
+CRITERIA_BASIS = {
+    "Current criteria": "LEFT JOIN ref_screening_levels sl ON r.cas_rn = sl.cas_rn",
+    "Criteria in force at sample date": (
+        "ASOF LEFT JOIN ref_screening_levels_history sl"
+        " ON r.cas_rn = sl.cas_rn AND s.sample_date >= sl.valid_from"
+    ),
+}
+
+
+def record_criteria_history(conn):
+    """
+    Append changed rows of ref_screening_levels to ref_screening_levels_history.
+
+    Each version is valid from its update_date until the next version's.
+    The first recorded version of an analyte is valid from '-infinity' so
+    samples collected before criteria were first loaded still screen.
+
+    Returns the number of new versions recorded.
+    """
+    columns = ", ".join(CRITERIA_COLUMNS)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS ref_screening_levels_history AS
+        SELECT
+            cas_rn,
+            {columns},
+            update_date,
+            '-infinity'::DATE AS valid_from,
+            'infinity'::DATE AS valid_to
+        FROM ref_screening_levels
+        WHERE FALSE
+    """)
+
+    changed = " OR ".join(f"c.{column} IS DISTINCT FROM h.{column}" for column in CRITERIA_COLUMNS)
+    conn.execute(f"""
+        CREATE OR REPLACE TEMP TABLE criteria_new_versions AS
+        SELECT
+            c.cas_rn,
+            {", ".join(f"c.{column}" for column in CRITERIA_COLUMNS)},
+            c.update_date,
+            CASE
+                WHEN h.cas_rn IS NULL THEN '-infinity'::DATE
+                ELSE GREATEST(COALESCE(c.update_date, CURRENT_DATE), h.valid_from)
+            END AS valid_from,
+            'infinity'::DATE AS valid_to
+        FROM ref_screening_levels c
+        LEFT JOIN ref_screening_levels_history h
+            ON c.cas_rn = h.cas_rn AND h.valid_to = 'infinity'::DATE
+        WHERE h.cas_rn IS NULL OR {changed}
+    """)
+    new_versions = conn.execute("SELECT COUNT(*) FROM criteria_new_versions").fetchone()[0]
+    if new_versions == 0:
+        return 0
+
+    # A re-edit on the same date replaces that day's version
+    conn.execute("""
+        DELETE FROM ref_screening_levels_history
+        WHERE (cas_rn, valid_from) IN (SELECT cas_rn, valid_from FROM criteria_new_versions)
+    """)
+    conn.execute("INSERT INTO ref_screening_levels_history SELECT * FROM criteria_new_versions")
+
+    # Close the previous version of each analyte at the new version's start
+    conn.execute("""
+        UPDATE ref_screening_levels_history AS h SET valid_to = n.next_from
+        FROM (
+            SELECT
+                cas_rn,
+                valid_from,
+                COALESCE(LEAD(valid_from) OVER (PARTITION BY cas_rn ORDER BY valid_from),
+                         'infinity'::DATE) AS next_from
+            FROM ref_screening_levels_history
+        ) n
+        WHERE h.cas_rn = n.cas_rn AND h.valid_from = n.valid_from
+        AND h.valid_to IS DISTINCT FROM n.next_from
+    """)
+    return new_versions
+
+
+# Criteria columns used by human-health screening; a change to any of them
+# for an analyte triggers re-screening of that analyte's results
+HH_CRITERIA_COLUMNS = [
+    "rsl_residential_soil_mg_kg",
+    "rsl_industrial_soil_mg_kg",
+    "rsl_residential_tap_ug_l",
+]
+
+
+def _screening_results_sql(cas_filter):
+    """SELECT producing per-result HQ and status for every scenario."""
+    return "\n        UNION ALL\n".join(f"""
+        SELECT
+            r.result_id,
+            s.location_id,
+            s.sample_date,
+            s.matrix_code,
+            r.cas_rn,
+            '{scenario}' AS scenario,
+            r.result_value_norm AS result_value,
+            {_screening_level_sql(column)} AS screening_level,
+            r.result_value_norm / NULLIF({_screening_level_sql(column)}, 0) AS hazard_quotient,
+            CASE
+                WHEN r.result_value_norm > {_screening_level_sql(column)} THEN 'EXCEEDS'
+                ELSE 'BELOW'
+            END AS screening_status
+        FROM fact_results r
+        JOIN fact_samples s ON r.sample_id = s.sample_id
+        JOIN ref_screening_levels sl ON r.cas_rn = sl.cas_rn
+        WHERE r.detect_flag = 'Y'
+        AND {_screening_level_sql(column)} IS NOT NULL
+        {cas_filter}""" for scenario, column in SCENARIOS.items())
+
+
+def _criteria_hash_sql():
+    return f"hash({', '.join(HH_CRITERIA_COLUMNS)})"
+
+
+def materialize_screening_results(conn):
+    """
+    Fully rebuild scr_results, the per-result human-health screening table.
+
+    Also records the criteria each analyte was screened against so that
+    rescreen_changed_criteria() can later detect what changed.
+    """
+    conn.execute(f"""
+        CREATE OR REPLACE TABLE scr_results AS
+        {_screening_results_sql("")}
+    """)
+    conn.execute(f"""
+        CREATE OR REPLACE TABLE scr_results_criteria AS
+        SELECT cas_rn, {_criteria_hash_sql()} AS criteria_hash
+        FROM ref_screening_levels
+    """)
+    return conn.execute("SELECT COUNT(*) FROM scr_results").fetchone()[0]
+
+
+def rescreen_changed_criteria(conn):
+    """
+    Re-screen only the analytes whose criteria changed since the last run.
+
+    Diffs ref_screening_levels against the criteria recorded in
+    scr_results_criteria, replaces the scr_results rows of affected
+    analytes and appends new and cleared exceedances to
+    scr_criteria_changes. The hazard-index cube is refreshed for the
+    affected locations as well.
+
+    Returns a dict with the number of changed analytes, re-screened
+    results, new exceedances and cleared exceedances.
+    """
+    if not table_exists(conn, "scr_results_criteria"):
+        results = materialize_screening_results(conn)
+        return {"changed_analytes": None, "rescreened_results": results,
+                "new_exceedances": 0, "cleared_exceedances": 0}
+
+    conn.execute(f"""
+        CREATE OR REPLACE TEMP TABLE criteria_changed AS
+        SELECT COALESCE(c.cas_rn, p.cas_rn) AS cas_rn
+        FROM (SELECT cas_rn, {_criteria_hash_sql()} AS criteria_hash FROM ref_screening_levels) c
+        FULL OUTER JOIN scr_results_criteria p ON c.cas_rn = p.cas_rn
+        WHERE c.criteria_hash IS DISTINCT FROM p.criteria_hash
+    """)
+    changed_analytes = conn.execute("SELECT COUNT(*) FROM criteria_changed").fetchone()[0]
+    if changed_analytes == 0:
+        return {"changed_analytes": 0, "rescreened_results": 0,
+                "new_exceedances": 0, "cleared_exceedances": 0}
+
+    cas_filter = "AND r.cas_rn IN (SELECT cas_rn FROM criteria_changed)"
+    conn.execute("""
+        CREATE OR REPLACE TEMP TABLE scr_results_previous AS
+        SELECT * FROM scr_results WHERE cas_rn IN (SELECT cas_rn FROM criteria_changed)
+    """)
+    conn.execute("DELETE FROM scr_results WHERE cas_rn IN (SELECT cas_rn FROM criteria_changed)")
+    conn.execute(f"INSERT INTO scr_results {_screening_results_sql(cas_filter)}")
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS scr_criteria_changes (
+            detected_at TIMESTAMP,
+            result_id INTEGER,
+            location_id VARCHAR,
+            sample_date DATE,
+            matrix_code VARCHAR,
+            cas_rn VARCHAR,
+            scenario VARCHAR,
+            result_value DOUBLE,
+            old_screening_level DOUBLE,
+            new_screening_level DOUBLE,
+            change_type VARCHAR
+        )
+    """)
+    conn.execute("""
+        CREATE OR REPLACE TEMP TABLE criteria_change_rows AS
+        SELECT
+            current_localtimestamp() AS detected_at,
+            COALESCE(n.result_id, o.result_id) AS result_id,
+            COALESCE(n.location_id, o.location_id) AS location_id,
+            COALESCE(n.sample_date, o.sample_date) AS sample_date,
+            COALESCE(n.matrix_code, o.matrix_code) AS matrix_code,
+            COALESCE(n.cas_rn, o.cas_rn) AS cas_rn,
+            COALESCE(n.scenario, o.scenario) AS scenario,
+            COALESCE(n.result_value, o.result_value) AS result_value,
+            o.screening_level AS old_screening_level,
+            n.screening_level AS new_screening_level,
+            CASE
+                WHEN n.screening_status = 'EXCEEDS' THEN 'New exceedance'
+                ELSE 'Cleared exceedance'
+            END AS change_type
+        FROM scr_results_previous o
+        FULL OUTER JOIN (
+            SELECT * FROM scr_results WHERE cas_rn IN (SELECT cas_rn FROM criteria_changed)
+        ) n ON o.result_id = n.result_id AND o.scenario = n.scenario
+        WHERE (n.screening_status = 'EXCEEDS') IS DISTINCT FROM (o.screening_status = 'EXCEEDS')
+        AND (n.screening_status = 'EXCEEDS' OR o.screening_status = 'EXCEEDS')
+    """)
+    # Count this run's rows only; a run that changes no status adds none
+    counts = conn.execute("""
+        SELECT
+            COUNT(*) FILTER (WHERE change_type = 'New exceedance'),
+            COUNT(*) FILTER (WHERE change_type = 'Cleared exceedance')
+        FROM criteria_change_rows
+    """).fetchone()
+    conn.execute("INSERT INTO scr_criteria_changes SELECT * FROM criteria_change_rows")
+    rescreened = conn.execute("""
+        SELECT COUNT(*) FROM scr_results WHERE cas_rn IN (SELECT cas_rn FROM criteria_changed)
+    """).fetchone()[0]
+
+    conn.execute("DELETE FROM scr_results_criteria WHERE cas_rn IN (SELECT cas_rn FROM criteria_changed)")
+    conn.execute(f"""
+        INSERT INTO scr_results_criteria
+        SELECT cas_rn, {_criteria_hash_sql()} FROM ref_screening_levels
+        WHERE cas_rn IN (SELECT cas_rn FROM criteria_changed)
+    """)
+
+    refresh_hazard_index(conn)
+
+    return {"changed_analytes": changed_analytes, "rescreened_results": rescreened,
+            "new_exceedances": counts[0], "cleared_exceedances": counts[1]}
+
+
+def snapshot_exceedances(conn, batch_id):
+    """
+    Snapshot the current exceedances from scr_results under an ingest batch.
+
+    One row per location, matrix, analyte and scenario whose most recent
+    sample exceeds its screening level, so a later diff reflects current
+    site conditions rather than the full sampling history.
+
+    Returns the number of exceedances in the snapshot.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS scr_exceedance_snapshots (
+            batch_id INTEGER,
+            location_id VARCHAR,
+            matrix_code VARCHAR,
+            cas_rn VARCHAR,
+            scenario VARCHAR,
+            latest_sample_date DATE,
+            latest_hq DOUBLE,
+            exceedance_count INTEGER
+        )
+    """)
+    conn.execute("DELETE FROM scr_exceedance_snapshots WHERE batch_id = ?", [batch_id])
+    conn.execute("""
+        INSERT INTO scr_exceedance_snapshots
+        WITH latest AS (
+            SELECT
+                *,
+                MAX(sample_date) OVER (PARTITION BY location_id, matrix_code, cas_rn, scenario) AS latest_date
+            FROM scr_results
+        )
+        SELECT
+            ? AS batch_id,
+            location_id,
+            matrix_code,
+            cas_rn,
+            scenario,
+            MAX(latest_date) AS latest_sample_date,
+            MAX(hazard_quotient) FILTER (WHERE sample_date = latest_date) AS latest_hq,
+            COUNT(*) FILTER (WHERE screening_status = 'EXCEEDS') AS exceedance_count
+        FROM latest
+        GROUP BY location_id, matrix_code, cas_rn, scenario
+        HAVING bool_or(screening_status = 'EXCEEDS' AND sample_date = latest_date)
+    """, [batch_id])
+    return conn.execute("""
+        SELECT COUNT(*) FROM scr_exceedance_snapshots WHERE batch_id = ?
+    """, [batch_id]).fetchone()[0]
+
+
+def exceedance_diff(conn, from_batch=None, to_batch=None):
+    """
+    Classify exceedances between two snapshots with a full outer join.
+
+    Defaults to the two most recent snapshotted batches. Each location,
+    matrix, analyte and scenario is Newly exceeding, No longer exceeding
+    or Still exceeding.
+    """
+    if to_batch is None or from_batch is None:
+        batches = [row[0] for row in conn.execute("""
+            SELECT DISTINCT batch_id FROM scr_exceedance_snapshots
+            ORDER BY batch_id DESC LIMIT 2
+        """).fetchall()]
+        to_batch = batches[0] if to_batch is None and batches else to_batch
+        from_batch = batches[1] if from_batch is None and len(batches) > 1 else from_batch
+
+    return conn.execute("""
+        SELECT
+            COALESCE(n.location_id, o.location_id) AS location_id,
+            COALESCE(n.matrix_code, o.matrix_code) AS matrix_code,
+            COALESCE(n.cas_rn, o.cas_rn) AS cas_rn,
+            COALESCE(n.scenario, o.scenario) AS scenario,
+            CASE
+                WHEN o.location_id IS NULL THEN 'Newly exceeding'
+                WHEN n.location_id IS NULL THEN 'No longer exceeding'
+                ELSE 'Still exceeding'
+            END AS change_status,
+            o.latest_hq AS previous_hq,
+            n.latest_hq AS current_hq,
+            n.latest_sample_date
+        FROM (SELECT * FROM scr_exceedance_snapshots WHERE batch_id = ?) n
+        FULL OUTER JOIN (SELECT * FROM scr_exceedance_snapshots WHERE batch_id = ?) o
+            ON n.location_id = o.location_id
+            AND n.matrix_code = o.matrix_code
+            AND n.cas_rn = o.cas_rn
+            AND n.scenario = o.scenario
+        ORDER BY change_status, location_id, cas_rn, scenario
+    """, [to_batch, from_batch]).fetchdf()
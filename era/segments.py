@@ -0,0 +1,130 @@
+"""
+Segmented NumPy reductions for grouped statistics.
+
+Rows are sorted once by their group keys so that every group occupies a
+contiguous slice of each column. Per-group statistics then come from
+ufunc ``reduceat`` calls over all groups at once instead of a Python
+loop over ``DataFrame.groupby``.
+"""
+
+import hashlib
+
+import numpy as np
+
+
+class Segments:
+    """Contiguous group slices of a key-sorted DataFrame."""
+
+    def __init__(self, data, keys, order_by=()):
+        keys = list(keys)
+        sort_columns = keys + list(order_by)
+        self.keys = keys
+        self.data = data.sort_values(sort_columns, kind="mergesort").reset_index(drop=True)
+
+        n = len(self.data)
+        if n == 0:
+            boundary = np.zeros(0, dtype=bool)
+        else:
+            boundary = np.zeros(n, dtype=bool)
+            boundary[0] = True
+            for key in keys:
+                column = self.data[key].to_numpy()
+                boundary[1:] |= column[1:] != column[:-1]
+
+        self.starts = np.flatnonzero(boundary)
+        self.counts = np.diff(np.append(self.starts, n))
+        self.ids = np.repeat(np.arange(len(self.starts)), self.counts)
+        self.groups = self.data.loc[self.starts, keys].reset_index(drop=True)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def column(self, name, dtype=float):
+        """Sorted column as a NumPy array."""
+        return self.data[name].to_numpy(dtype=dtype)
+
+    def first(self, values):
+        """Value of each group's first row."""
+        return np.asarray(values)[self.starts]
+
+    def sum(self, values):
+        values = np.asarray(values, dtype=float)
+        if len(values) == 0:
+            return np.zeros(0)
+        return np.add.reduceat(values, self.starts)
+
+    def count(self, mask):
+        return self.sum(np.asarray(mask, dtype=float)).astype(int)
+
+    def max(self, values, where=None):
+        """Group maximum, optionally over masked rows only (NaN if none)."""
+        values = np.asarray(values, dtype=float)
+        if where is not None:
+            values = np.where(where, values, -np.inf)
+        if len(values) == 0:
+            return np.zeros(0)
+        result = np.maximum.reduceat(values, self.starts)
+        return np.where(np.isneginf(result), np.nan, result)
+
+    def min(self, values, where=None):
+        """Group minimum, optionally over masked rows only (NaN if none)."""
+        values = np.asarray(values, dtype=float)
+        if where is not None:
+            values = np.where(where, values, np.inf)
+        if len(values) == 0:
+            return np.zeros(0)
+        result = np.minimum.reduceat(values, self.starts)
+        return np.where(np.isposinf(result), np.nan, result)
+
+    def mean(self, values, where=None):
+        values = np.asarray(values, dtype=float)
+        if where is None:
+            return self.sum(values) / self.counts
+        n = self.count(where)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.sum(np.where(where, values, 0.0)) / n
+
+    def var(self, values, where=None, ddof=1):
+        """Group variance with a two-pass (mean-centered) sum of squares."""
+        values = np.asarray(values, dtype=float)
+        mask = np.ones(len(values), dtype=bool) if where is None else np.asarray(where)
+        n = self.count(mask)
+        mean = self.mean(values, mask)
+        centered = np.where(mask, values - mean[self.ids], 0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(n > ddof, self.sum(centered ** 2) / (n - ddof), np.nan)
+
+    def broadcast(self, group_values):
+        """Expand one value per group back to one value per row."""
+        return np.asarray(group_values)[self.ids]
+
+    def position(self):
+        """Zero-based position of each row within its group."""
+        return np.arange(len(self.ids)) - self.starts[self.ids]
+
+    def cumsum(self, values):
+        """Inclusive cumulative sum restarting at each group."""
+        values = np.asarray(values, dtype=float)
+        total = np.cumsum(values)
+        offset = np.append(0.0, total)[self.starts]
+        return total - offset[self.ids]
+
+    def reverse_cumsum(self, values):
+        """Inclusive cumulative sum from the end of each group backwards."""
+        values = np.asarray(values, dtype=float)
+        return self.broadcast(self.sum(values)) - self.cumsum(values) + values
+
+    def hashes(self, columns):
+        """
+        Content hash of each group's rows (in sorted order) over columns,
+        as a hex string, for caching per-group results.
+        """
+        arrays = [np.ascontiguousarray(self.data[name].to_numpy()) for name in columns]
+        arrays = [a.astype("U") if a.dtype == object else a for a in arrays]
+        digests = []
+        for start, count in zip(self.starts, self.counts):
+            digest = hashlib.blake2b(digest_size=16)
+            for array in arrays:
+                digest.update(array[start:start + count].tobytes())
+            digests.append(digest.hexdigest())
+        return np.array(digests, dtype=object)
@@ -0,0 +1,97 @@
+"""
+In-memory columnar cache of every analyte/matrix result series.
+
+The interactive analyte views need one (cas_rn, matrix_code) series of
+stat_results (see era.duplicates) at a time. Rather than query the
+database on every selection, all series are loaded once, sorted by
+series and sample date, into contiguous NumPy columns with an offset
+index:
+
+    columns   result_id, result_value, detection_limit, detect_flag,
+              lab_qualifier, sample_date, location_id (all series
+              concatenated)
+    index     (cas_rn, matrix_code) -> (start, stop) row offsets
+
+so a selection is a dictionary lookup and a slice of each column. The
+cache is kept per connection and reloaded when stat_results has been
+rebuilt for a new data version (era.db.data_version, i.e. after a new
+ingest batch) or duplicate rule.
+"""
+
+import weakref
+
+import pandas as pd
+
+from era.duplicates import ensure_statistics_results, statistics_results_state
+from era.segments import Segments
+
+SERIES_KEYS = ("cas_rn", "matrix_code")
+
+SERIES_COLUMNS = (
+    "result_id",
+    "result_value",
+    "detection_limit",
+    "detect_flag",
+    "lab_qualifier",
+    "sample_date",
+    "location_id",
+)
+
+SERIES_SQL = """
+    SELECT
+        cas_rn,
+        matrix_code,
+        result_id,
+        result_value_norm as result_value,
+        detection_limit_norm as detection_limit,
+        detect_flag,
+        lab_qualifier,
+        sample_date,
+        location_id
+    FROM stat_results
+"""
+
+_caches = weakref.WeakKeyDictionary()
+
+
+class SeriesCache:
+    """Result columns of all series, sliced by (cas_rn, matrix_code)."""
+
+    def __init__(self, data, version=None, keys=SERIES_KEYS):
+        seg = Segments(data, keys, ["sample_date", "result_id"])
+        self.version = version
+        self.keys = list(keys)
+        self.columns = {name: seg.data[name].to_numpy() for name in SERIES_COLUMNS}
+        self.index = {
+            tuple(key): (start, start + count)
+            for key, start, count in zip(
+                seg.groups.itertuples(index=False, name=None), seg.starts, seg.counts
+            )
+        }
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, key):
+        return tuple(key) in self.index
+
+    def series(self, *key):
+        """Rows of one series in sample date order (empty if unknown)."""
+        start, stop = self.index.get(tuple(key), (0, 0))
+        return pd.DataFrame(
+            {name: column[start:stop] for name, column in self.columns.items()}
+        )
+
+
+def load_series_cache(conn, keys=SERIES_KEYS):
+    """
+    The connection's SeriesCache, loaded on first use and reloaded when
+    stat_results has been rebuilt since.
+    """
+    ensure_statistics_results(conn)
+    version = statistics_results_state(conn)
+    cache = _caches.get(conn)
+    if cache is None or cache.version != version or cache.keys != list(keys):
+        cache = SeriesCache(conn.execute(SERIES_SQL).fetchdf(), version, keys)
+        _caches[conn] = cache
+    return cache
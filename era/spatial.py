@@ -0,0 +1,220 @@
+"""
+Spatial queries on dim_locations: locations within a radius, the k
+nearest locations, and locations or results inside a polygon.
+
+Locations are indexed in memory by a KD-tree (scipy.spatial.cKDTree) on
+earth-centered x, y, z coordinates in feet. The straight-line (chord)
+distance between two points on the sphere increases with their
+great-circle distance, so radius and nearest-neighbour queries on the
+tree are exact for any spread of locations, from one site to a
+portfolio of sites; reported distances are great-circle feet.
+
+Polygons are (longitude, latitude) vertex sequences. The tree returns
+the locations within the polygon's bounding circle and those are tested
+by ray casting on a local east/north projection around the polygon
+(local_xy).
+
+The index is kept per connection and rebuilt when era.db.data_version()
+changes, as for era.series_cache. All query methods take scalar or array
+query points and return long-format frames with a `query` column.
+"""
+
+import weakref
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from era.background import ensure_location_roles
+from era.db import data_version
+
+# Mean earth radius (6,371,008.8 m)
+EARTH_RADIUS_FT = 20_902_260
+
+LOCATION_COLUMNS = ["location_id", "location_name", "location_type", "location_role"]
+
+LOCATIONS_SQL = """
+    SELECT
+        location_id,
+        location_name,
+        location_type,
+        location_role,
+        latitude::DOUBLE as latitude,
+        longitude::DOUBLE as longitude
+    FROM dim_locations
+    WHERE latitude IS NOT NULL
+      AND longitude IS NOT NULL
+"""
+
+RESULTS_SQL = """
+    SELECT
+        s.location_id,
+        r.result_id,
+        r.sample_id,
+        s.sample_date,
+        s.matrix_code,
+        r.cas_rn,
+        r.result_value_norm as result_value,
+        r.detection_limit_norm as detection_limit,
+        r.detect_flag,
+        r.result_unit_norm as result_unit
+    FROM fact_results r
+    JOIN fact_samples s ON r.sample_id = s.sample_id
+    WHERE s.location_id IN (SELECT location_id FROM polygon_locations)
+    ORDER BY s.location_id, s.sample_date, r.cas_rn
+"""
+
+_indexes = weakref.WeakKeyDictionary()
+
+
+def earth_xyz(latitude, longitude):
+    """Earth-centered coordinates in feet, one row per point."""
+    lat = np.radians(np.asarray(latitude, dtype=float))
+    lon = np.radians(np.asarray(longitude, dtype=float))
+    return EARTH_RADIUS_FT * np.column_stack([
+        np.cos(lat) * np.cos(lon),
+        np.cos(lat) * np.sin(lon),
+        np.sin(lat),
+    ])
+
+
+def arc_to_chord(distance_ft):
+    """Straight-line distance for a great-circle distance."""
+    half_angle = np.minimum(np.asarray(distance_ft, dtype=float) / (2 * EARTH_RADIUS_FT), np.pi / 2)
+    return 2 * EARTH_RADIUS_FT * np.sin(half_angle)
+
+
+def chord_to_arc(chord_ft):
+    """Great-circle distance for a straight-line distance."""
+    half_chord = np.minimum(np.asarray(chord_ft, dtype=float) / (2 * EARTH_RADIUS_FT), 1.0)
+    return 2 * EARTH_RADIUS_FT * np.arcsin(half_chord)
+
+
+def local_xy(latitude, longitude, origin_latitude, origin_longitude):
+    """
+    East (x) and north (y) feet from an origin on an equirectangular
+    projection; accurate to well under 1% within a few miles of it.
+    """
+    lat = np.radians(np.asarray(latitude, dtype=float))
+    lon = np.radians(np.asarray(longitude, dtype=float))
+    lat0, lon0 = np.radians(origin_latitude), np.radians(origin_longitude)
+    return EARTH_RADIUS_FT * np.cos(lat0) * (lon - lon0), EARTH_RADIUS_FT * (lat - lat0)
+
+
+def local_to_latlon(x_ft, y_ft, origin_latitude, origin_longitude):
+    """(latitude, longitude) of local_xy coordinates."""
+    lat0 = np.radians(origin_latitude)
+    latitude = origin_latitude + np.degrees(np.asarray(y_ft, dtype=float) / EARTH_RADIUS_FT)
+    longitude = origin_longitude + np.degrees(
+        np.asarray(x_ft, dtype=float) / (EARTH_RADIUS_FT * np.cos(lat0))
+    )
+    return latitude, longitude
+
+
+def point_in_polygon(x, y, polygon_x, polygon_y):
+    """Ray-casting test of every point against every polygon edge at once."""
+    x, y = np.asarray(x, dtype=float)[:, None], np.asarray(y, dtype=float)[:, None]
+    x1, y1 = np.asarray(polygon_x, dtype=float), np.asarray(polygon_y, dtype=float)
+    x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+    straddles = (y1 > y) != (y2 > y)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        crossing_x = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+    return (straddles & (x < crossing_x)).sum(axis=1) % 2 == 1
+
+
+class LocationIndex:
+    """KD-tree over dim_locations, with one tree per location type on demand."""
+
+    def __init__(self, locations, version=None):
+        self.version = version
+        self.locations = locations.reset_index(drop=True)
+        self.xyz = earth_xyz(self.locations["latitude"], self.locations["longitude"])
+        self._trees = {}
+
+    def __len__(self):
+        return len(self.locations)
+
+    def _tree(self, location_type=None):
+        """(rows, tree) for all locations or those of one type."""
+        if location_type not in self._trees:
+            if location_type is None:
+                rows = np.arange(len(self.locations))
+            else:
+                rows = np.flatnonzero(self.locations["location_type"].to_numpy() == location_type)
+            self._trees[location_type] = rows, cKDTree(self.xyz[rows])
+        return self._trees[location_type]
+
+    def _matches(self, query, rows, chord):
+        matches = self.locations.loc[rows, LOCATION_COLUMNS].reset_index(drop=True)
+        matches.insert(0, "query", query)
+        matches["distance_ft"] = chord_to_arc(chord)
+        return matches
+
+    def position(self, location_id):
+        """(latitude, longitude) of a location."""
+        row = self.locations[self.locations["location_id"] == location_id].iloc[0]
+        return row["latitude"], row["longitude"]
+
+    def within(self, latitude, longitude, radius_ft, location_type=None):
+        """Locations within radius_ft of each query point, nearest first."""
+        points = earth_xyz(np.atleast_1d(latitude), np.atleast_1d(longitude))
+        rows, tree = self._tree(location_type)
+        found = tree.query_ball_point(points, arc_to_chord(radius_ft))
+        counts = np.array([len(f) for f in found])
+        local = np.concatenate([np.asarray(f, dtype=int) for f in found]) if counts.sum() else np.zeros(0, int)
+        query = np.repeat(np.arange(len(points)), counts)
+        chord = np.linalg.norm(self.xyz[rows[local]] - points[query], axis=1)
+        matches = self._matches(query, rows[local], chord)
+        return matches.sort_values(["query", "distance_ft"], kind="mergesort").reset_index(drop=True)
+
+    def nearest(self, latitude, longitude, k=1, location_type="MW", max_distance_ft=np.inf):
+        """The k nearest locations (wells by default) to each query point."""
+        points = earth_xyz(np.atleast_1d(latitude), np.atleast_1d(longitude))
+        rows, tree = self._tree(location_type)
+        k = min(k, len(rows))
+        if k == 0:
+            return self._matches(np.zeros(0, int), np.zeros(0, int), np.zeros(0))
+        bound = np.inf if np.isinf(max_distance_ft) else arc_to_chord(max_distance_ft)
+        chord, local = tree.query(points, k=k, distance_upper_bound=bound)
+        chord, local = chord.reshape(len(points), k), local.reshape(len(points), k)
+        found = np.isfinite(chord)
+        query = np.nonzero(found)[0]
+        return self._matches(query, rows[local[found]], chord[found])
+
+    def in_polygon(self, polygon, location_type=None):
+        """Locations inside a polygon of (longitude, latitude) vertices."""
+        vertices = np.asarray(polygon, dtype=float)
+        center_lon, center_lat = vertices.mean(axis=0)
+        radius = chord_to_arc(np.linalg.norm(
+            earth_xyz(vertices[:, 1], vertices[:, 0]) - earth_xyz(center_lat, center_lon), axis=1
+        ).max())
+        candidates = self.within(center_lat, center_lon, radius, location_type)
+        rows = self.locations.set_index("location_id").loc[candidates["location_id"]]
+        x, y = local_xy(rows["latitude"], rows["longitude"], center_lat, center_lon)
+        polygon_x, polygon_y = local_xy(vertices[:, 1], vertices[:, 0], center_lat, center_lon)
+        inside = point_in_polygon(x, y, polygon_x, polygon_y)
+        return candidates[inside].drop(columns=["query", "distance_ft"]).reset_index(drop=True)
+
+
+def load_location_index(conn):
+    """
+    The connection's LocationIndex, built on first use and rebuilt when
+    the database's data version has changed since.
+    """
+    version = data_version(conn)
+    index = _indexes.get(conn)
+    if index is None or index.version != version:
+        ensure_location_roles(conn)
+        index = LocationIndex(conn.execute(LOCATIONS_SQL).fetchdf(), version)
+        _indexes[conn] = index
+    return index
+
+
+def results_in_polygon(conn, polygon, location_type=None):
+    """Normalized results from every location inside a polygon."""
+    inside = load_location_index(conn).in_polygon(polygon, location_type)
+    conn.register("polygon_locations", inside[["location_id"]])
+    try:
+        return conn.execute(RESULTS_SQL).fetchdf()
+    finally:
+        conn.unregister("polygon_locations")
@@ -0,0 +1,135 @@
+"""
+Core EPC statistics as DuckDB functions, so summaries can be computed in
+a single GROUP BY without pulling results into pandas.
+
+register_functions(conn) adds, for that connection only:
+
+    t_ppf(p, df)                       Student's t quantile (Arrow UDF)
+    km_stats(list)                     left-censored Kaplan-Meier mean, SD
+                                       and SE of a list of
+                                       {observed, detected} structs (Arrow UDF)
+    observed_value(value, dl, flag)    result for detects, DL otherwise
+    half_dl(value, dl, flag)           result for detects, 1/2 DL otherwise
+    detect_freq_pct(flag)              aggregate: % of rows with flag 'Y'
+    t_ucl95(x)                         aggregate: Student's t-UCL95
+    chebyshev_ucl95(x)                 aggregate: Chebyshev (mean, SD) UCL95
+    percentile(x, p)                   aggregate: quantile_cont(x, p)
+    km_mean(value, dl, flag)           aggregate: Kaplan-Meier mean
+    km_ucl95(value, dl, flag)          aggregate: Kaplan-Meier t-UCL95
+
+The aggregate functions are macros over avg, stddev_samp, quantile_cont
+and the two UDFs, so they work in any GROUP BY:
+
+    SELECT cas_rn,
+           detect_freq_pct(detect_flag),
+           t_ucl95(half_dl(result_value_norm, detection_limit_norm, detect_flag)),
+           km_ucl95(result_value_norm, detection_limit_norm, detect_flag)
+    FROM fact_results
+    GROUP BY cas_rn
+
+These are the same formulas era.ucl uses; the ROS substitution,
+goodness-of-fit tests and method decision tree stay in era.ucl. Macros
+are created as TEMP because the UDFs they call exist only on the
+registering connection.
+"""
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from scipy import stats
+
+from era.censored import CENSORED_ORDER, kaplan_meier
+from era.segments import Segments
+
+UDF_NAMES = ("t_ppf", "km_stats")
+
+KM_INPUT = "STRUCT(observed DOUBLE, detected BOOLEAN)[]"
+KM_OUTPUT = "STRUCT(mean DOUBLE, sd DOUBLE, se DOUBLE)"
+
+MACROS = """
+    CREATE OR REPLACE TEMP MACRO observed_value(value, dl, flag) AS
+        CASE WHEN flag = 'Y' THEN value ELSE dl END;
+
+    CREATE OR REPLACE TEMP MACRO half_dl(value, dl, flag) AS
+        CASE WHEN flag = 'Y' THEN value ELSE dl / 2 END;
+
+    CREATE OR REPLACE TEMP MACRO detect_freq_pct(flag) AS
+        100.0 * count_if(flag = 'Y') / count(*);
+
+    CREATE OR REPLACE TEMP MACRO t_ucl95(x) AS
+        avg(x) + t_ppf(0.95, greatest(count(x) - 1, 1)) * stddev_samp(x) / sqrt(count(x));
+
+    -- sqrt(1 / alpha - 1) with alpha = 0.05
+    CREATE OR REPLACE TEMP MACRO chebyshev_ucl95(x) AS
+        avg(x) + sqrt(19.0) * stddev_samp(x) / sqrt(count(x));
+
+    CREATE OR REPLACE TEMP MACRO percentile(x, p) AS
+        quantile_cont(x, p);
+
+    CREATE OR REPLACE TEMP MACRO km_mean(value, dl, flag) AS
+        km_stats(list({'observed': observed_value(value, dl, flag), 'detected': flag = 'Y'})).mean;
+
+    CREATE OR REPLACE TEMP MACRO km_ucl95(value, dl, flag) AS
+        km_mean(value, dl, flag)
+        + t_ppf(0.95, greatest(count(*) - 1, 1))
+        * km_stats(list({'observed': observed_value(value, dl, flag), 'detected': flag = 'Y'})).se;
+"""
+
+
+def _numpy(array):
+    return array.to_numpy(zero_copy_only=False).astype(float)
+
+
+def _t_ppf(p, df):
+    quantile = stats.t.ppf(_numpy(p), _numpy(df))
+    return pa.array(quantile, type=pa.float64())
+
+
+def _km_stats(lists):
+    # Flatten the whole batch of lists into one segmented frame (one
+    # group per list) and run the vectorized estimator once
+    if isinstance(lists, pa.ChunkedArray):
+        lists = lists.combine_chunks()
+    offsets = lists.offsets.to_numpy()
+    values = lists.values.slice(offsets[0], offsets[-1] - offsets[0])
+    rows = pd.DataFrame({
+        "group": np.repeat(np.arange(len(lists)), np.diff(offsets)),
+        "observed_value": _numpy(values.field("observed")),
+        "detect_flag": values.field("detected").to_numpy(zero_copy_only=False),
+    }).dropna()
+    rows["detect_flag"] = rows["detect_flag"].astype(bool)
+
+    columns = {name: np.full(len(lists), np.nan) for name in ("mean", "sd", "se")}
+    if len(rows):
+        seg = Segments(rows, ["group"], CENSORED_ORDER)
+        km = kaplan_meier(seg, seg.column("observed_value"), seg.column("detect_flag", bool))
+        groups = seg.groups["group"].to_numpy()
+        for name in columns:
+            columns[name][groups] = km[name]
+
+    return pa.StructArray.from_arrays(
+        [pa.array(columns[name], type=pa.float64()) for name in columns],
+        names=list(columns),
+    )
+
+
+def register_functions(conn):
+    """
+    Register the statistics UDFs and macros on a DuckDB connection.
+    Safe to call again on the same connection (e.g. when a notebook cell
+    re-runs); existing UDFs are replaced.
+    """
+    for name in UDF_NAMES:
+        try:
+            conn.remove_function(name)
+        except duckdb.InvalidInputException:
+            pass
+
+    double = duckdb.type("DOUBLE")
+    conn.create_function("t_ppf", _t_ppf, [double, double], double, type="arrow")
+    conn.create_function(
+        "km_stats", _km_stats, [duckdb.type(KM_INPUT)], duckdb.type(KM_OUTPUT), type="arrow"
+    )
+    conn.execute(MACROS)
+    return conn
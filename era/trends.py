@@ -0,0 +1,202 @@
+"""
+Mann-Kendall trend tests and Sen's slopes for every location/analyte series.
+
+Series are (location, analyte, matrix) time series of stat_results
+(normal samples with their field duplicates combined, see
+era.duplicates), one value per sample date (the highest detect on that
+date, or the highest detection limit if nothing was detected).
+Non-detects follow Helsel's recensoring: every non-detect, and every
+detect below the series' highest detection limit, becomes one tied
+value below that limit, so the test never ranks censored values against
+each other.
+
+The O(n^2) pairwise comparisons are done on padded (series x n x n)
+tensors. Series are processed longest first in chunks whose padded
+size stays under PAIR_BUDGET elements, so short series are not padded
+out to the longest one.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import special
+
+from era.duplicates import ensure_statistics_results
+from era.segments import Segments
+
+TREND_KEYS = ("location_id", "cas_rn", "matrix_code")
+
+SIGNIFICANCE = 0.05
+MIN_SAMPLES = 4
+
+# Upper bound on series * n * n per padded chunk
+PAIR_BUDGET = 4_000_000
+
+DAYS_PER_YEAR = 365.25
+
+SERIES_SQL = """
+    SELECT
+        r.location_id,
+        r.cas_rn,
+        r.matrix_code,
+        r.sample_date,
+        bool_or(r.detect_flag = 'Y') as detected,
+        coalesce(
+            max(r.result_value_norm) FILTER (WHERE r.detect_flag = 'Y'),
+            max(r.detection_limit_norm)
+        ) as observed_value,
+        max(r.detection_limit_norm) FILTER (WHERE r.detect_flag = 'N') as nd_limit
+    FROM stat_results r
+    GROUP BY r.location_id, r.cas_rn, r.matrix_code, r.sample_date
+"""
+
+
+def load_series(conn):
+    """One row per series and sample date, with detect status and value."""
+    ensure_statistics_results(conn)
+    return conn.execute(SERIES_SQL).fetchdf()
+
+
+def recensor(seg, values, detected, nd_limit):
+    """
+    Apply the series' highest non-detect limit as a common censoring level.
+
+    Returns (values, censored, censor_limit): censored rows (non-detects
+    and detects below the limit) are set to half the limit, which ties
+    them with each other and ranks them below every remaining detect.
+    """
+    censor_limit = seg.max(nd_limit, where=~detected & np.isfinite(nd_limit))
+    limit = seg.broadcast(censor_limit)
+    with np.errstate(invalid="ignore"):
+        censored = ~detected | (values < limit)
+    return np.where(censored, limit / 2, values), censored, censor_limit
+
+
+def _padded(seg, columns, fill):
+    """Scatter row arrays into (series x n_max) padded matrices."""
+    shape = (len(seg), int(seg.counts.max(initial=0)))
+    padded = []
+    for column in columns:
+        matrix = np.full(shape, fill, dtype=float)
+        matrix[seg.ids, seg.position()] = column
+        padded.append(matrix)
+    return padded
+
+
+def _pairwise(x, t, n):
+    """
+    S statistic and Sen's slope for a padded chunk of series.
+
+    x and t are (series x n_max) values and times (NaN padded); rows are
+    in time order, so pair (i, j) with i < j is later minus earlier.
+    """
+    n_max = x.shape[1]
+    upper = np.triu(np.ones((n_max, n_max), dtype=bool), k=1)
+    # i < j, and j within the series (which implies i is too)
+    valid = upper & (np.arange(n_max)[None, None, :] < n[:, None, None])
+
+    dx = x[:, None, :] - x[:, :, None]
+    dt = t[:, None, :] - t[:, :, None]
+    s = np.where(valid, np.sign(dx), 0.0).sum(axis=(1, 2))
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slopes = np.where(valid & (dt > 0), dx / dt, np.nan)
+    flat = slopes.reshape(len(x), -1)
+    has_slope = np.isfinite(flat).any(axis=1)
+    sens = np.full(len(x), np.nan)
+    if has_slope.any():
+        sens[has_slope] = np.nanmedian(flat[has_slope], axis=1)
+    return s, sens
+
+
+def mann_kendall(seg, values, times):
+    """
+    Mann-Kendall S, tie-corrected variance, Z and two-sided p-value, and
+    Sen's slope (value units per unit of time) for every series.
+
+    Rows must be sorted by time within each series.
+    """
+    n = seg.counts.astype(float)
+    s = np.zeros(len(seg))
+    sens = np.full(len(seg), np.nan)
+
+    # Process series longest first: each chunk pads to the length of its
+    # first series, so its size can be set from that before it is taken
+    order = np.argsort(-seg.counts, kind="mergesort")
+    x_pad, t_pad = _padded(seg, [values, times], np.nan)
+    start = 0
+    while start < len(order):
+        width = max(int(seg.counts[order[start]]), 1)
+        size = max(PAIR_BUDGET // (width * width), 1)
+        chunk = order[start:start + size]
+        s[chunk], sens[chunk] = _pairwise(
+            x_pad[chunk, :width], t_pad[chunk, :width], seg.counts[chunk]
+        )
+        start += len(chunk)
+
+    # Tie correction: sum of t (t - 1) (2t + 5) over groups of tied values
+    ties = pd.DataFrame({"series": seg.ids, "value": values}).value_counts().reset_index()
+    t = ties["count"].to_numpy(dtype=float)
+    tie_term = np.bincount(ties["series"], t * (t - 1) * (2 * t + 5), minlength=len(seg))
+    var_s = (n * (n - 1) * (2 * n + 5) - tie_term) / 18
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = np.where(var_s > 0, (s - np.sign(s)) / np.sqrt(var_s), 0.0)
+        tau = s / (n * (n - 1) / 2)
+    p = 2 * special.ndtr(-np.abs(z))
+    return {"s": s, "var_s": var_s, "z": z, "p": p, "tau": tau, "sens_slope": sens}
+
+
+def compute_trends(series, keys=TREND_KEYS):
+    """
+    Trend statistics for every series in a load_series() frame. Returns
+    one row per series with the MK results, Sen's slope per year and a
+    trend call (Increasing, Decreasing, No Trend, Insufficient Data).
+    """
+    seg = Segments(series, keys, ["sample_date"])
+    detected = seg.column("detected", bool)
+    values, censored, censor_limit = recensor(
+        seg, seg.column("observed_value"), detected, seg.column("nd_limit")
+    )
+    dates = seg.data["sample_date"].to_numpy(dtype="datetime64[D]")
+    # Only differences of times enter the statistics; dates[:1] is an
+    # origin that also works when there are no series
+    years = (dates - dates[:1]).astype(float) / DAYS_PER_YEAR
+    mk = mann_kendall(seg, values, years)
+
+    enough = seg.counts >= MIN_SAMPLES
+    significant = enough & (mk["p"] < SIGNIFICANCE)
+
+    trends = seg.groups.copy()
+    trends["n_samples"] = seg.counts
+    trends["n_detect"] = seg.count(detected)
+    trends["n_censored"] = seg.count(censored)
+    trends["first_date"] = seg.first(seg.data["sample_date"].to_numpy())
+    trends["last_date"] = seg.data["sample_date"].to_numpy()[seg.starts + seg.counts - 1]
+    trends["censor_limit"] = censor_limit
+    trends["mk_s"] = mk["s"]
+    trends["mk_var_s"] = mk["var_s"]
+    trends["mk_z"] = mk["z"]
+    trends["mk_p"] = mk["p"]
+    trends["kendall_tau"] = mk["tau"]
+    trends["sens_slope_per_year"] = mk["sens_slope"]
+    trends["trend"] = np.select(
+        [~enough, significant & (mk["s"] > 0), significant & (mk["s"] < 0)],
+        ["Insufficient Data", "Increasing", "Decreasing"],
+        default="No Trend",
+    )
+    return trends
+
+
+def materialize_trends(conn, keys=TREND_KEYS):
+    """Trend statistics for all series, stored as stat_trends."""
+    trends = compute_trends(load_series(conn), keys)
+    conn.register("trend_frame", trends)
+    try:
+        conn.execute("""
+            CREATE OR REPLACE TABLE stat_trends AS
+            SELECT * REPLACE (first_date::DATE AS first_date, last_date::DATE AS last_date)
+            FROM trend_frame
+        """)
+    finally:
+        conn.unregister("trend_frame")
+    return trends
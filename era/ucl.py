@@ -0,0 +1,376 @@
+"""
+Exposure point concentrations (EPCs) for every analyte/matrix group at once.
+
+Results are sorted into contiguous segments (see era.segments) and the
+per-group counts, means, variances and t critical values are computed as
+arrays. The method follows a ProUCL-style decision tree driven by
+detection frequency and the goodness-of-fit of the detects (era.gof):
+
+    >= 80% detected and >= 4 detects
+        normal                        ->  Student's t-UCL95
+        gamma                         ->  adjusted gamma UCL95 (n < 50),
+                                          approximate gamma UCL95 (n >= 50)
+        lognormal with log SD < 1     ->  Land's H-UCL95
+        otherwise                     ->  Chebyshev (mean, SD) UCL95
+    >= 50% detected
+        normal detects                ->  Kaplan-Meier t-UCL95
+        otherwise                     ->  Kaplan-Meier Chebyshev UCL95
+    any detects                       ->  maximum detect
+    no detects                        ->  1/2 maximum detection limit
+
+Non-detects enter the parametric UCLs and summary statistics at their
+robust ROS imputed value (stat_ros_imputed), or at half their detection
+limit where ROS could not be fitted; the KM UCLs use the left-censored
+Kaplan-Meier estimator (see era.censored). Gamma UCLs and Land's H-UCL
+use the lookup tables in era.critical_values. The combined result is
+materialized as stat_epcs.
+
+Results come from stat_results (era.duplicates), with field duplicates
+combined with their parent samples and QC samples left out. Results
+flagged as outliers by era.outliers (stat_outlier_flags) can be left out
+of the whole calculation with exclude_outliers.
+
+Per-group statistics are cached in stat_epc_cache by a content hash of
+the group's sorted (value, DL, detect flag) rows and EPC_VERSION, so a
+run only recomputes groups whose results changed. Group attributes
+(names, screening level, COPC flag) and hazard quotients are always
+taken fresh.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from era.censored import CENSORED_ORDER, kaplan_meier, ros_impute, with_observed_value
+from era.critical_values import adjusted_gamma_level, chi_square_quantile, land_h
+from era.db import table_exists
+from era.duplicates import ensure_statistics_results
+from era.gof import GOF_VERSION, cached_goodness_of_fit, goodness_of_fit
+from era.outliers import materialize_outlier_flags
+from era.segments import Segments
+
+EPC_KEYS = ("cas_rn", "matrix_code")
+
+# Bump when any EPC statistic or the method decision tree changes so that
+# cached group statistics are recomputed
+EPC_VERSION = f"epc-3/{GOF_VERSION}"
+
+# Row order and columns hashed to detect changed groups
+HASH_ORDER = ("observed_value", "detect_flag", "detection_limit", "result_value")
+HASH_COLUMNS = ("result_value", "detection_limit", "detect_flag")
+
+# Group attributes carried through from the first row of each group
+EPC_ATTRIBUTES = ("analyte_name", "matrix_name", "result_unit", "screening_level", "is_copc")
+
+RESULTS_SQL = """
+    SELECT
+        r.result_id,
+        r.cas_rn,
+        r.matrix_code,
+        a.analyte_name,
+        m.matrix_name,
+        r.result_value_norm as result_value,
+        r.detection_limit_norm as detection_limit,
+        r.detect_flag,
+        r.result_unit_norm as result_unit,
+        CASE r.matrix_code
+            WHEN 'SO' THEN sl.rsl_residential_soil_mg_kg
+            WHEN 'GW' THEN sl.rsl_residential_tap_ug_l
+        END as screening_level,
+        -- COPC: any detect above the residential screening level
+        bool_or(
+            r.detect_flag = 'Y' AND r.result_value_norm > CASE r.matrix_code
+                WHEN 'SO' THEN sl.rsl_residential_soil_mg_kg
+                WHEN 'GW' THEN sl.rsl_residential_tap_ug_l
+            END
+        ) OVER (PARTITION BY r.cas_rn, r.matrix_code) as is_copc
+    FROM stat_results r
+    LEFT JOIN dim_analytes a ON r.cas_rn = a.cas_rn
+    LEFT JOIN dim_matrix m ON r.matrix_code = m.matrix_code
+    LEFT JOIN ref_screening_levels sl ON r.cas_rn = sl.cas_rn
+    WHERE r.result_unit_norm IS NOT NULL
+"""
+
+
+def load_results(conn, exclude_outliers=False):
+    """
+    One row per statistics-ready result (RESULTS_SQL over stat_results,
+    see era.duplicates). With exclude_outliers, results flagged
+    is_outlier in stat_outlier_flags (built first if missing) are left out.
+    """
+    ensure_statistics_results(conn)
+    if not exclude_outliers:
+        return conn.execute(RESULTS_SQL).fetchdf()
+    if not table_exists(conn, "stat_outlier_flags"):
+        materialize_outlier_flags(conn)
+    return conn.execute(RESULTS_SQL + """
+        AND r.result_id NOT IN (SELECT result_id FROM stat_outlier_flags WHERE is_outlier)
+    """).fetchdf()
+
+
+def materialize_ros_imputed(conn, keys=EPC_KEYS, exclude_outliers=False):
+    """
+    Impute every non-detect by robust ROS, per analyte/matrix group, and
+    store the values as stat_ros_imputed. Returns the imputed rows.
+    """
+    seg = Segments(with_observed_value(load_results(conn, exclude_outliers)), keys, CENSORED_ORDER)
+    detect = seg.data["detect_flag"].to_numpy() == "Y"
+    imputed = ros_impute(seg, seg.column("observed_value"), detect)
+
+    keep = np.isfinite(imputed)
+    ros_frame = seg.data.loc[keep, ["result_id", *keys]].assign(imputed_value=imputed[keep])
+    conn.register("ros_frame", ros_frame)
+    try:
+        conn.execute("CREATE OR REPLACE TABLE stat_ros_imputed AS SELECT * FROM ros_frame")
+    finally:
+        conn.unregister("ros_frame")
+    return ros_frame
+
+
+def load_epc_inputs(conn, ros_imputed=None, exclude_outliers=False):
+    """
+    One row per normalized result with its group attributes and ROS value.
+
+    ros_imputed is the frame returned by materialize_ros_imputed; when not
+    given, stat_ros_imputed is read (and built first if missing).
+    exclude_outliers drops results flagged by era.outliers.
+    """
+    data = load_results(conn, exclude_outliers)
+    if ros_imputed is None:
+        if not table_exists(conn, "stat_ros_imputed"):
+            materialize_ros_imputed(conn, exclude_outliers=exclude_outliers)
+        ros_imputed = conn.execute("SELECT result_id, imputed_value FROM stat_ros_imputed").fetchdf()
+    ros_value = ros_imputed.set_index("result_id")["imputed_value"]
+    return data.assign(ros_value=data["result_id"].map(ros_value))
+
+
+def substitute_nondetects(seg):
+    """
+    Result values with non-detects replaced by their ROS-imputed value, or
+    1/2 DL where ROS was not fitted. Returns (values, has_ros) per row.
+    """
+    detect = seg.data["detect_flag"].to_numpy() == "Y"
+    value = seg.column("result_value")
+    dl = seg.column("detection_limit")
+    if "ros_value" in seg.data.columns:
+        ros_value = seg.column("ros_value")
+    else:
+        ros_value = np.full(len(value), np.nan)
+    has_ros = ~detect & np.isfinite(ros_value)
+    return np.where(detect, value, np.where(has_ros, ros_value, dl / 2)), has_ros
+
+
+def gamma_ucls(seg, values, confidence=0.95):
+    """
+    Approximate and adjusted gamma UCLs per group (ProUCL).
+
+    The shape is estimated by Thom's approximation to the MLE and
+    bias-corrected, k* = (n - 3) k / n + 2 / (3n). With nu = 2 n k*, the
+    UCLs are nu * mean / chi-square(nu) at the alpha and adjusted beta
+    levels. Groups with fewer than 3 values or any value <= 0 get NaN.
+    """
+    n = seg.counts.astype(float)
+    mean = seg.mean(values)
+    log_values = np.log(np.where(values > 0, values, 1.0))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        a = np.log(mean) - seg.mean(log_values)
+        k_hat = (3 - a + np.sqrt((a - 3) ** 2 + 24 * a)) / (12 * a)
+        k_star = (n - 3) * k_hat / n + 2 / (3 * n)
+        nu = 2 * n * k_star
+        approx_ucl = nu * mean / chi_square_quantile(1 - confidence, nu)
+        adjusted_ucl = nu * mean / chi_square_quantile(adjusted_gamma_level(n), nu)
+
+    valid = (n >= 3) & (seg.min(values) > 0) & (a > 0)
+    return {
+        name: np.where(valid, result, np.nan)
+        for name, result in [
+            ("k_hat", k_hat),
+            ("k_star", k_star),
+            ("approx_ucl", approx_ucl),
+            ("adjusted_ucl", adjusted_ucl),
+        ]
+    }
+
+
+def lognormal_h_ucl(seg, values, confidence=0.95):
+    """
+    Land's H-UCL per group: exp(y_bar + s_y^2 / 2 + s_y H / sqrt(n - 1)) on
+    log values. Returns a dict of arrays (log_mean, log_sd, h, ucl).
+    """
+    n = seg.counts.astype(float)
+    positive = seg.min(values) > 0
+    log_values = np.log(np.where(values > 0, values, 1.0))
+    log_mean = np.where(positive, seg.mean(log_values), np.nan)
+    log_sd = np.where(positive, np.sqrt(seg.var(log_values)), np.nan)
+    h = land_h(n, log_sd, confidence)
+    with np.errstate(invalid="ignore", divide="ignore", over="ignore"):
+        ucl = np.exp(log_mean + log_sd ** 2 / 2 + log_sd * h / np.sqrt(n - 1))
+    return {"log_mean": log_mean, "log_sd": log_sd, "h": h, "ucl": ucl}
+
+
+def compute_epcs(data, keys=EPC_KEYS, attributes=EPC_ATTRIBUTES, confidence=0.95, gof=None):
+    """
+    Compute EPCs for every group in data in one vectorized pass.
+
+    data needs the key columns plus result_value, detection_limit and
+    detect_flag, and optionally ros_value (the ROS-imputed value of each
+    non-detect); any of the attribute columns present are carried through.
+    gof is the per-group goodness-of-fit frame (era.gof); it is computed
+    from the detects when not given. Returns one row per group.
+    """
+    seg = Segments(with_observed_value(data), keys, CENSORED_ORDER)
+    detect = seg.data["detect_flag"].to_numpy() == "Y"
+    value = seg.column("result_value")
+    dl = seg.column("detection_limit")
+    substituted, has_ros = substitute_nondetects(seg)
+
+    n_total = seg.counts
+    n_detect = seg.count(detect)
+    detect_freq = 100.0 * n_detect / n_total
+
+    mean = seg.mean(substituted)
+    sd = np.sqrt(seg.var(substituted))
+    se = sd / np.sqrt(n_total)
+    t_crit = stats.t.ppf(confidence, np.maximum(n_total - 1, 1))
+
+    max_detect = seg.max(value, where=detect)
+    mean_detect = seg.mean(value, where=detect)
+    max_dl = seg.max(dl, where=~detect)
+
+    chebyshev_factor = np.sqrt(1 / (1 - confidence) - 1)
+    chebyshev_ucl = mean + chebyshev_factor * se
+
+    km = kaplan_meier(seg, seg.column("observed_value"), detect)
+    km_t_ucl = km["mean"] + t_crit * km["se"]
+    km_cheb_ucl = km["mean"] + chebyshev_factor * km["se"]
+
+    gamma = gamma_ucls(seg, substituted, confidence)
+    lognormal = lognormal_h_ucl(seg, substituted, confidence)
+
+    if gof is None:
+        detects = data.loc[data["detect_flag"] == "Y", [*keys, "result_value"]].dropna()
+        gof = goodness_of_fit(detects, keys)
+    gof = seg.groups.merge(gof, on=list(keys), how="left")
+    distribution = gof["gof_distribution"].fillna("Nonparametric").to_numpy()
+    normal = distribution == "Normal"
+
+    detected = (detect_freq >= 80) & (n_detect >= 4)
+    use_km = ~detected & (detect_freq >= 50) & np.isfinite(km["se"])
+    use_max = ~detected & ~use_km & (n_detect > 0)
+    use_gamma = detected & (distribution == "Gamma") & np.isfinite(gamma["approx_ucl"])
+    use_h = detected & (distribution == "Lognormal") & (lognormal["log_sd"] < 1) & np.isfinite(lognormal["ucl"])
+
+    choices = [
+        (detected & normal, mean + t_crit * se, "t-UCL95"),
+        (use_gamma & (n_total < 50), gamma["adjusted_ucl"], "Adjusted Gamma UCL95"),
+        (use_gamma, gamma["approx_ucl"], "Approximate Gamma UCL95"),
+        (use_h, lognormal["ucl"], "H-UCL95"),
+        (detected, chebyshev_ucl, "Chebyshev UCL95"),
+        (use_km & normal, km_t_ucl, "KM-t UCL95"),
+        (use_km, km_cheb_ucl, "KM-Chebyshev UCL95"),
+        (use_max, max_detect, "Max Detect"),
+    ]
+    conditions, values, labels = zip(*choices)
+    epc = np.select(conditions, values, default=max_dl / 2)
+    method = np.select(conditions, labels, default="1/2 DL")
+
+    epcs = seg.groups.copy()
+    for column in attributes:
+        if column in seg.data.columns:
+            epcs[column] = seg.first(seg.data[column].to_numpy())
+    epcs["n_total"] = n_total
+    epcs["n_detect"] = n_detect
+    epcs["n_ros_imputed"] = seg.count(has_ros)
+    epcs["detect_freq_pct"] = detect_freq
+    epcs["mean"] = mean
+    epcs["sd"] = sd
+    epcs["mean_detect"] = mean_detect
+    epcs["max_detect"] = max_detect
+    epcs["max_dl"] = max_dl
+    epcs["t_crit"] = t_crit
+    epcs["chebyshev_ucl95"] = chebyshev_ucl
+    epcs["km_mean"] = km["mean"]
+    epcs["km_sd"] = km["sd"]
+    epcs["km_se"] = km["se"]
+    epcs["km_t_ucl95"] = km_t_ucl
+    epcs["km_cheb_ucl95"] = km_cheb_ucl
+    epcs["gamma_k_hat"] = gamma["k_hat"]
+    epcs["gamma_k_star"] = gamma["k_star"]
+    epcs["gamma_approx_ucl95"] = gamma["approx_ucl"]
+    epcs["gamma_adjusted_ucl95"] = gamma["adjusted_ucl"]
+    epcs["log_mean"] = lognormal["log_mean"]
+    epcs["log_sd"] = lognormal["log_sd"]
+    epcs["land_h"] = lognormal["h"]
+    epcs["h_ucl95"] = lognormal["ucl"]
+    for column in gof.columns.difference([*keys, "data_hash"], sort=False):
+        epcs[column] = gof[column].to_numpy()
+    epcs["epc"] = epc
+    epcs["method"] = method
+    if "screening_level" in epcs.columns:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            epcs["hazard_quotient"] = epc / epcs["screening_level"].to_numpy(dtype=float)
+    return epcs
+
+
+def _store_frame(conn, table_name, frame, replace=False):
+    """Create table_name from frame, or append frame to it by column name."""
+    conn.register("stat_frame", frame)
+    try:
+        if replace or not table_exists(conn, table_name):
+            conn.execute(f"CREATE OR REPLACE TABLE {table_name} AS SELECT * FROM stat_frame")
+        else:
+            conn.execute(f"INSERT INTO {table_name} BY NAME SELECT * FROM stat_frame")
+    finally:
+        conn.unregister("stat_frame")
+
+
+def materialize_epcs(conn, ros_imputed=None, keys=EPC_KEYS, attributes=EPC_ATTRIBUTES,
+                     exclude_outliers=False):
+    """
+    Compute EPCs for all analyte/matrix groups and store them as stat_epcs,
+    reusing cached statistics for groups whose results are unchanged.
+    With exclude_outliers, results flagged by era.outliers are left out
+    (pass a ros_imputed built the same way).
+
+    Returns (epcs, hits, misses) where hits and misses count groups.
+    """
+    keys = list(keys)
+    data = with_observed_value(load_epc_inputs(conn, ros_imputed, exclude_outliers))
+    seg = Segments(data, keys, HASH_ORDER)
+    groups = seg.groups.assign(data_hash=seg.hashes(HASH_COLUMNS))
+
+    cached = None
+    if table_exists(conn, "stat_epc_cache"):
+        cached = conn.execute("""
+            SELECT * EXCLUDE (epc_version) FROM stat_epc_cache WHERE epc_version = ?
+        """, [EPC_VERSION]).fetchdf()
+    known = set() if cached is None else set(cached["data_hash"])
+    missing = groups[~groups["data_hash"].isin(known)]
+
+    # Without a cache (e.g. no results yet) the empty statistics still
+    # give stat_epcs its columns
+    if len(missing) or cached is None:
+        stale = data.merge(missing[keys], on=keys)
+        gof, _, _ = cached_goodness_of_fit(conn, stale, keys)
+        derived = [*keys, *attributes, "hazard_quotient"]
+        fresh = compute_epcs(stale, keys, attributes, gof=gof).merge(missing, on=keys)
+        fresh = fresh[["data_hash", *fresh.columns.difference([*derived, "data_hash"], sort=False)]]
+        fresh = fresh.drop_duplicates("data_hash")
+
+        # A cache written by another EPC_VERSION may have other columns
+        schema_changed = cached is not None and list(cached.columns) != list(fresh.columns)
+        if len(fresh):
+            _store_frame(conn, "stat_epc_cache", fresh.assign(epc_version=EPC_VERSION), replace=schema_changed)
+        cached = fresh if cached is None or schema_changed else pd.concat([cached, fresh], ignore_index=True)
+
+    epcs = seg.groups.copy()
+    for column in attributes:
+        if column in seg.data.columns:
+            epcs[column] = seg.first(seg.data[column].to_numpy())
+    statistics = groups.merge(cached, on="data_hash", how="left").drop(columns=[*keys, "data_hash"])
+    epcs = pd.concat([epcs, statistics], axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        epcs["hazard_quotient"] = epcs["epc"].to_numpy(dtype=float) / epcs["screening_level"].to_numpy(dtype=float)
+
+    _store_frame(conn, "stat_epcs", epcs, replace=True)
+    return epcs, len(groups) - len(missing), len(missing)
@@ -0,0 +1,150 @@
+"""
+Unit harmonization for analytical results.
+
+Labs report the same analyte in different units (ng/L, ug/L, mg/L,
+ug/kg, mg/kg, ...). Screening levels are stored in one unit per medium,
+so results are converted once, set-based, into materialized normalized
+columns on fact_results:
+
+    result_value_norm, detection_limit_norm, result_unit_norm
+
+Results whose unit is unknown or belongs to a different dimension than
+the medium's screening unit are left NULL and reported as mismatches.
+"""
+
+# (unit_code, unit_name, dimension, factor to the dimension's base unit)
+# Base units: mg/kg (mass/mass), ug/L (mass/volume), ug/m3 (air)
+UNITS = [
+    ("g/kg", "Grams per kilogram", "mass/mass", 1000.0),
+    ("mg/kg", "Milligrams per kilogram", "mass/mass", 1.0),
+    ("ug/kg", "Micrograms per kilogram", "mass/mass", 0.001),
+    ("ng/kg", "Nanograms per kilogram", "mass/mass", 0.000001),
+    ("mg/g", "Milligrams per gram", "mass/mass", 1000.0),
+    ("ug/g", "Micrograms per gram", "mass/mass", 1.0),
+    ("g/L", "Grams per liter", "mass/volume", 1000000.0),
+    ("mg/L", "Milligrams per liter", "mass/volume", 1000.0),
+    ("ug/L", "Micrograms per liter", "mass/volume", 1.0),
+    ("ng/L", "Nanograms per liter", "mass/volume", 0.001),
+    ("pg/L", "Picograms per liter", "mass/volume", 0.000001),
+    ("mg/m3", "Milligrams per cubic meter", "mass/air", 1000.0),
+    ("ug/m3", "Micrograms per cubic meter", "mass/air", 1.0),
+    ("ng/m3", "Nanograms per cubic meter", "mass/air", 0.001),
+]
+
+# Unit that screening levels are expressed in, by matrix
+MATRIX_SCREENING_UNITS = [
+    ("SO", "mg/kg"),
+    ("SE", "mg/kg"),
+    ("TI", "mg/kg"),
+    ("GW", "ug/L"),
+    ("SW", "ug/L"),
+    ("DW", "ug/L"),
+    ("WW", "ug/L"),
+    ("AI", "ug/m3"),
+    ("AO", "ug/m3"),
+    ("SG", "ug/m3"),
+]
+
+# SQL expression that canonicalizes a unit for matching against dim_units
+# (case-insensitive, micro sign and Greek mu spelled as "u")
+UNIT_KEY_SQL = "lower(replace(replace(trim({column}), 'µ', 'u'), 'μ', 'u'))"
+
+
+def ensure_unit_tables(conn):
+    """Create and populate dim_units, ref_unit_conversions and ref_matrix_units."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS dim_units (
+            unit_code VARCHAR PRIMARY KEY,
+            unit_name VARCHAR,
+            dimension VARCHAR,
+            to_base_factor DOUBLE
+        )
+    """)
+    conn.executemany("INSERT OR REPLACE INTO dim_units VALUES (?, ?, ?, ?)", UNITS)
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS ref_matrix_units (
+            matrix_code VARCHAR PRIMARY KEY,
+            screening_unit VARCHAR
+        )
+    """)
+    conn.executemany("INSERT OR REPLACE INTO ref_matrix_units VALUES (?, ?)", MATRIX_SCREENING_UNITS)
+
+    # Every pairwise conversion within a dimension, derived from dim_units
+    conn.execute("""
+        CREATE OR REPLACE TABLE ref_unit_conversions AS
+        SELECT
+            f.unit_code as from_unit,
+            t.unit_code as to_unit,
+            f.to_base_factor / t.to_base_factor as factor
+        FROM dim_units f
+        JOIN dim_units t ON f.dimension = t.dimension
+    """)
+
+
+def normalize_results(conn):
+    """
+    Fill the normalized value/DL/unit columns of fact_results in one UPDATE.
+
+    Returns the number of results that could not be converted.
+    """
+    ensure_unit_tables(conn)
+    for column, column_type in [
+        ("result_value_norm", "DOUBLE"),
+        ("detection_limit_norm", "DOUBLE"),
+        ("result_unit_norm", "VARCHAR"),
+    ]:
+        conn.execute(f"ALTER TABLE fact_results ADD COLUMN IF NOT EXISTS {column} {column_type}")
+
+    unit_key = UNIT_KEY_SQL.format(column="r.result_unit")
+    conn.execute(f"""
+        UPDATE fact_results AS t SET
+            result_value_norm = n.result_value * n.factor,
+            detection_limit_norm = n.detection_limit * n.factor,
+            result_unit_norm = CASE WHEN n.factor IS NOT NULL THEN n.screening_unit END
+        FROM (
+            SELECT
+                r.result_id,
+                r.result_value,
+                r.detection_limit,
+                mu.screening_unit,
+                c.factor
+            FROM fact_results r
+            LEFT JOIN fact_samples s ON r.sample_id = s.sample_id
+            LEFT JOIN ref_matrix_units mu ON s.matrix_code = mu.matrix_code
+            LEFT JOIN ref_unit_conversions c
+                ON lower(c.from_unit) = {unit_key}
+                AND c.to_unit = mu.screening_unit
+        ) n
+        WHERE t.result_id = n.result_id
+    """)
+
+    return conn.execute("""
+        SELECT COUNT(*) FROM fact_results WHERE result_unit_norm IS NULL
+    """).fetchone()[0]
+
+
+def unit_summary(conn):
+    """Count results by reported unit and conversion outcome."""
+    unit_key = UNIT_KEY_SQL.format(column="r.result_unit")
+    return conn.execute(f"""
+        SELECT
+            s.matrix_code,
+            r.result_unit,
+            mu.screening_unit,
+            CASE
+                WHEN r.result_unit_norm IS NULL THEN 'Unconvertible'
+                WHEN c.from_unit = c.to_unit THEN 'Native'
+                ELSE 'Converted'
+            END as status,
+            c.factor,
+            COUNT(*) as result_count
+        FROM fact_results r
+        LEFT JOIN fact_samples s ON r.sample_id = s.sample_id
+        LEFT JOIN ref_matrix_units mu ON s.matrix_code = mu.matrix_code
+        LEFT JOIN ref_unit_conversions c
+            ON lower(c.from_unit) = {unit_key}
+            AND c.to_unit = mu.screening_unit
+        GROUP BY ALL
+        ORDER BY status DESC, result_count DESC
+    """).fetchdf()
@@ -39,7 +39,14 @@ def __(Path, duckdb):
     PROJECT_ROOT = Path(__file__).parent.parent
     DB_PATH = PROJECT_ROOT / "data" / "processed" / "analytics.duckdb"
     conn = duckdb.connect(str(DB_PATH))
-    return DB_PATH, PROJECT_ROOT, conn
+
+    # Statistics functions (t_ucl95, km_ucl95, detect_freq_pct, ...) for
+    # the custom SQL cell, from the project-level era package
+    import sys
+    sys.path.insert(0, str(PROJECT_ROOT))
+    from era.sql_functions import register_functions
+    register_functions(conn)
+    return DB_PATH, PROJECT_ROOT, conn, register_functions, sys
 
 
 @app.cell
@@ -146,7 +153,16 @@ def __(mo, null_df):
 
 @app.cell
 def __(mo):
-    mo.md("## Custom SQL Query")
+    mo.md(
+        r"""
+        ## Custom SQL Query
+
+        Statistics functions from `era.sql_functions` are available in queries:
+        `detect_freq_pct(flag)`, `t_ucl95(x)`, `chebyshev_ucl95(x)`,
+        `percentile(x, p)`, `half_dl(value, dl, flag)`,
+        `km_mean(value, dl, flag)`, `km_ucl95(value, dl, flag)` and `t_ppf(p, df)`.
+        """
+    )
     return
 
 
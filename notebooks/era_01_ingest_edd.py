@@ -45,7 +45,17 @@ def _(Path):
     DB_PATH = DATA_PROCESSED / "analytics.duckdb"
 
     DATA_PROCESSED.mkdir(parents=True, exist_ok=True)
-    return DATA_RAW, DB_PATH, SQL_DIR
+    return DATA_RAW, DB_PATH, PROJECT_ROOT, SQL_DIR
+
+
+@app.cell
+def _(PROJECT_ROOT):
+    # Shared ERA computations live in the project-level era package
+    import sys
+    sys.path.insert(0, str(PROJECT_ROOT))
+    from era import background, duplicates, groundwater, screening, units
+    from era.db import start_ingest_batch
+    return background, duplicates, groundwater, screening, start_ingest_batch, units
 
 
 @app.cell
@@ -118,19 +128,22 @@ def _(mo):
 
 
 @app.cell
-def _(conn, edd_files, mo, pd):
+def _(background, conn, edd_files, mo, pd):
     # Load locations
     if edd_files["locations"].exists():
         locations_df = pd.read_excel(edd_files["locations"])
 
         # Insert into dim_locations
+        background.ensure_location_roles(conn)
         conn.execute("DELETE FROM dim_locations")
+        conn.execute("DELETE FROM ref_exposure_units")
 
         for _, row in locations_df.iterrows():
             conn.execute("""
                 INSERT INTO dim_locations (location_id, location_name, location_type,
-                    latitude, longitude, elevation_ft, total_depth_ft, install_date, status)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    latitude, longitude, elevation_ft, total_depth_ft, install_date, status,
+                    location_role)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, [
                 row.get('location_id'),
                 row.get('location_name'),
@@ -140,9 +153,16 @@ def _(conn, edd_files, mo, pd):
                 row.get('elevation_ft'),
                 row.get('total_depth_ft'),
                 row.get('install_date'),
-                row.get('status', 'Active')
+                row.get('status', 'Active'),
+                row.get('location_role') if pd.notna(row.get('location_role')) else None
             ])
+            if pd.notna(row.get('exposure_unit')):
+                conn.execute("""
+                    INSERT INTO ref_exposure_units (location_id, exposure_unit) VALUES (?, ?)
+                """, [row.get('location_id'), row.get('exposure_unit')])
 
+        # Files without a location_role column fall back to name-based roles
+        background.ensure_location_roles(conn)
         loc_count = conn.execute("SELECT COUNT(*) FROM dim_locations").fetchone()[0]
         mo.md(f"Loaded **{loc_count}** locations")
     else:
@@ -168,20 +188,21 @@ def _(mo):
 
 
 @app.cell
-def _(conn, edd_files, mo, pd):
+def _(conn, duplicates, edd_files, mo, pd):
     # Load samples sheet
     if edd_files["lab_results"].exists():
         samples_df = pd.read_excel(edd_files["lab_results"], sheet_name="Samples")
 
         # Clear existing samples
         conn.execute("DELETE FROM fact_samples")
+        duplicates.ensure_sample_parents(conn)
 
         for _, row in samples_df.iterrows():
             conn.execute("""
                 INSERT INTO fact_samples (sample_id, location_id, sample_date, sample_time,
                     matrix_code, sample_type, depth_top_ft, depth_bottom_ft,
-                    sample_method, sampler_name, lab_name, lab_sample_id)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    sample_method, sampler_name, lab_name, lab_sample_id, parent_sample_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, [
                 row.get('sample_id'),
                 row.get('location_id'),
@@ -194,7 +215,8 @@ def _(conn, edd_files, mo, pd):
                 row.get('sample_method'),
                 row.get('sampler_name'),
                 row.get('lab_name'),
-                row.get('lab_sample_id')
+                row.get('lab_sample_id'),
+                row.get('parent_sample_id') if pd.notna(row.get('parent_sample_id')) else None
             ])
 
         sample_count = conn.execute("SELECT COUNT(*) FROM fact_samples").fetchone()[0]
@@ -253,6 +275,93 @@ def _(conn, edd_files, mo, pd):
         mo.md(f"Loaded **{result_count}** analytical results")
     else:
         results_df = None
+        result_count = 0
+    return (result_count,)
+
+
+@app.cell
+def _(mo):
+    mo.md(r"""
+    ## Unit Harmonization
+
+    Results are converted to the screening-level unit for their matrix
+    (mg/kg for soil/sediment, ug/L for water, ug/m3 for air) using the
+    `ref_unit_conversions` table. Converted values are stored in
+    `result_value_norm` / `detection_limit_norm`; results with unknown or
+    incompatible units are left blank and must be fixed before screening.
+    """)
+    return
+
+
+@app.cell
+def _(
+    conn,
+    duplicates,
+    edd_files,
+    mo,
+    result_count,
+    screening,
+    start_ingest_batch,
+    units,
+):
+    # Runs after every results load (result_count) so the normalized
+    # columns and scr_* tables follow the loaded results
+    unconvertible_count = units.normalize_results(conn)
+    unit_summary_df = units.unit_summary(conn)
+
+    # Keep the precomputed hazard-index cube, cancer risks and ecological
+    # hazard indices current for screening and the reports
+    hi_locations = screening.refresh_hazard_index(conn)
+    screening.materialize_cancer_risk(conn)
+    screening.materialize_eco_screening(conn)
+    screening.materialize_screening_results(conn)
+
+    # Snapshot exceedances under this ingest batch for the quarter-over-quarter diff
+    batch_id = start_ingest_batch(conn, edd_files["lab_results"].name)
+    snapshot_count = screening.snapshot_exceedances(conn, batch_id)
+
+    # Statistics-ready results (field duplicates combined, QC samples out),
+    # with the duplicate rule last chosen in era_03
+    statistics_count = duplicates.materialize_statistics_results(
+        conn, duplicates.current_duplicate_rule(conn)
+    )
+
+    mo.vstack([
+        mo.md(f"**{unconvertible_count}** results with unconvertible units"),
+        mo.ui.table(unit_summary_df),
+        mo.md(f"Hazard index cube refreshed for **{hi_locations}** location(s)"),
+        mo.md(f"Ingest batch **{batch_id}**: {snapshot_count} current exceedances snapshotted"),
+        mo.md(f"**{statistics_count}** statistics-ready results"),
+    ])
+    return (unconvertible_count,)
+
+
+@app.cell
+def _(mo):
+    mo.md(r"""
+    ## Load Field Measurements
+
+    Field parameters (pH, conductivity, depth to water, ...) per well and
+    event. Groundwater elevations (well elevation less depth to water) and
+    the hydraulic gradient and flow direction of every event are rebuilt
+    into `stat_gw_elevations` / `stat_gw_gradients`.
+    """)
+    return
+
+
+@app.cell
+def _(conn, edd_files, groundwater, mo, pd):
+    if edd_files["field_measurements"].exists():
+        field_df = pd.read_excel(edd_files["field_measurements"])
+        field_count = groundwater.load_field_measurements(conn, field_df)
+        gradients_df = groundwater.materialize_groundwater_gradients(conn)
+        field_output = mo.vstack([
+            mo.md(f"Loaded **{field_count}** field measurements"),
+            mo.md(f"Groundwater gradient fitted for **{gradients_df['dh_dx'].notna().sum()}** event(s)"),
+        ])
+    else:
+        field_output = mo.md("_Field measurements file not found_")
+    field_output
     return
 
 
@@ -321,7 +430,7 @@ def _(mo):
 
 
 @app.cell
-def _(conn, mo):
+def _(conn, mo, unconvertible_count):
     # Check for data quality issues
     qc_checks = []
 
@@ -341,6 +450,9 @@ def _(conn, mo):
     """).fetchone()[0]
     qc_checks.append({"Check": "Analytes without RSLs", "Count": no_rsl, "Status": "OK" if no_rsl == 0 else "Note"})
 
+    # Results whose reported unit can't be converted to the screening unit
+    qc_checks.append({"Check": "Results with unconvertible units", "Count": unconvertible_count, "Status": "OK" if unconvertible_count == 0 else "Review"})
+
     # Non-detect percentage
     nd_pct = conn.execute("""
         SELECT ROUND(100.0 * SUM(CASE WHEN detect_flag = 'N' THEN 1 ELSE 0 END) / COUNT(*), 1)
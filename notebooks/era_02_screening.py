@@ -44,6 +44,16 @@ def __(Path, duckdb):
     return DB_PATH, PROJECT_ROOT, conn
 
 
+@app.cell
+def __(PROJECT_ROOT):
+    # Shared ERA computations live in the project-level era package
+    import sys
+    sys.path.insert(0, str(PROJECT_ROOT))
+    from era import screening, spatial, units
+    from era.db import table_exists
+    return screening, spatial, sys, table_exists, units
+
+
 @app.cell
 def __(mo):
     mo.md("## Screening Level Coverage")
@@ -71,6 +81,28 @@ def __(conn, mo):
     return coverage_df, coverage_query
 
 
+@app.cell
+def __(conn, mo, units):
+    # Results are screened on their normalized (screening-unit) values;
+    # anything that couldn't be converted is excluded and listed here
+    unit_status_df = units.unit_summary(conn)
+    unit_mismatch_df = unit_status_df[unit_status_df["status"] == "Unconvertible"]
+    converted_count = int(unit_status_df.loc[unit_status_df["status"] == "Converted", "result_count"].sum())
+
+    if len(unit_mismatch_df) > 0:
+        unit_output = mo.vstack([
+            mo.md(f"""
+            **Unit mismatches**: {int(unit_mismatch_df['result_count'].sum())} results have units that
+            can't be converted to the screening unit and are excluded from screening.
+            """),
+            mo.ui.table(unit_mismatch_df),
+        ])
+    else:
+        unit_output = mo.md(f"All results have convertible units ({converted_count} converted to the screening unit).")
+    unit_output
+    return converted_count, unit_mismatch_df, unit_output, unit_status_df
+
+
 @app.cell
 def __(mo):
     mo.md("## Select Screening Scenario")
@@ -99,6 +131,27 @@ def __(mo):
     return matrix_filter,
 
 
+@app.cell
+def __(mo, screening):
+    criteria_basis = mo.ui.dropdown(
+        options=list(screening.CRITERIA_BASIS),
+        value="Current criteria",
+        label="Criteria Basis:"
+    )
+    criteria_basis
+    return criteria_basis,
+
+
+@app.cell
+def __(conn, criteria_basis, mo, screening):
+    # Record any criteria changes so past reports can be reproduced with the
+    # screening levels that were in force on each sample date
+    new_criteria_versions = screening.record_criteria_history(conn)
+    criteria_join = screening.CRITERIA_BASIS[criteria_basis.value]
+    mo.md(f"_Criteria history: {new_criteria_versions} new version(s) recorded._")
+    return criteria_join, new_criteria_versions
+
+
 @app.cell
 def __(mo):
     mo.md("## Screening Results Summary")
@@ -106,7 +159,7 @@ def __(mo):
 
 
 @app.cell
-def __(conn, matrix_filter, mo, scenario):
+def __(conn, criteria_basis, criteria_join, matrix_filter, mo, scenario):
     # Build dynamic query based on selections
     rsl_column = "rsl_residential_soil_mg_kg" if scenario.value == "Residential" else "rsl_industrial_soil_mg_kg"
 
@@ -128,8 +181,8 @@ def __(conn, matrix_filter, mo, scenario):
             a.analyte_name,
             a.analyte_group,
             r.cas_rn,
-            r.result_value,
-            r.result_unit,
+            r.result_value_norm as result_value,
+            r.result_unit_norm as result_unit,
             r.detect_flag,
             r.lab_qualifier,
             CASE s.matrix_code
@@ -143,7 +196,7 @@ def __(conn, matrix_filter, mo, scenario):
         LEFT JOIN dim_locations l ON s.location_id = l.location_id
         LEFT JOIN dim_matrix m ON s.matrix_code = m.matrix_code
         LEFT JOIN dim_analytes a ON r.cas_rn = a.cas_rn
-        LEFT JOIN ref_screening_levels sl ON r.cas_rn = sl.cas_rn
+        {criteria_join}
         WHERE r.detect_flag = 'Y'
         {matrix_clause}
     )
@@ -175,7 +228,7 @@ def __(conn, matrix_filter, mo, scenario):
     exceeds_count = len(screening_df[screening_df['status'] == 'EXCEEDS']) if 'status' in screening_df.columns else 0
 
     mo.md(f"""
-    ### Screening Summary ({scenario.value})
+    ### Screening Summary ({scenario.value}, {criteria_basis.value.lower()})
 
     - **Analytes Evaluated**: {total_analytes}
     - **Exceeding Screening Levels**: {exceeds_count}
@@ -211,7 +264,7 @@ def __(mo):
 
 
 @app.cell
-def __(conn, matrix_clause, mo, rsl_column):
+def __(conn, criteria_join, matrix_clause, mo, rsl_column):
     copc_query = f"""
     WITH screening AS (
         SELECT
@@ -220,7 +273,7 @@ def __(conn, matrix_clause, mo, rsl_column):
             a.analyte_group,
             s.matrix_code,
             m.matrix_name,
-            r.result_value,
+            r.result_value_norm as result_value,
             CASE s.matrix_code
                 WHEN 'SO' THEN sl.{rsl_column}
                 WHEN 'GW' THEN sl.rsl_residential_tap_ug_l
@@ -231,7 +284,7 @@ def __(conn, matrix_clause, mo, rsl_column):
         JOIN fact_samples s ON r.sample_id = s.sample_id
         LEFT JOIN dim_matrix m ON s.matrix_code = m.matrix_code
         LEFT JOIN dim_analytes a ON r.cas_rn = a.cas_rn
-        LEFT JOIN ref_screening_levels sl ON r.cas_rn = sl.cas_rn
+        {criteria_join}
         WHERE r.detect_flag = 'Y'
         AND sl.cas_rn IS NOT NULL
         {matrix_clause}
@@ -274,7 +327,7 @@ def __(mo):
 
 
 @app.cell
-def __(conn, matrix_clause, mo, rsl_column):
+def __(conn, criteria_join, matrix_clause, mo, rsl_column):
     location_exceed_query = f"""
     SELECT
         s.location_id,
@@ -282,13 +335,13 @@ def __(conn, matrix_clause, mo, rsl_column):
         l.location_type,
         m.matrix_name,
         a.analyte_name,
-        r.result_value,
-        r.result_unit,
+        r.result_value_norm as result_value,
+        r.result_unit_norm as result_unit,
         CASE s.matrix_code
             WHEN 'SO' THEN sl.{rsl_column}
             WHEN 'GW' THEN sl.rsl_residential_tap_ug_l
         END as screening_level,
-        ROUND(r.result_value / NULLIF(
+        ROUND(r.result_value_norm / NULLIF(
             CASE s.matrix_code
                 WHEN 'SO' THEN sl.{rsl_column}
                 WHEN 'GW' THEN sl.rsl_residential_tap_ug_l
@@ -301,9 +354,9 @@ def __(conn, matrix_clause, mo, rsl_column):
     LEFT JOIN dim_locations l ON s.location_id = l.location_id
     LEFT JOIN dim_matrix m ON s.matrix_code = m.matrix_code
     LEFT JOIN dim_analytes a ON r.cas_rn = a.cas_rn
-    LEFT JOIN ref_screening_levels sl ON r.cas_rn = sl.cas_rn
+    {criteria_join}
     WHERE r.detect_flag = 'Y'
-    AND r.result_value > CASE s.matrix_code
+    AND r.result_value_norm > CASE s.matrix_code
         WHEN 'SO' THEN sl.{rsl_column}
         WHEN 'GW' THEN sl.rsl_residential_tap_ug_l
     END
@@ -332,56 +385,40 @@ def __(mo):
 
 
 @app.cell
-def __(conn, mo, rsl_column):
-    # Calculate cumulative hazard index by location
-    hi_query = f"""
-    WITH hq_calc AS (
-        SELECT
-            s.location_id,
-            l.location_name,
-            s.matrix_code,
-            r.cas_rn,
-            a.analyte_name,
-            sl.target_organ,
-            r.result_value / NULLIF(
-                CASE s.matrix_code
-                    WHEN 'SO' THEN sl.{rsl_column}
-                    WHEN 'GW' THEN sl.rsl_residential_tap_ug_l
-                END, 0) as hq
-        FROM fact_results r
-        JOIN fact_samples s ON r.sample_id = s.sample_id
-        LEFT JOIN dim_locations l ON s.location_id = l.location_id
-        LEFT JOIN dim_analytes a ON r.cas_rn = a.cas_rn
-        LEFT JOIN ref_screening_levels sl ON r.cas_rn = sl.cas_rn
-        WHERE r.detect_flag = 'Y'
-        AND sl.cas_rn IS NOT NULL
-    )
+def __(conn, mo, scenario, screening):
+    # Hazard index cube is maintained incrementally; only locations whose
+    # results or criteria changed since the last refresh are recomputed
+    hi_refreshed = screening.refresh_hazard_index(conn)
+
+    hi_query = """
     SELECT
-        location_id,
-        location_name,
-        matrix_code,
-        target_organ,
-        COUNT(DISTINCT cas_rn) as analyte_count,
-        ROUND(SUM(hq), 3) as hazard_index,
-        CASE
-            WHEN SUM(hq) > 1 THEN 'EXCEEDS HI=1'
-            ELSE 'BELOW HI=1'
-        END as status
-    FROM hq_calc
-    WHERE hq IS NOT NULL
-    GROUP BY location_id, location_name, matrix_code, target_organ
-    HAVING SUM(hq) > 0.1
-    ORDER BY hazard_index DESC
+        h.location_id,
+        l.location_name,
+        h.matrix_code,
+        h.target_organ,
+        h.analyte_count,
+        ROUND(h.hazard_index, 3) as hazard_index,
+        a.analyte_name as dominant_analyte,
+        h.status
+    FROM scr_hazard_index h
+    LEFT JOIN dim_locations l ON h.location_id = l.location_id
+    LEFT JOIN dim_analytes a ON h.dominant_cas_rn = a.cas_rn
+    WHERE h.scenario = ?
+    AND h.hazard_index > 0.1
+    ORDER BY h.hazard_index DESC
     """
 
-    hi_df = conn.execute(hi_query).fetchdf()
-    mo.md("""
+    hi_df = conn.execute(hi_query, [scenario.value]).fetchdf()
+    mo.md(f"""
     ### Cumulative Hazard Index by Target Organ
 
     When multiple chemicals affect the same target organ, their HQs should be summed.
+    Analytes with several target organs (e.g. "Liver; Kidney") count toward each organ.
     Hazard Index (HI) > 1 indicates potential concern.
+
+    _{hi_refreshed} location(s) recomputed since the last refresh._
     """)
-    return hi_df, hi_query
+    return hi_df, hi_query, hi_refreshed
 
 
 @app.cell
@@ -393,6 +430,281 @@ def __(hi_df, mo):
     return
 
 
+@app.cell
+def __(mo):
+    mo.md(
+        r"""
+        ## Exceedance Changes Since Last Ingest
+
+        Each ingest snapshots the location/analyte combinations whose most recent
+        sample exceeds the screening level. Comparing the latest two snapshots shows
+        what is newly exceeding, no longer exceeding, or still exceeding.
+        """
+    )
+    return
+
+
+@app.cell
+def __(conn, mo, scenario, screening, table_exists):
+    if table_exists(conn, "scr_exceedance_snapshots"):
+        exceedance_diff_df = screening.exceedance_diff(conn)
+        exceedance_diff_df = exceedance_diff_df[exceedance_diff_df["scenario"] == scenario.value]
+        diff_counts = exceedance_diff_df["change_status"].value_counts().to_dict()
+        diff_output = mo.vstack([
+            mo.md(f"""
+            - **Newly exceeding**: {diff_counts.get('Newly exceeding', 0)}
+            - **No longer exceeding**: {diff_counts.get('No longer exceeding', 0)}
+            - **Still exceeding**: {diff_counts.get('Still exceeding', 0)}
+            """),
+            mo.ui.table(exceedance_diff_df),
+        ])
+    else:
+        exceedance_diff_df = None
+        diff_counts = {}
+        diff_output = mo.md("_No ingest snapshots yet - run era_01_ingest_edd.py_")
+    diff_output
+    return diff_counts, diff_output, exceedance_diff_df
+
+
+@app.cell
+def __(mo):
+    mo.md(
+        r"""
+        ## Criteria Change Detection
+
+        When a new RSL release is loaded, only analytes whose screening levels changed
+        are re-screened. Results that start or stop exceeding are logged to
+        `scr_criteria_changes`.
+        """
+    )
+    return
+
+
+@app.cell
+def __(conn, mo, screening, table_exists):
+    criteria_change = screening.rescreen_changed_criteria(conn)
+    changed_analytes = criteria_change['changed_analytes']
+
+    if table_exists(conn, "scr_criteria_changes"):
+        criteria_changes_df = conn.execute("""
+            SELECT
+                c.detected_at,
+                c.change_type,
+                c.location_id,
+                a.analyte_name,
+                c.scenario,
+                c.sample_date,
+                c.result_value,
+                c.old_screening_level,
+                c.new_screening_level
+            FROM scr_criteria_changes c
+            LEFT JOIN dim_analytes a ON c.cas_rn = a.cas_rn
+            ORDER BY c.detected_at DESC, c.change_type, c.location_id
+            """).fetchdf()
+        change_output = mo.ui.table(criteria_changes_df)
+    else:
+        criteria_changes_df = None
+        change_output = mo.md("_No criteria changes recorded yet_")
+
+    mo.vstack([
+        mo.md(f"""
+        - **Analytes with changed criteria**: {changed_analytes if changed_analytes is not None else 'initial build'}
+        - **Results re-screened**: {criteria_change['rescreened_results']}
+        - **New exceedances**: {criteria_change['new_exceedances']}
+        - **Cleared exceedances**: {criteria_change['cleared_exceedances']}
+        """),
+        change_output,
+    ])
+    return change_output, changed_analytes, criteria_change, criteria_changes_df
+
+
+@app.cell
+def __(mo):
+    mo.md(
+        r"""
+        ## Excess Lifetime Cancer Risk
+
+        Carcinogen RSLs are risk-based at a target risk of 1E-06, so each detect's
+        excess lifetime cancer risk is ELCR = Concentration / RSL x 1E-06.
+        Cumulative ELCR sums the maximum risk of each carcinogen at a location and is
+        compared to the EPA 1E-06 to 1E-04 risk range.
+        """
+    )
+    return
+
+
+@app.cell
+def __(conn, mo, scenario, screening):
+    elcr_result_count = screening.materialize_cancer_risk(conn)
+
+    elcr_df = conn.execute("""
+        SELECT
+            c.location_id,
+            l.location_name,
+            m.matrix_name,
+            c.carcinogen_count,
+            c.cumulative_elcr,
+            a.analyte_name as dominant_analyte,
+            c.risk_range
+        FROM scr_cancer_risk_cumulative c
+        LEFT JOIN dim_locations l ON c.location_id = l.location_id
+        LEFT JOIN dim_matrix m ON c.matrix_code = m.matrix_code
+        LEFT JOIN dim_analytes a ON c.dominant_cas_rn = a.cas_rn
+        WHERE c.scenario = ?
+        ORDER BY c.cumulative_elcr DESC
+    """, [scenario.value]).fetchdf()
+
+    mo.vstack([
+        mo.md(f"### Cumulative ELCR by Location ({scenario.value}, {elcr_result_count} result/scenario risks)"),
+        mo.ui.table(elcr_df),
+    ])
+    return elcr_df, elcr_result_count
+
+
+@app.cell
+def __(mo):
+    mo.md(
+        r"""
+        ## Ecological Screening
+
+        Soil and sediment detects are screened against all four EPA Eco-SSL
+        receptors (plants, soil invertebrates, avian, mammalian) in a single pass.
+        The lowest available Eco-SSL is the limiting criterion for each analyte, and
+        receptor-level hazard indices sum the maximum HQ of each analyte per location.
+
+        Results are stored in `scr_eco_hq` and `scr_eco_hi` for use by the reports.
+        """
+    )
+    return
+
+
+@app.cell
+def __(mo):
+    screening_mode = mo.ui.dropdown(
+        options=["Human Health", "Ecological"],
+        value="Human Health",
+        label="Screening Mode:"
+    )
+    screening_mode
+    return screening_mode,
+
+
+@app.cell
+def __(conn, mo, screening, screening_mode):
+    mo.stop(screening_mode.value != "Ecological")
+
+    eco_result_count = screening.materialize_eco_screening(conn)
+
+    eco_hi_df = conn.execute("""
+        SELECT
+            h.location_id,
+            l.location_name,
+            m.matrix_name,
+            h.receptor,
+            h.analyte_count,
+            h.hazard_index,
+            a.analyte_name as dominant_analyte,
+            h.status
+        FROM scr_eco_hi h
+        LEFT JOIN dim_locations l ON h.location_id = l.location_id
+        LEFT JOIN dim_matrix m ON h.matrix_code = m.matrix_code
+        LEFT JOIN dim_analytes a ON h.dominant_cas_rn = a.cas_rn
+        ORDER BY h.hazard_index DESC
+    """).fetchdf()
+
+    eco_copc_df = conn.execute("""
+        SELECT
+            a.analyte_name,
+            m.matrix_name,
+            COUNT(*) as detections,
+            MAX(e.result_value) as max_conc,
+            e.eco_ssl_min_mg_kg,
+            e.limiting_receptor,
+            ROUND(MAX(e.hq_min), 2) as max_hq,
+            SUM(CASE WHEN e.screening_status = 'EXCEEDS' THEN 1 ELSE 0 END) as exceedance_count
+        FROM scr_eco_hq e
+        LEFT JOIN dim_analytes a ON e.cas_rn = a.cas_rn
+        LEFT JOIN dim_matrix m ON e.matrix_code = m.matrix_code
+        GROUP BY a.analyte_name, m.matrix_name, e.eco_ssl_min_mg_kg, e.limiting_receptor
+        ORDER BY max_hq DESC
+    """).fetchdf()
+
+    mo.vstack([
+        mo.md(f"### Ecological Screening ({eco_result_count} soil/sediment results)"),
+        mo.md("#### Minimum Eco-SSL Screening by Analyte"),
+        mo.ui.table(eco_copc_df),
+        mo.md("#### Receptor Hazard Index by Location"),
+        mo.ui.table(eco_hi_df),
+    ])
+    return eco_copc_df, eco_hi_df, eco_result_count
+
+
+@app.cell
+def __(mo):
+    mo.md(
+        r"""
+        ## Nearby Locations
+
+        Locations within a radius of a selected location and the nearest
+        monitoring wells, from the in-memory KD-tree over `dim_locations`
+        (`era.spatial`; great-circle distances in feet), with their
+        residential exceedance counts.
+        """
+    )
+    return
+
+
+@app.cell
+def __(conn, mo, spatial):
+    location_index = spatial.load_location_index(conn)
+    location_ids = location_index.locations["location_id"].tolist()
+    spatial_center = mo.ui.dropdown(
+        options=location_ids,
+        value=location_ids[0] if location_ids else None,
+        label="Location:"
+    )
+    spatial_radius = mo.ui.number(start=0, stop=5280, step=25, value=100, label="Radius (ft):")
+    mo.hstack([spatial_center, spatial_radius])
+    return location_ids, location_index, spatial_center, spatial_radius
+
+
+@app.cell
+def __(conn, location_index, mo, spatial_center, spatial_radius):
+    if spatial_center.value:
+        center_lat, center_lon = location_index.position(spatial_center.value)
+        nearby_df = location_index.within(center_lat, center_lon, spatial_radius.value)
+        nearest_wells_df = location_index.nearest(center_lat, center_lon, k=3)
+
+        exceedance_counts = conn.execute("""
+            SELECT location_id, COUNT(*) as residential_exceedances
+            FROM scr_results
+            WHERE scenario = 'Residential' AND screening_status = 'EXCEEDS'
+            GROUP BY location_id
+        """).fetchdf()
+        nearby_df = nearby_df.drop(columns="query").merge(exceedance_counts, on="location_id", how="left")
+        nearest_wells_df = nearest_wells_df.drop(columns="query").merge(exceedance_counts, on="location_id", how="left")
+
+        spatial_output = mo.vstack([
+            mo.md(f"#### Within {spatial_radius.value:,.0f} ft of {spatial_center.value}"),
+            mo.ui.table(nearby_df),
+            mo.md("#### Nearest Monitoring Wells"),
+            mo.ui.table(nearest_wells_df),
+        ])
+    else:
+        nearby_df = nearest_wells_df = None
+        center_lat = center_lon = exceedance_counts = None
+        spatial_output = mo.md("_No locations with coordinates_")
+    spatial_output
+    return (
+        center_lat,
+        center_lon,
+        exceedance_counts,
+        nearby_df,
+        nearest_wells_df,
+        spatial_output,
+    )
+
+
 @app.cell
 def __(mo):
     mo.md(
@@ -49,6 +49,85 @@ def __(Path, duckdb):
     return DB_PATH, PROJECT_ROOT, conn
 
 
+@app.cell
+def __(PROJECT_ROOT):
+    # Shared ERA computations live in the project-level era package
+    import sys
+    sys.path.insert(0, str(PROJECT_ROOT))
+    from era import background, bootstrap, btv, duplicates, outliers, trends, ucl
+    from era.series_cache import load_series_cache
+    from era.sql_functions import register_functions
+    return (
+        background,
+        bootstrap,
+        btv,
+        duplicates,
+        load_series_cache,
+        outliers,
+        register_functions,
+        sys,
+        trends,
+        ucl,
+    )
+
+
+@app.cell
+def __(mo):
+    mo.md(
+        r"""
+        ## Field Duplicates and QC Samples
+
+        Statistics use `stat_results`: each field duplicate (FD) is combined
+        with its parent sample (declared `parent_sample_id`, or the normal
+        sample from the same location, date, matrix and depth) by the
+        duplicate rule, and trip blanks, equipment blanks and matrix spikes
+        are left out. The rule keeps the highest detect (max), the mean of
+        the detects (mean), or the parent's result (parent); the choice is
+        kept for later ingests and reports.
+        """
+    )
+    return
+
+
+@app.cell
+def __(conn, duplicates, mo):
+    duplicate_rule_select = mo.ui.dropdown(
+        options=list(duplicates.DUPLICATE_RULES),
+        value=duplicates.current_duplicate_rule(conn),
+        label="Duplicate rule:",
+    )
+    duplicate_rule_select
+    return duplicate_rule_select,
+
+
+@app.cell
+def __(conn, duplicate_rule_select, duplicates, mo):
+    duplicate_rule = duplicate_rule_select.value
+    duplicates.ensure_statistics_results(conn, duplicate_rule)
+    sample_type_df = conn.execute("""
+        SELECT
+            coalesce(s.sample_type, 'N') as sample_type,
+            COUNT(DISTINCT s.sample_id) as n_samples,
+            COUNT(r.result_id) as n_results
+        FROM fact_samples s
+        LEFT JOIN fact_results r ON s.sample_id = r.sample_id
+        GROUP BY 1
+        ORDER BY 1
+    """).fetchdf()
+    combined_count = conn.execute("""
+        SELECT COUNT_IF(n_results > 1) FROM stat_results
+    """).fetchone()[0]
+
+    mo.vstack([
+        mo.md(
+            f"Duplicate rule **{duplicate_rule}**: **{combined_count}** results "
+            f"combined from a parent and its field duplicate"
+        ),
+        mo.ui.table(sample_type_df),
+    ])
+    return combined_count, duplicate_rule, sample_type_df
+
+
 @app.cell
 def __(mo):
     mo.md("## Detection Summary by Analyte")
@@ -56,22 +135,30 @@ def __(mo):
 
 
 @app.cell
-def __(conn, mo):
+def __(conn, duplicate_rule, duplicates, mo, register_functions):
+    # Detection frequency, percentiles and UCLs in one GROUP BY using the
+    # era.sql_functions macros (non-detects at 1/2 DL for the t-UCL)
+    register_functions(conn)
+    duplicates.ensure_statistics_results(conn, duplicate_rule)
     detection_query = """
     SELECT
         a.analyte_name,
         a.analyte_group,
         m.matrix_name,
         COUNT(*) as n_samples,
-        SUM(CASE WHEN r.detect_flag = 'Y' THEN 1 ELSE 0 END) as n_detect,
-        SUM(CASE WHEN r.detect_flag = 'N' THEN 1 ELSE 0 END) as n_nondetect,
-        ROUND(100.0 * SUM(CASE WHEN r.detect_flag = 'Y' THEN 1 ELSE 0 END) / COUNT(*), 1) as detect_freq_pct,
-        r.result_unit
-    FROM fact_results r
-    JOIN fact_samples s ON r.sample_id = s.sample_id
+        COUNT_IF(r.detect_flag = 'Y') as n_detect,
+        COUNT_IF(r.detect_flag = 'N') as n_nondetect,
+        ROUND(detect_freq_pct(r.detect_flag), 1) as detect_freq_pct,
+        MAX(r.result_value_norm) FILTER (WHERE r.detect_flag = 'Y') as max_detect,
+        percentile(CASE WHEN r.detect_flag = 'Y' THEN r.result_value_norm END, 0.95) as p95_detect,
+        t_ucl95(half_dl(r.result_value_norm, r.detection_limit_norm, r.detect_flag)) as t_ucl95_half_dl,
+        km_mean(r.result_value_norm, r.detection_limit_norm, r.detect_flag) as km_mean,
+        km_ucl95(r.result_value_norm, r.detection_limit_norm, r.detect_flag) as km_t_ucl95,
+        r.result_unit_norm as result_unit
+    FROM stat_results r
     LEFT JOIN dim_analytes a ON r.cas_rn = a.cas_rn
-    LEFT JOIN dim_matrix m ON s.matrix_code = m.matrix_code
-    GROUP BY a.analyte_name, a.analyte_group, m.matrix_name, r.result_unit
+    LEFT JOIN dim_matrix m ON r.matrix_code = m.matrix_code
+    GROUP BY a.analyte_name, a.analyte_group, m.matrix_name, r.result_unit_norm
     ORDER BY detect_freq_pct DESC, n_samples DESC
     """
 
@@ -96,15 +183,81 @@ def __(mo):
 
         | Detection Frequency | Recommended Method |
         |--------------------|--------------------|
-        | > 80% detects | Standard parametric (Student's t) |
-        | 50-80% detects | Kaplan-Meier or ROS |
+        | > 80% detects | By goodness of fit of detects: normal → Student's t; gamma → adjusted/approximate gamma; lognormal (log SD < 1) → H-UCL; otherwise Chebyshev |
+        | 50-80% detects | Kaplan-Meier (KM-t if detects are normal, otherwise KM-Chebyshev) |
         | < 50% detects | Use max detect or 1/2 max DL |
         | All non-detects | Use 1/2 max detection limit |
+
+        Goodness of fit uses Shapiro-Wilk for n ≤ 50 and Lilliefors above
+        (normal and lognormal), and Anderson-Darling for gamma, all at 5%.
         """
     )
     return
 
 
+@app.cell
+def __(mo):
+    mo.md(
+        r"""
+        ## Outlier Screening
+
+        Detected results are screened per analyte/matrix on the log scale:
+        Dixon's test for 3-25 detects, Rosner's generalized ESD test above
+        that (5% level), with Tukey IQR fences as a supporting flag. Flagged
+        results are stored in `stat_outlier_flags`; check the box below to
+        leave Dixon/Rosner outliers out of the ROS, EPC and bootstrap steps.
+        """
+    )
+    return
+
+
+@app.cell
+def __(conn, duplicate_rule, duplicates, mo, outliers):
+    duplicates.ensure_statistics_results(conn, duplicate_rule)
+    outlier_flags = outliers.materialize_outlier_flags(conn)
+    exclude_outliers = mo.ui.checkbox(label="Exclude Dixon/Rosner outliers from EPCs", value=False)
+
+    outlier_df = conn.execute("""
+        SELECT
+            a.analyte_name,
+            m.matrix_name,
+            o.result_id,
+            o.result_value,
+            o.n_detect,
+            o.test_used,
+            o.is_outlier,
+            o.iqr_flag
+        FROM stat_outlier_flags o
+        LEFT JOIN dim_analytes a ON o.cas_rn = a.cas_rn
+        LEFT JOIN dim_matrix m ON o.matrix_code = m.matrix_code
+        ORDER BY o.is_outlier DESC, a.analyte_name, m.matrix_name, o.result_value DESC
+    """).fetchdf()
+
+    mo.vstack([
+        mo.md(
+            f"**{int(outlier_flags['is_outlier'].sum())}** Dixon/Rosner outliers, "
+            f"**{int(outlier_flags['iqr_flag'].sum())}** results outside the IQR fences"
+        ),
+        mo.ui.table(outlier_df),
+        exclude_outliers,
+    ])
+    return exclude_outliers, outlier_df, outlier_flags
+
+
+@app.cell
+def __(conn, duplicate_rule, duplicates, exclude_outliers, mo, ucl):
+    # Impute non-detects once for all analyte/matrix groups by robust ROS
+    # (multiple detection limits); the UCL and summary steps reuse the table
+    duplicates.ensure_statistics_results(conn, duplicate_rule)
+    ros_imputed = ucl.materialize_ros_imputed(conn, exclude_outliers=exclude_outliers.value)
+    mo.md(
+        f"Robust ROS imputed **{len(ros_imputed)}** non-detects across "
+        f"{len(ros_imputed.groupby(['cas_rn', 'matrix_code']))} analyte/matrix groups "
+        "(stored in `stat_ros_imputed`). Groups with fewer than 3 detects fall back to 1/2 DL."
+    )
+    return ros_imputed,
+
+
 @app.cell
 def __(mo):
     analyte_select = mo.ui.dropdown(
@@ -116,18 +269,18 @@ def __(mo):
 
 
 @app.cell
-def __(conn, mo):
+def __(conn, duplicate_rule, duplicates, mo):
     # Get list of analytes with sufficient data
+    duplicates.ensure_statistics_results(conn, duplicate_rule)
     analyte_list_query = """
     SELECT DISTINCT
         a.analyte_name || ' (' || m.matrix_name || ')' as display_name,
         r.cas_rn,
-        s.matrix_code
-    FROM fact_results r
-    JOIN fact_samples s ON r.sample_id = s.sample_id
+        r.matrix_code
+    FROM stat_results r
     LEFT JOIN dim_analytes a ON r.cas_rn = a.cas_rn
-    LEFT JOIN dim_matrix m ON s.matrix_code = m.matrix_code
-    GROUP BY a.analyte_name, m.matrix_name, r.cas_rn, s.matrix_code
+    LEFT JOIN dim_matrix m ON r.matrix_code = m.matrix_code
+    GROUP BY a.analyte_name, m.matrix_name, r.cas_rn, r.matrix_code
     HAVING COUNT(*) >= 4
     ORDER BY a.analyte_name
     """
@@ -149,31 +302,24 @@ def __(conn, mo):
 
 
 @app.cell
-def __(analyte_options, analyte_selector, conn, mo, np, pd, stats):
+def __(conn, load_series_cache, ros_imputed):
+    # All analyte/matrix series in contiguous columns, loaded once per
+    # ingest batch, so changing the selection below is a slice
+    series_cache = load_series_cache(conn)
+    ros_lookup = ros_imputed.set_index('result_id')['imputed_value']
+    return ros_lookup, series_cache
+
+
+@app.cell
+def __(analyte_options, analyte_selector, mo, np, ros_lookup, series_cache, ucl):
     if analyte_selector is not None and analyte_selector.value:
-        # Parse selection
         selected = analyte_selector.value
-        analyte_name = selected.split(' (')[0]
-        matrix_name = selected.split('(')[1].rstrip(')')
+        option = analyte_options[analyte_options['display_name'] == selected].iloc[0]
+        cas_rn, matrix_code = option['cas_rn'], option['matrix_code']
 
         # Get data for selected analyte
-        data_query = f"""
-        SELECT
-            r.result_value,
-            r.detection_limit,
-            r.detect_flag,
-            r.lab_qualifier,
-            s.sample_date,
-            s.location_id
-        FROM fact_results r
-        JOIN fact_samples s ON r.sample_id = s.sample_id
-        LEFT JOIN dim_analytes a ON r.cas_rn = a.cas_rn
-        LEFT JOIN dim_matrix m ON s.matrix_code = m.matrix_code
-        WHERE a.analyte_name = '{analyte_name}'
-        AND m.matrix_name = '{matrix_name}'
-        ORDER BY s.sample_date
-        """
-        data_df = conn.execute(data_query).fetchdf()
+        data_df = series_cache.series(cas_rn, matrix_code)
+        data_df['ros_value'] = data_df['result_id'].map(ros_lookup)
 
         # Calculate statistics
         n_total = len(data_df)
@@ -196,48 +342,12 @@ def __(analyte_options, analyte_selector, conn, mo, np, pd, stats):
         else:
             min_detect = max_detect = mean_detect = std_detect = None
 
-        # Determine recommended method based on detection frequency
-        if detect_freq >= 80:
-            method = "Student's t-UCL"
-            # Simple substitution: use 1/2 DL for non-detects
-            all_values = list(detected_values)
-            for dl in dl_values:
-                all_values.append(dl / 2)
-            all_values = np.array(all_values)
-
-            if len(all_values) > 1:
-                mean_val = np.mean(all_values)
-                std_val = np.std(all_values, ddof=1)
-                se = std_val / np.sqrt(len(all_values))
-                t_crit = stats.t.ppf(0.95, len(all_values) - 1)
-                ucl95 = mean_val + t_crit * se
-            else:
-                mean_val = all_values[0] if len(all_values) > 0 else None
-                ucl95 = mean_val
-        elif detect_freq >= 50:
-            method = "Kaplan-Meier (simplified)"
-            # For this demo, using simple substitution
-            all_values = list(detected_values)
-            for dl in dl_values:
-                all_values.append(dl / 2)
-            all_values = np.array(all_values)
-
-            if len(all_values) > 1:
-                mean_val = np.mean(all_values)
-                std_val = np.std(all_values, ddof=1)
-                se = std_val / np.sqrt(len(all_values))
-                ucl95 = mean_val + 1.645 * se  # Using z for larger samples
-            else:
-                mean_val = all_values[0] if len(all_values) > 0 else None
-                ucl95 = mean_val
-        elif detect_freq > 0:
-            method = "Max Detect"
-            mean_val = np.mean(detected_values) if len(detected_values) > 0 else None
-            ucl95 = max_detect
-        else:
-            method = "1/2 Max Detection Limit"
-            mean_val = None
-            ucl95 = np.max(dl_values) / 2 if len(dl_values) > 0 else None
+        # Recommended EPC method and UCL95 from the shared UCL engine
+        epc_row = ucl.compute_epcs(
+            data_df.assign(cas_rn=cas_rn, matrix_code=matrix_code)
+        ).iloc[0]
+        method = epc_row['method']
+        ucl95 = epc_row['epc']
 
         mo.md(f"""
         ## Statistical Analysis: {selected}
@@ -264,28 +374,22 @@ def __(analyte_options, analyte_selector, conn, mo, np, pd, stats):
         | {method} | **{round(ucl95, 4) if ucl95 else 'N/A'}** |
         """)
     return (
-        all_values,
-        analyte_name,
+        cas_rn,
         data_df,
-        data_query,
         detect_freq,
         detected_values,
-        dl,
         dl_values,
+        epc_row,
+        matrix_code,
         max_detect,
-        matrix_name,
         mean_detect,
-        mean_val,
         method,
         min_detect,
         n_detect,
         n_nondetect,
         n_total,
-        se,
         selected,
         std_detect,
-        std_val,
-        t_crit,
         ucl95,
     )
 
@@ -297,127 +401,32 @@ def __(mo):
 
 
 @app.cell
-def __(conn, mo, np, stats):
-    # Calculate EPCs for all analytes with exceedances
-    epc_query = """
-    WITH copc_list AS (
-        SELECT DISTINCT r.cas_rn, s.matrix_code
-        FROM fact_results r
-        JOIN fact_samples s ON r.sample_id = s.sample_id
-        LEFT JOIN ref_screening_levels sl ON r.cas_rn = sl.cas_rn
-        WHERE r.detect_flag = 'Y'
-        AND (
-            (s.matrix_code = 'SO' AND r.result_value > sl.rsl_residential_soil_mg_kg)
-            OR (s.matrix_code = 'GW' AND r.result_value > sl.rsl_residential_tap_ug_l)
-        )
-    )
-    SELECT
-        a.analyte_name,
-        m.matrix_name,
-        r.cas_rn,
-        s.matrix_code,
-        r.result_value,
-        r.detection_limit,
-        r.detect_flag,
-        r.result_unit,
-        CASE s.matrix_code
-            WHEN 'SO' THEN sl.rsl_residential_soil_mg_kg
-            WHEN 'GW' THEN sl.rsl_residential_tap_ug_l
-        END as screening_level
-    FROM fact_results r
-    JOIN fact_samples s ON r.sample_id = s.sample_id
-    LEFT JOIN dim_analytes a ON r.cas_rn = a.cas_rn
-    LEFT JOIN dim_matrix m ON s.matrix_code = m.matrix_code
-    LEFT JOIN ref_screening_levels sl ON r.cas_rn = sl.cas_rn
-    WHERE (r.cas_rn, s.matrix_code) IN (SELECT cas_rn, matrix_code FROM copc_list)
-    ORDER BY a.analyte_name, s.matrix_code
-    """
-
-    raw_data = conn.execute(epc_query).fetchdf()
-
-    # Calculate EPCs for each analyte/matrix combo
-    epc_results = []
-
-    for (cas, matrix), group in raw_data.groupby(['cas_rn', 'matrix_code']):
-        analyte_name = group['analyte_name'].iloc[0]
-        matrix_name = group['matrix_name'].iloc[0]
-        unit = group['result_unit'].iloc[0]
-        sl = group['screening_level'].iloc[0]
-
-        n_total = len(group)
-        detects = group[group['detect_flag'] == 'Y']
-        n_detect = len(detects)
-        detect_freq = 100.0 * n_detect / n_total
-
-        detected_vals = detects['result_value'].values
-        dl_vals = group[group['detect_flag'] == 'N']['detection_limit'].values
-
-        # Calculate EPC
-        if detect_freq >= 80 and n_detect >= 4:
-            # Use t-UCL
-            all_vals = np.concatenate([detected_vals, dl_vals / 2]) if len(dl_vals) > 0 else detected_vals
-            mean_v = np.mean(all_vals)
-            std_v = np.std(all_vals, ddof=1)
-            se = std_v / np.sqrt(len(all_vals))
-            t_crit = stats.t.ppf(0.95, len(all_vals) - 1)
-            epc = mean_v + t_crit * se
-            method = "t-UCL95"
-        elif detect_freq >= 50:
-            all_vals = np.concatenate([detected_vals, dl_vals / 2]) if len(dl_vals) > 0 else detected_vals
-            epc = np.mean(all_vals) + 1.645 * np.std(all_vals, ddof=1) / np.sqrt(len(all_vals))
-            method = "z-UCL95"
-        elif n_detect > 0:
-            epc = np.max(detected_vals)
-            method = "Max Detect"
-        else:
-            epc = np.max(dl_vals) / 2 if len(dl_vals) > 0 else None
-            method = "1/2 DL"
-
-        hq = epc / sl if epc and sl else None
-
-        epc_results.append({
-            'Analyte': analyte_name,
-            'Matrix': matrix_name,
-            'N': n_total,
-            'Detect %': f"{detect_freq:.0f}%",
-            'EPC': round(epc, 4) if epc else None,
-            'Unit': unit,
-            'Method': method,
-            'RSL': sl,
-            'HQ': round(hq, 2) if hq else None
-        })
-
-    import pandas as pd
-    epc_df = pd.DataFrame(epc_results)
-    mo.md(f"### Exposure Point Concentrations for {len(epc_df)} COPCs")
-    return (
-        all_vals,
-        analyte_name,
-        cas,
-        detect_freq,
-        detected_vals,
-        detects,
-        dl_vals,
-        epc,
-        epc_df,
-        epc_query,
-        epc_results,
-        group,
-        hq,
-        matrix,
-        matrix_name,
-        mean_v,
-        method,
-        n_detect,
-        n_total,
-        pd,
-        raw_data,
-        se,
-        sl,
-        std_v,
-        t_crit,
-        unit,
+def __(conn, exclude_outliers, mo, pd, ros_imputed, ucl):
+    # Calculate EPCs for every analyte/matrix group in one vectorized pass
+    # (groups with unchanged results come from the statistics cache), then
+    # keep the COPCs (any detect above the residential screening level)
+    epc_table, epc_cache_hits, epc_cache_misses = ucl.materialize_epcs(
+        conn, ros_imputed, exclude_outliers=exclude_outliers.value
     )
+    copc_epcs = epc_table[epc_table['is_copc']].sort_values(['analyte_name', 'matrix_code'])
+
+    epc_df = pd.DataFrame({
+        'Analyte': copc_epcs['analyte_name'],
+        'Matrix': copc_epcs['matrix_name'],
+        'N': copc_epcs['n_total'],
+        'Detect %': copc_epcs['detect_freq_pct'].map('{:.0f}%'.format),
+        'EPC': copc_epcs['epc'].round(4),
+        'Unit': copc_epcs['result_unit'],
+        'Method': copc_epcs['method'],
+        'RSL': copc_epcs['screening_level'],
+        'HQ': copc_epcs['hazard_quotient'].round(2),
+    }).reset_index(drop=True)
+    mo.md(f"""
+    ### Exposure Point Concentrations for {len(epc_df)} COPCs
+
+    Statistics cache: **{epc_cache_hits}** groups reused, **{epc_cache_misses}** recomputed
+    """)
+    return copc_epcs, epc_cache_hits, epc_cache_misses, epc_df, epc_table
 
 
 @app.cell
@@ -433,47 +442,160 @@ def __(epc_df, mo):
 def __(mo):
     mo.md(
         r"""
-        ## Background Comparison
+        ## Candidate UCL95s (COPCs)
+
+        The decision tree picks the EPC from these candidates using the
+        goodness-of-fit result of the detects (`gof_distribution`).
+        Gamma UCLs use the bias-corrected shape k* with the approximate (alpha = 0.05)
+        and adjusted (sample-size dependent beta) chi-square levels. Land's H-UCL
+        assumes a lognormal distribution and can be unstable for log SD > 1.
+        """
+    )
+    return
+
+
+@app.cell
+def __(copc_epcs, mo):
+    ucl_candidates_df = copc_epcs[[
+        'analyte_name', 'matrix_name', 'n_total', 'gof_distribution',
+        'sw_p', 'sw_log_p', 'ad_gamma', 'epc', 'method',
+        'chebyshev_ucl95', 'km_t_ucl95', 'km_cheb_ucl95', 'gamma_k_star',
+        'gamma_approx_ucl95', 'gamma_adjusted_ucl95', 'log_sd', 'h_ucl95',
+    ]].round(4)
+    mo.ui.table(ucl_candidates_df)
+    return ucl_candidates_df,
+
+
+@app.cell
+def __(mo):
+    mo.md(
+        r"""
+        ## Bootstrap UCL95s (COPCs)
+
+        Percentile, bias-corrected accelerated (BCa) and bootstrap-t UCL95s
+        from 2,000 resamples per group, on the same values as the EPC table
+        (non-detects at their ROS value or 1/2 DL). Seeds are fixed per group,
+        so the results are reproducible.
+        """
+    )
+    return
+
 
-        Compare site concentrations to background/upgradient locations.
+@app.cell
+def __(bootstrap, conn, copc_epcs, exclude_outliers, mo, ros_imputed):
+    boot_table = bootstrap.materialize_bootstrap_ucls(
+        conn, ros_imputed, exclude_outliers=exclude_outliers.value
+    )
+    boot_df = copc_epcs[['cas_rn', 'matrix_code', 'analyte_name', 'matrix_name', 'epc', 'method']].merge(
+        boot_table, on=['cas_rn', 'matrix_code']
+    )
+    boot_display = boot_df[[
+        'analyte_name', 'matrix_name', 'n_total', 'mean', 'epc', 'method',
+        'ucl95_percentile', 'ucl95_bca', 'ucl95_bootstrap_t',
+    ]].round(4)
+    mo.ui.table(boot_display)
+    return boot_df, boot_display, boot_table
+
+
+@app.cell
+def __(mo):
+    mo.md(
+        r"""
+        ## Trend Analysis (Mann-Kendall)
+
+        Mann-Kendall S with tie correction and Sen's slope for every
+        location/analyte series, one value per sample date. Non-detects and
+        detects below a series' highest detection limit are treated as tied
+        values below that limit. Results are stored in `stat_trends`.
         """
     )
     return
 
 
 @app.cell
-def __(conn, mo):
-    background_query = """
-    WITH site_data AS (
+def __(conn, duplicate_rule, duplicates, mo, trends):
+    duplicates.ensure_statistics_results(conn, duplicate_rule)
+    trend_table = trends.materialize_trends(conn)
+    trend_counts = trend_table["trend"].value_counts()
+
+    trend_df = conn.execute("""
         SELECT
+            t.location_id,
             a.analyte_name,
             m.matrix_name,
-            CASE WHEN l.location_name LIKE '%Background%' THEN 'Background' ELSE 'Site' END as area,
-            r.result_value,
-            r.detect_flag
-        FROM fact_results r
-        JOIN fact_samples s ON r.sample_id = s.sample_id
-        LEFT JOIN dim_locations l ON s.location_id = l.location_id
-        LEFT JOIN dim_analytes a ON r.cas_rn = a.cas_rn
-        LEFT JOIN dim_matrix m ON s.matrix_code = m.matrix_code
-        WHERE r.detect_flag = 'Y'
+            t.n_samples,
+            t.n_detect,
+            t.first_date,
+            t.last_date,
+            t.mk_s,
+            ROUND(t.mk_p, 4) as mk_p,
+            t.sens_slope_per_year,
+            t.trend
+        FROM stat_trends t
+        LEFT JOIN dim_analytes a ON t.cas_rn = a.cas_rn
+        LEFT JOIN dim_matrix m ON t.matrix_code = m.matrix_code
+        WHERE t.trend <> 'Insufficient Data'
+        ORDER BY t.trend, t.mk_p, t.location_id, a.analyte_name
+    """).fetchdf()
+
+    mo.vstack([
+        mo.md(
+            f"**{len(trend_table)}** series: "
+            + ", ".join(f"{count} {label}" for label, count in trend_counts.items())
+        ),
+        mo.ui.table(trend_df),
+    ])
+    return trend_counts, trend_df, trend_table
+
+
+@app.cell
+def __(mo):
+    mo.md(
+        r"""
+        ## Background Comparison
+
+        Each exposure unit (`ref_exposure_units`) is compared with the
+        background locations (`dim_locations.location_role = 'Background'`)
+        of the same matrix. The one-sided tests ask whether site
+        concentrations exceed background: Gehan's generalized Wilcoxon
+        test when there are non-detects, Wilcoxon-Mann-Whitney otherwise.
+        Results are stored in `stat_background_comparison`.
+        """
     )
-    SELECT
-        analyte_name,
-        matrix_name,
-        area,
-        COUNT(*) as n,
-        MIN(result_value) as min_val,
-        MAX(result_value) as max_val,
-        ROUND(AVG(result_value), 4) as mean_val
-    FROM site_data
-    GROUP BY analyte_name, matrix_name, area
-    ORDER BY analyte_name, matrix_name, area
-    """
+    return
 
-    background_df = conn.execute(background_query).fetchdf()
-    mo.md("### Site vs Background Concentrations")
-    return background_df, background_query
+
+@app.cell
+def __(background, conn, duplicate_rule, duplicates, mo):
+    duplicates.ensure_statistics_results(conn, duplicate_rule)
+    comparison_table = background.materialize_background_comparison(conn)
+
+    background_df = conn.execute("""
+        SELECT
+            c.exposure_unit,
+            a.analyte_name,
+            m.matrix_name,
+            c.n_site,
+            c.n_site_detect,
+            c.n_background,
+            c.n_background_detect,
+            c.site_max_detect,
+            c.background_max_detect,
+            c.test_used,
+            ROUND(c.p_value, 4) as p_value,
+            c.conclusion
+        FROM stat_background_comparison c
+        LEFT JOIN dim_analytes a ON c.cas_rn = a.cas_rn
+        LEFT JOIN dim_matrix m ON c.matrix_code = m.matrix_code
+        ORDER BY c.exposure_unit, a.analyte_name, m.matrix_name
+    """).fetchdf()
+
+    n_above = int((comparison_table["conclusion"] == "Site > Background").sum())
+    mo.md(
+        f"### Site vs Background\n\n**{n_above}** of {len(comparison_table)} "
+        "exposure unit/analyte/matrix combinations exceed background (p < 0.05)"
+    )
+    return background_df, comparison_table, n_above
 
 
 @app.cell
@@ -482,6 +604,73 @@ def __(background_df, mo):
     return
 
 
+@app.cell
+def __(mo):
+    mo.md(
+        r"""
+        ## Background Threshold Values
+
+        UTL95-95, UPL95 and USL95 for every background analyte/matrix, with
+        normal (Kaplan-Meier with non-detects), gamma (Wilson-Hilferty),
+        lognormal and nonparametric variants. The BTV is the UTL95-95 for
+        the distribution the background detects fit, the nonparametric UTL
+        otherwise, or the maximum detect with fewer than four detects.
+        Stored in `ref_background_thresholds`.
+        """
+    )
+    return
+
+
+@app.cell
+def __(btv, conn, duplicate_rule, duplicates, mo):
+    duplicates.ensure_statistics_results(conn, duplicate_rule)
+    btv_table = btv.materialize_btvs(conn)
+
+    btv_df = conn.execute("""
+        SELECT
+            a.analyte_name,
+            m.matrix_name,
+            b.n_background,
+            b.n_detect,
+            b.gof_distribution,
+            b.utl95_95_normal,
+            b.utl95_95_gamma,
+            b.utl95_95_lognormal,
+            b.utl95_95_nonparametric,
+            b.upl95_nonparametric,
+            b.usl95_nonparametric,
+            b.btv,
+            b.btv_method,
+            b.result_unit
+        FROM ref_background_thresholds b
+        LEFT JOIN dim_analytes a ON b.cas_rn = a.cas_rn
+        LEFT JOIN dim_matrix m ON b.matrix_code = m.matrix_code
+        ORDER BY a.analyte_name, m.matrix_name
+    """).fetchdf()
+
+    # Residential exceedances that are also above background
+    above_btv_count = conn.execute("""
+        SELECT COUNT(*)
+        FROM scr_results r
+        JOIN dim_locations l ON r.location_id = l.location_id
+        JOIN ref_background_thresholds b
+            ON r.cas_rn = b.cas_rn AND r.matrix_code = b.matrix_code
+        WHERE r.scenario = 'Residential'
+          AND r.screening_status = 'EXCEEDS'
+          AND l.location_role = 'Site'
+          AND r.result_value > b.btv
+    """).fetchone()[0]
+
+    mo.vstack([
+        mo.md(
+            f"**{int(btv_table['btv'].notna().sum())}** background thresholds; "
+            f"**{above_btv_count}** residential site exceedances are also above background"
+        ),
+        mo.ui.table(btv_df),
+    ])
+    return above_btv_count, btv_df, btv_table
+
+
 @app.cell
 def __(mo):
     mo.md(
@@ -489,16 +678,17 @@ def __(mo):
         ## Notes on Statistical Methods
 
         ### ProUCL Software
-        For production ERA work, use **EPA's ProUCL software** for:
-        - Proper Kaplan-Meier estimates for censored data
-        - Regression on Order Statistics (ROS)
-        - Goodness-of-fit tests
-        - Appropriate UCL method selection
+        For production ERA work, confirm EPCs with **EPA's ProUCL software**,
+        the software of record for regulatory submissions.
 
         Download: https://www.epa.gov/land-research/proucl-software
 
         ### This Implementation
-        This notebook provides simplified calculations suitable for:
+        This notebook runs Kaplan-Meier, robust ROS, goodness-of-fit tests
+        (Shapiro-Wilk, Lilliefors, gamma Anderson-Darling) and a ProUCL-style
+        method decision tree for every analyte/matrix at once, and
+        Mann-Kendall/Sen's slope trend tests for every monitoring series,
+        suitable for:
         - Screening-level assessments
         - Data exploration
         - Preliminary risk evaluation
@@ -24,6 +24,8 @@ def __(mo):
         - Table 3: Screening Level Comparison
         - Table 4: COPC Summary
         - Table 5: Exposure Point Concentrations
+        - Table 6: Ecological Screening
+        - Table 7: Excess Lifetime Cancer Risk
         """
     )
     return
@@ -51,6 +53,16 @@ def __(Path, duckdb):
     return DB_PATH, OUTPUT_DIR, PROJECT_ROOT, conn
 
 
+@app.cell
+def __(PROJECT_ROOT):
+    # Shared ERA computations live in the project-level era package
+    import sys
+    sys.path.insert(0, str(PROJECT_ROOT))
+    from era import duplicates, groundwater, interpolation, plume, screening, ucl
+    from era.db import table_exists
+    return duplicates, groundwater, interpolation, plume, screening, sys, table_exists, ucl
+
+
 @app.cell
 def __(mo):
     mo.md("## Report Configuration")
@@ -98,12 +110,13 @@ def __(
     conn,
     generate_btn,
     mo,
-    np,
     pd,
     report_date,
+    screening,
     site_name,
-    stats,
+    table_exists,
     today,
+    ucl,
 ):
     mo.stop(not generate_btn.value)
 
@@ -200,14 +213,14 @@ def __(
         COUNT(*) as "N Samples",
         SUM(CASE WHEN r.detect_flag = 'Y' THEN 1 ELSE 0 END) as "N Detect",
         ROUND(100.0 * SUM(CASE WHEN r.detect_flag = 'Y' THEN 1 ELSE 0 END) / COUNT(*), 1) as "Detect %",
-        MIN(CASE WHEN r.detect_flag = 'Y' THEN r.result_value END) as "Min",
-        MAX(CASE WHEN r.detect_flag = 'Y' THEN r.result_value END) as "Max",
-        r.result_unit as "Unit"
+        MIN(CASE WHEN r.detect_flag = 'Y' THEN r.result_value_norm END) as "Min",
+        MAX(CASE WHEN r.detect_flag = 'Y' THEN r.result_value_norm END) as "Max",
+        r.result_unit_norm as "Unit"
     FROM fact_results r
     JOIN fact_samples s ON r.sample_id = s.sample_id
     LEFT JOIN dim_analytes a ON r.cas_rn = a.cas_rn
     LEFT JOIN dim_matrix m ON s.matrix_code = m.matrix_code
-    GROUP BY a.analyte_name, a.analyte_group, m.matrix_name, r.result_unit
+    GROUP BY a.analyte_name, a.analyte_group, m.matrix_name, r.result_unit_norm
     HAVING SUM(CASE WHEN r.detect_flag = 'Y' THEN 1 ELSE 0 END) > 0
     ORDER BY a.analyte_group, a.analyte_name
     """
@@ -231,19 +244,19 @@ def __(
     SELECT
         a.analyte_name as "Analyte",
         m.matrix_name as "Matrix",
-        MAX(r.result_value) as "Max Conc",
-        r.result_unit as "Unit",
+        MAX(r.result_value_norm) as "Max Conc",
+        r.result_unit_norm as "Unit",
         CASE s.matrix_code
             WHEN 'SO' THEN sl.rsl_residential_soil_mg_kg
             WHEN 'GW' THEN sl.rsl_residential_tap_ug_l
         END as "RSL",
-        ROUND(MAX(r.result_value) / NULLIF(
+        ROUND(MAX(r.result_value_norm) / NULLIF(
             CASE s.matrix_code
                 WHEN 'SO' THEN sl.rsl_residential_soil_mg_kg
                 WHEN 'GW' THEN sl.rsl_residential_tap_ug_l
             END, 0), 2) as "HQ",
         CASE
-            WHEN MAX(r.result_value) > CASE s.matrix_code
+            WHEN MAX(r.result_value_norm) > CASE s.matrix_code
                 WHEN 'SO' THEN sl.rsl_residential_soil_mg_kg
                 WHEN 'GW' THEN sl.rsl_residential_tap_ug_l
             END THEN 'EXCEEDS'
@@ -257,14 +270,14 @@ def __(
     LEFT JOIN ref_screening_levels sl ON r.cas_rn = sl.cas_rn
     WHERE r.detect_flag = 'Y'
     AND sl.cas_rn IS NOT NULL
-    GROUP BY a.analyte_name, m.matrix_name, s.matrix_code, r.result_unit,
+    GROUP BY a.analyte_name, m.matrix_name, s.matrix_code, r.result_unit_norm,
              sl.rsl_residential_soil_mg_kg, sl.rsl_residential_tap_ug_l, sl.carcinogen
     ORDER BY
-        CASE WHEN MAX(r.result_value) > CASE s.matrix_code
+        CASE WHEN MAX(r.result_value_norm) > CASE s.matrix_code
             WHEN 'SO' THEN sl.rsl_residential_soil_mg_kg
             WHEN 'GW' THEN sl.rsl_residential_tap_ug_l
         END THEN 0 ELSE 1 END,
-        MAX(r.result_value) / NULLIF(CASE s.matrix_code
+        MAX(r.result_value_norm) / NULLIF(CASE s.matrix_code
             WHEN 'SO' THEN sl.rsl_residential_soil_mg_kg
             WHEN 'GW' THEN sl.rsl_residential_tap_ug_l
         END, 0) DESC
@@ -295,12 +308,12 @@ def __(
         a.analyte_group as "Group",
         m.matrix_name as "Matrix",
         COUNT(*) as "N Exceed",
-        MAX(r.result_value) as "Max Conc",
+        MAX(r.result_value_norm) as "Max Conc",
         CASE s.matrix_code
             WHEN 'SO' THEN sl.rsl_residential_soil_mg_kg
             WHEN 'GW' THEN sl.rsl_residential_tap_ug_l
         END as "RSL",
-        ROUND(MAX(r.result_value) / NULLIF(
+        ROUND(MAX(r.result_value_norm) / NULLIF(
             CASE s.matrix_code
                 WHEN 'SO' THEN sl.rsl_residential_soil_mg_kg
                 WHEN 'GW' THEN sl.rsl_residential_tap_ug_l
@@ -313,13 +326,13 @@ def __(
     LEFT JOIN dim_matrix m ON s.matrix_code = m.matrix_code
     LEFT JOIN ref_screening_levels sl ON r.cas_rn = sl.cas_rn
     WHERE r.detect_flag = 'Y'
-    AND r.result_value > CASE s.matrix_code
+    AND r.result_value_norm > CASE s.matrix_code
         WHEN 'SO' THEN sl.rsl_residential_soil_mg_kg
         WHEN 'GW' THEN sl.rsl_residential_tap_ug_l
     END
     GROUP BY a.analyte_name, a.analyte_group, m.matrix_name, s.matrix_code,
              sl.rsl_residential_soil_mg_kg, sl.rsl_residential_tap_ug_l, sl.carcinogen, sl.target_organ
-    ORDER BY MAX(r.result_value) / NULLIF(CASE s.matrix_code
+    ORDER BY MAX(r.result_value_norm) / NULLIF(CASE s.matrix_code
         WHEN 'SO' THEN sl.rsl_residential_soil_mg_kg
         WHEN 'GW' THEN sl.rsl_residential_tap_ug_l
     END, 0) DESC
@@ -335,76 +348,29 @@ def __(
     auto_width(ws4)
 
     # ========================================
-    # Table 5: EPCs (calculated inline)
+    # Table 5: EPCs (vectorized UCL engine)
     # ========================================
     ws5 = wb.create_sheet("Table 5 - EPCs")
     start_row = add_title(ws5, "Table 5: Exposure Point Concentrations", site_name.value, report_date.value)
 
-    # Get raw data for EPC calculation
-    epc_raw_query = """
-    SELECT
-        a.analyte_name,
-        m.matrix_name,
-        r.cas_rn,
-        s.matrix_code,
-        r.result_value,
-        r.detection_limit,
-        r.detect_flag,
-        r.result_unit,
-        CASE s.matrix_code
-            WHEN 'SO' THEN sl.rsl_residential_soil_mg_kg
-            WHEN 'GW' THEN sl.rsl_residential_tap_ug_l
-        END as screening_level
-    FROM fact_results r
-    JOIN fact_samples s ON r.sample_id = s.sample_id
-    LEFT JOIN dim_analytes a ON r.cas_rn = a.cas_rn
-    LEFT JOIN dim_matrix m ON s.matrix_code = m.matrix_code
-    LEFT JOIN ref_screening_levels sl ON r.cas_rn = sl.cas_rn
-    WHERE r.detect_flag = 'Y'  -- Only detects for EPC
-    ORDER BY a.analyte_name, s.matrix_code
-    """
-    epc_raw = conn.execute(epc_raw_query).fetchdf()
-
-    # Calculate EPCs
-    epc_results = []
-    for (cas, matrix), group in epc_raw.groupby(['cas_rn', 'matrix_code']):
-        analyte = group['analyte_name'].iloc[0]
-        matrix_nm = group['matrix_name'].iloc[0]
-        unit = group['result_unit'].iloc[0]
-        sl_val = group['screening_level'].iloc[0]
-
-        vals = group['result_value'].values
-        n = len(vals)
-
-        if n >= 4:
-            mean_v = np.mean(vals)
-            std_v = np.std(vals, ddof=1)
-            se = std_v / np.sqrt(n)
-            t_crit = stats.t.ppf(0.95, n - 1)
-            epc = mean_v + t_crit * se
-            method = "95% UCL (t)"
-        elif n > 0:
-            epc = np.max(vals)
-            method = "Maximum"
-        else:
-            continue
-
-        hq = epc / sl_val if sl_val else None
-
-        epc_results.append({
-            'Analyte': analyte,
-            'Matrix': matrix_nm,
-            'N': n,
-            'Mean': round(np.mean(vals), 4),
-            'Max': round(np.max(vals), 4),
-            'EPC': round(epc, 4),
-            'Unit': unit,
-            'Method': method,
-            'RSL': sl_val,
-            'HQ': round(hq, 2) if hq else None
-        })
-
-    epc_df = pd.DataFrame(epc_results)
+    # EPCs for every analyte/matrix group with detects, from the shared UCL engine
+    epc_table, epc_cache_hits, epc_cache_misses = ucl.materialize_epcs(conn)
+    epc_rows = epc_table[epc_table['n_detect'] > 0].sort_values(['analyte_name', 'matrix_code'])
+
+    epc_df = pd.DataFrame({
+        'Analyte': epc_rows['analyte_name'],
+        'Matrix': epc_rows['matrix_name'],
+        'N': epc_rows['n_total'],
+        'Mean': epc_rows['mean_detect'].round(4),
+        'Max': epc_rows['max_detect'].round(4),
+        'EPC': epc_rows['epc'].round(4),
+        'Unit': epc_rows['result_unit'],
+        'Method': epc_rows['method'],
+        'RSL': epc_rows['screening_level'],
+        'HQ': epc_rows['hazard_quotient'].round(2),
+    })
+    # NaN cells (missing RSL/HQ) are written as blanks
+    epc_df = epc_df.astype(object).where(epc_df.notna(), None)
 
     if len(epc_df) > 0:
         for r_idx, row in enumerate(dataframe_to_rows(epc_df, index=False, header=True), start_row):
@@ -419,6 +385,80 @@ def __(
         style_header(ws5, start_row)
     auto_width(ws5)
 
+    # ========================================
+    # Table 6: Ecological Screening (precomputed)
+    # ========================================
+    ws6 = wb.create_sheet("Table 6 - Eco Screening")
+    start_row = add_title(ws6, "Table 6: Ecological Receptor Hazard Index", site_name.value, report_date.value)
+
+    if not table_exists(conn, "scr_eco_hi"):
+        screening.materialize_eco_screening(conn)
+
+    eco_query = """
+    SELECT
+        h.location_id as "Location",
+        m.matrix_name as "Matrix",
+        h.receptor as "Receptor",
+        h.analyte_count as "N Analytes",
+        h.hazard_index as "HI",
+        a.analyte_name as "Dominant Analyte",
+        h.status as "Status"
+    FROM scr_eco_hi h
+    LEFT JOIN dim_matrix m ON h.matrix_code = m.matrix_code
+    LEFT JOIN dim_analytes a ON h.dominant_cas_rn = a.cas_rn
+    ORDER BY h.location_id, m.matrix_name, h.receptor
+    """
+    eco_df = conn.execute(eco_query).fetchdf()
+
+    for r_idx, row in enumerate(dataframe_to_rows(eco_df, index=False, header=True), start_row):
+        for c_idx, value in enumerate(row, 1):
+            cell = ws6.cell(row=r_idx, column=c_idx, value=value)
+            cell.border = thin_border
+            # Highlight HI > 1
+            if c_idx == 7 and value == 'EXCEEDS HI=1':
+                for c in range(1, 8):
+                    ws6.cell(row=r_idx, column=c).fill = exceed_fill
+
+    style_header(ws6, start_row)
+    auto_width(ws6)
+
+    # ========================================
+    # Table 7: Cumulative Cancer Risk (precomputed)
+    # ========================================
+    ws7 = wb.create_sheet("Table 7 - Cancer Risk")
+    start_row = add_title(ws7, "Table 7: Cumulative Excess Lifetime Cancer Risk", site_name.value, report_date.value)
+
+    if not table_exists(conn, "scr_cancer_risk_cumulative"):
+        screening.materialize_cancer_risk(conn)
+
+    elcr_query = """
+    SELECT
+        c.location_id as "Location",
+        m.matrix_name as "Matrix",
+        c.scenario as "Scenario",
+        c.carcinogen_count as "N Carcinogens",
+        c.cumulative_elcr as "Cumulative ELCR",
+        a.analyte_name as "Dominant Analyte",
+        c.risk_range as "Risk Range"
+    FROM scr_cancer_risk_cumulative c
+    LEFT JOIN dim_matrix m ON c.matrix_code = m.matrix_code
+    LEFT JOIN dim_analytes a ON c.dominant_cas_rn = a.cas_rn
+    ORDER BY c.scenario, c.cumulative_elcr DESC
+    """
+    elcr_df = conn.execute(elcr_query).fetchdf()
+
+    for r_idx, row in enumerate(dataframe_to_rows(elcr_df, index=False, header=True), start_row):
+        for c_idx, value in enumerate(row, 1):
+            cell = ws7.cell(row=r_idx, column=c_idx, value=value)
+            cell.border = thin_border
+            # Highlight risks above the 1E-04 upper bound
+            if c_idx == 7 and value == 'Above 1E-04':
+                for c in range(1, 8):
+                    ws7.cell(row=r_idx, column=c).fill = exceed_fill
+
+    style_header(ws7, start_row)
+    auto_width(ws7)
+
     # ========================================
     # Save workbook
     # ========================================
@@ -437,6 +477,9 @@ def __(
     3. **Screening Comparison** - {len(screening_df)} comparisons
     4. **COPC Summary** - {len(copc_df)} COPCs identified
     5. **Exposure Point Concentrations** - {len(epc_df)} EPCs calculated
+       ({epc_cache_hits} from the statistics cache, {epc_cache_misses} recomputed)
+    6. **Ecological Screening** - {len(eco_df)} receptor hazard indices
+    7. **Cancer Risk** - {len(elcr_df)} cumulative ELCR estimates
 
     Yellow highlighting indicates exceedances of screening levels.
     """)
@@ -448,32 +491,27 @@ def __(
         Side,
         Workbook,
         add_title,
-        analyte,
         auto_width,
         c,
         c_idx,
-        cas,
         cell,
         copc_df,
         copc_query,
         dataframe_to_rows,
         detection_df,
         detection_query,
-        epc,
+        epc_cache_hits,
+        epc_cache_misses,
         epc_df,
-        epc_raw,
-        epc_raw_query,
-        epc_results,
+        epc_rows,
+        epc_table,
+        eco_df,
+        eco_query,
+        elcr_df,
+        elcr_query,
         exceed_fill,
-        group,
         header_fill,
         header_font,
-        hq,
-        matrix,
-        matrix_nm,
-        mean_v,
-        method,
-        n,
         output_file,
         r_idx,
         row,
@@ -481,16 +519,10 @@ def __(
         sample_query,
         screening_df,
         screening_query,
-        se,
-        sl_val,
         start_row,
-        std_v,
         style_header,
-        t_crit,
         thin_border,
         title_font,
-        unit,
-        vals,
         value,
         wb,
         ws1,
@@ -498,6 +530,8 @@ def __(
         ws3,
         ws4,
         ws5,
+        ws6,
+        ws7,
     )
 
 
@@ -526,6 +560,165 @@ def __(OUTPUT_DIR, generate_btn, mo, pd, today):
     return df, output_path, preview_data, sheet_name, tabs
 
 
+@app.cell
+def __(mo):
+    mo.md(
+        r"""
+        ## Concentration Grids
+
+        Groundwater concentration grids for one analyte and sampling event
+        (`era.interpolation`): inverse distance weighting over the nearest
+        wells, or ordinary kriging with a fitted variogram. Non-detects enter
+        at 1/2 DL. Grids are cached in `stat_interpolation_grids` /
+        `stat_interpolation_cells` and reused until the results or
+        parameters change.
+        """
+    )
+    return
+
+
+@app.cell
+def __(conn, duplicates, interpolation, mo):
+    duplicates.ensure_statistics_results(conn)
+    grid_analytes = conn.execute("""
+        SELECT DISTINCT a.analyte_name, r.cas_rn
+        FROM stat_results r
+        JOIN dim_analytes a ON r.cas_rn = a.cas_rn
+        WHERE r.matrix_code = 'GW'
+        ORDER BY a.analyte_name
+    """).fetchdf()
+    grid_analyte = mo.ui.dropdown(
+        options=dict(zip(grid_analytes["analyte_name"], grid_analytes["cas_rn"])),
+        value=grid_analytes["analyte_name"].iloc[0] if len(grid_analytes) else None,
+        label="Analyte:"
+    )
+    grid_method = mo.ui.dropdown(
+        options=list(interpolation.INTERPOLATION_METHODS),
+        value="idw",
+        label="Method:"
+    )
+    mo.hstack([grid_analyte, grid_method])
+    return grid_analyte, grid_analytes, grid_method
+
+
+@app.cell
+def __(conn, grid_analyte, interpolation, mo):
+    grid_points = (
+        interpolation.load_event_points(conn, grid_analyte.value)
+        if grid_analyte.value else None
+    )
+    grid_events = [] if grid_points is None else sorted(
+        str(d)[:10] for d in grid_points["sample_date"].unique()
+    )
+    grid_event = mo.ui.dropdown(
+        options=grid_events,
+        value=grid_events[-1] if grid_events else None,
+        label="Event:"
+    )
+    grid_event
+    return grid_event, grid_events, grid_points
+
+
+@app.cell
+def __(conn, grid_analyte, grid_event, grid_method, grid_points, interpolation, mo):
+    grid_result = None
+    if grid_event.value:
+        grid_result = interpolation.interpolation_grid(
+            conn, grid_analyte.value, grid_event.value, method=grid_method.value, points=grid_points
+        )
+
+    if grid_result is None:
+        grid_output = mo.md(
+            f"_Fewer than {interpolation.MIN_POINTS} locations sampled for this analyte and event_"
+        )
+    else:
+        grid_info, grid_cells = grid_result
+        # North at the top, estimates rounded for display
+        grid_map = grid_cells.pivot(index="row_index", columns="col_index", values="estimate")
+        grid_map.columns = [f"col {c}" for c in grid_map.columns]
+        grid_output = mo.vstack([
+            mo.md(
+                f"**{grid_info['n_rows']} x {grid_info['n_cols']}** nodes at "
+                f"{grid_info['cell_size_ft']:.1f} ft from {grid_info['n_points']} locations"
+            ),
+            mo.ui.table(grid_map.iloc[::-1].round(3).reset_index(drop=True)),
+        ])
+    grid_output
+    return grid_output, grid_result
+
+
+@app.cell
+def __(mo):
+    mo.md(
+        r"""
+        ## Plume Area and Mass
+
+        Area and dissolved mass above the tap water RSL for every groundwater
+        event, integrated over the cached IDW grids (`era.plume`; 10 ft
+        saturated thickness, 0.25 effective porosity), and the Mann-Kendall
+        trend of each across events. Stored as `stat_plume_metrics` and
+        `stat_plume_stability`.
+        """
+    )
+    return
+
+
+@app.cell
+def __(conn, mo, plume):
+    plume_metrics, plume_stability = plume.materialize_plume_metrics(conn)
+    if len(plume_metrics):
+        plume_output = mo.vstack([
+            mo.ui.table(plume_stability.round(4)),
+            mo.ui.table(plume_metrics[[
+                "cas_rn", "sample_date", "n_points", "screening_level", "plume_area_acres",
+                "plume_mass_kg", "max_estimate",
+            ]].round({"plume_area_acres": 3, "plume_mass_kg": 4, "max_estimate": 3})),
+        ])
+    else:
+        plume_output = mo.md("_No groundwater events with enough locations to grid_")
+    plume_output
+    return plume_metrics, plume_output, plume_stability
+
+
+@app.cell
+def __(mo):
+    mo.md(
+        r"""
+        ## Groundwater Flow
+
+        Groundwater elevation (well elevation less depth to water) and the
+        hydraulic gradient and flow direction of every event, from a
+        least-squares plane through the event's wells (`era.groundwater`,
+        cached in `stat_gw_gradients`), and the IDW potentiometric surface of
+        the latest event.
+        """
+    )
+    return
+
+
+@app.cell
+def __(conn, groundwater, mo):
+    gw_gradients = groundwater.gradient_history(conn)
+    if len(gw_gradients):
+        gw_surface = groundwater.potentiometric_surface(conn, gw_gradients["sample_date"].iloc[-1])
+        gw_tables = [mo.ui.table(gw_gradients[[
+            "sample_date", "n_wells", "mean_gw_elevation_ft", "gradient_ft_per_ft", "flow_azimuth_deg",
+            "flow_direction", "r_squared",
+        ]].round({"mean_gw_elevation_ft": 2, "gradient_ft_per_ft": 5, "flow_azimuth_deg": 1, "r_squared": 3}))]
+        if gw_surface is not None:
+            gw_map = gw_surface[1].pivot(index="row_index", columns="col_index", values="estimate")
+            gw_map.columns = [f"col {c}" for c in gw_map.columns]
+            gw_tables += [
+                mo.md(f"#### Potentiometric Surface ({gw_gradients['sample_date'].iloc[-1]:%Y-%m-%d}, ft)"),
+                mo.ui.table(gw_map.iloc[::-1].round(2).reset_index(drop=True)),
+            ]
+        gw_output = mo.vstack(gw_tables)
+    else:
+        gw_output = mo.md("_No depth-to-water measurements loaded_")
+    gw_output
+    return gw_gradients, gw_output
+
+
 @app.cell
 def __(mo):
     mo.md(
@@ -12,6 +12,7 @@ Usage:
 """
 
 from pathlib import Path
+import sys
 
 try:
     import duckdb
@@ -20,6 +21,10 @@ except ImportError:
     exit(1)
 
 PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from era import groundwater, screening, units
+from era.db import table_exists
 DB_PATH = PROJECT_ROOT / "data" / "processed" / "analytics.duckdb"
 DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 
@@ -222,7 +227,8 @@ def main():
             screen_top_ft DECIMAL(6,2),
             screen_bottom_ft DECIMAL(6,2),
             install_date DATE,
-            status VARCHAR DEFAULT 'Active'
+            status VARCHAR DEFAULT 'Active',
+            location_role VARCHAR DEFAULT 'Site'
         )
     """)
     print("  Created: dim_locations")
@@ -242,7 +248,8 @@ def main():
             sampler_name VARCHAR,
             field_notes TEXT,
             lab_name VARCHAR,
-            lab_sample_id VARCHAR
+            lab_sample_id VARCHAR,
+            parent_sample_id VARCHAR
         )
     """)
     print("  Created: fact_samples")
@@ -268,11 +275,22 @@ def main():
             percent_moisture DECIMAL(5,2),
             validation_qualifier VARCHAR(10),
             validated_by VARCHAR,
-            validation_date DATE
+            validation_date DATE,
+            result_value_norm DOUBLE,
+            detection_limit_norm DOUBLE,
+            result_unit_norm VARCHAR
         )
     """)
     print("  Created: fact_results")
 
+    # Create fact_field_measurements table
+    groundwater.ensure_field_measurements(conn)
+    print("  Created: fact_field_measurements")
+
+    # Unit dimension and conversion table used to normalize results
+    units.ensure_unit_tables(conn)
+    print("  Created: dim_units, ref_matrix_units, ref_unit_conversions")
+
     # Insert RSL data
     print("\nLoading EPA Regional Screening Levels...")
 
@@ -292,6 +310,17 @@ def main():
 
     print(f"  Loaded {len(RSL_DATA)} screening levels")
 
+    # Version the criteria so past screening can be reproduced as-of sample date
+    versions = screening.record_criteria_history(conn)
+    print(f"  Recorded {versions} criteria versions in history")
+
+    # Re-screen only the analytes whose criteria changed in this release
+    if table_exists(conn, "scr_results"):
+        change = screening.rescreen_changed_criteria(conn)
+        print(f"  Re-screened {change['rescreened_results']} results for "
+              f"{change['changed_analytes']} changed analytes: "
+              f"{change['new_exceedances']} new / {change['cleared_exceedances']} cleared exceedances")
+
     # Verify
     count = conn.execute("SELECT COUNT(*) FROM ref_screening_levels").fetchone()[0]
     print(f"\nVerification:")
@@ -306,6 +335,9 @@ def main():
     count = conn.execute("SELECT COUNT(*) FROM dim_qualifiers").fetchone()[0]
     print(f"  dim_qualifiers: {count} records")
 
+    count = conn.execute("SELECT COUNT(*) FROM ref_unit_conversions").fetchone()[0]
+    print(f"  ref_unit_conversions: {count} records")
+
     conn.close()
 
     print("-" * 50)
@@ -31,17 +31,17 @@ SITE_NAME = "Former Manufacturing Facility"
 # Monitoring locations
 LOCATIONS = [
     # Monitoring Wells (groundwater)
-    {"id": "MW-01", "name": "Monitoring Well 01", "type": "MW", "lat": 40.7128, "lon": -74.0060, "depth": 35},
-    {"id": "MW-02", "name": "Monitoring Well 02", "type": "MW", "lat": 40.7130, "lon": -74.0058, "depth": 40},
-    {"id": "MW-03", "name": "Monitoring Well 03", "type": "MW", "lat": 40.7125, "lon": -74.0062, "depth": 32},
-    {"id": "MW-04", "name": "Monitoring Well 04", "type": "MW", "lat": 40.7132, "lon": -74.0055, "depth": 38},
-    {"id": "MW-05", "name": "Monitoring Well 05 (Background)", "type": "MW", "lat": 40.7140, "lon": -74.0070, "depth": 30},
+    {"id": "MW-01", "name": "Monitoring Well 01", "type": "MW", "lat": 40.7128, "lon": -74.0060, "depth": 35, "role": "Site", "exposure_unit": "EU-1"},
+    {"id": "MW-02", "name": "Monitoring Well 02", "type": "MW", "lat": 40.7130, "lon": -74.0058, "depth": 40, "role": "Site", "exposure_unit": "EU-1"},
+    {"id": "MW-03", "name": "Monitoring Well 03", "type": "MW", "lat": 40.7125, "lon": -74.0062, "depth": 32, "role": "Site", "exposure_unit": "EU-2"},
+    {"id": "MW-04", "name": "Monitoring Well 04", "type": "MW", "lat": 40.7132, "lon": -74.0055, "depth": 38, "role": "Site", "exposure_unit": "EU-2"},
+    {"id": "MW-05", "name": "Monitoring Well 05 (Background)", "type": "MW", "lat": 40.7140, "lon": -74.0070, "depth": 30, "role": "Background", "exposure_unit": None},
     # Soil Borings
-    {"id": "SB-01", "name": "Soil Boring 01", "type": "SB", "lat": 40.7127, "lon": -74.0059, "depth": 20},
-    {"id": "SB-02", "name": "Soil Boring 02", "type": "SB", "lat": 40.7129, "lon": -74.0057, "depth": 15},
-    {"id": "SB-03", "name": "Soil Boring 03", "type": "SB", "lat": 40.7126, "lon": -74.0061, "depth": 18},
-    {"id": "SB-04", "name": "Soil Boring 04", "type": "SB", "lat": 40.7131, "lon": -74.0056, "depth": 22},
-    {"id": "SB-05", "name": "Soil Boring 05 (Background)", "type": "SB", "lat": 40.7142, "lon": -74.0068, "depth": 12},
+    {"id": "SB-01", "name": "Soil Boring 01", "type": "SB", "lat": 40.7127, "lon": -74.0059, "depth": 20, "role": "Site", "exposure_unit": "EU-1"},
+    {"id": "SB-02", "name": "Soil Boring 02", "type": "SB", "lat": 40.7129, "lon": -74.0057, "depth": 15, "role": "Site", "exposure_unit": "EU-1"},
+    {"id": "SB-03", "name": "Soil Boring 03", "type": "SB", "lat": 40.7126, "lon": -74.0061, "depth": 18, "role": "Site", "exposure_unit": "EU-2"},
+    {"id": "SB-04", "name": "Soil Boring 04", "type": "SB", "lat": 40.7131, "lon": -74.0056, "depth": 22, "role": "Site", "exposure_unit": "EU-2"},
+    {"id": "SB-05", "name": "Soil Boring 05 (Background)", "type": "SB", "lat": 40.7142, "lon": -74.0068, "depth": 12, "role": "Background", "exposure_unit": None},
 ]
 
 # Analytes to test (CAS, name, detection_limit, unit, typical_range, contamination_factor)
@@ -160,7 +160,8 @@ def create_locations_excel():
     ws.title = "Locations"
 
     headers = ["location_id", "location_name", "location_type", "latitude", "longitude",
-               "elevation_ft", "total_depth_ft", "install_date", "status"]
+               "elevation_ft", "total_depth_ft", "install_date", "status", "location_role",
+               "exposure_unit"]
 
     header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
     header_font = Font(bold=True, color="FFFFFF")
@@ -180,6 +181,8 @@ def create_locations_excel():
         ws.cell(row=row, column=7, value=loc["depth"])
         ws.cell(row=row, column=8, value="2023-06-15")
         ws.cell(row=row, column=9, value="Active")
+        ws.cell(row=row, column=10, value=loc["role"])
+        ws.cell(row=row, column=11, value=loc["exposure_unit"])
 
     # Adjust column widths
     for col in ws.columns:
@@ -230,7 +233,7 @@ def create_lab_results_excel():
     for event_date in SAMPLE_EVENTS:
         for loc in LOCATIONS:
             # Determine if this is a contaminated location (not background)
-            is_contaminated = "Background" not in loc["name"]
+            is_contaminated = loc["role"] != "Background"
 
             # Determine matrix and analytes based on location type
             if loc["type"] == "MW":
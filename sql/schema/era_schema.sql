@@ -19,7 +19,8 @@ CREATE TABLE IF NOT EXISTS dim_locations (
     screen_top_ft DECIMAL(6,2),     -- For wells
     screen_bottom_ft DECIMAL(6,2),
     install_date DATE,
-    status VARCHAR DEFAULT 'Active' -- Active, Abandoned, Destroyed
+    status VARCHAR DEFAULT 'Active', -- Active, Abandoned, Destroyed
+    location_role VARCHAR DEFAULT 'Site' -- Site, Background
 );
 
 -- Analytes/Parameters (chemicals being tested)
@@ -73,6 +74,14 @@ INSERT OR REPLACE INTO dim_qualifiers VALUES
     ('E', 'Exceeded Cal', 'Result exceeded calibration range', TRUE, 'Detected'),
     ('D', 'Diluted', 'Sample was diluted', TRUE, 'Detected');
 
+-- Units of measure (populated by era/units.py)
+CREATE TABLE IF NOT EXISTS dim_units (
+    unit_code VARCHAR PRIMARY KEY,
+    unit_name VARCHAR,
+    dimension VARCHAR,              -- mass/mass, mass/volume, mass/air
+    to_base_factor DOUBLE           -- Multiply to get mg/kg, ug/L or ug/m3
+);
+
 -- ============================================
 -- REFERENCE DATA TABLES
 -- ============================================
@@ -96,6 +105,46 @@ CREATE TABLE IF NOT EXISTS ref_screening_levels (
     PRIMARY KEY (cas_rn)
 );
 
+-- Site locations grouped into exposure units (unassigned site locations
+-- form the 'Site' unit; see era/background.py)
+CREATE TABLE IF NOT EXISTS ref_exposure_units (
+    location_id VARCHAR PRIMARY KEY,
+    exposure_unit VARCHAR NOT NULL
+);
+
+-- Unit that screening levels are expressed in, per matrix
+CREATE TABLE IF NOT EXISTS ref_matrix_units (
+    matrix_code VARCHAR PRIMARY KEY,
+    screening_unit VARCHAR
+);
+
+-- Pairwise unit conversions within a dimension (derived from dim_units)
+CREATE TABLE IF NOT EXISTS ref_unit_conversions (
+    from_unit VARCHAR,
+    to_unit VARCHAR,
+    factor DOUBLE
+);
+
+-- Versioned screening levels (maintained by era/screening.py)
+-- Each row is valid for sample dates in [valid_from, valid_to)
+CREATE TABLE IF NOT EXISTS ref_screening_levels_history (
+    cas_rn VARCHAR,
+    analyte_name VARCHAR,
+    rsl_residential_soil_mg_kg DECIMAL(15,6),
+    rsl_industrial_soil_mg_kg DECIMAL(15,6),
+    rsl_residential_tap_ug_l DECIMAL(15,6),
+    rsl_mcl_ug_l DECIMAL(15,6),
+    eco_ssl_plants_mg_kg DECIMAL(15,6),
+    eco_ssl_soil_inverts_mg_kg DECIMAL(15,6),
+    eco_ssl_avian_mg_kg DECIMAL(15,6),
+    eco_ssl_mammalian_mg_kg DECIMAL(15,6),
+    carcinogen VARCHAR,
+    target_organ VARCHAR,
+    update_date DATE,
+    valid_from DATE,                          -- '-infinity' for the first recorded version
+    valid_to DATE                             -- 'infinity' for the current version
+);
+
 -- ============================================
 -- FACT TABLES
 -- ============================================
@@ -114,7 +163,8 @@ CREATE TABLE IF NOT EXISTS fact_samples (
     sampler_name VARCHAR,
     field_notes TEXT,
     lab_name VARCHAR,
-    lab_sample_id VARCHAR
+    lab_sample_id VARCHAR,
+    parent_sample_id VARCHAR          -- FD only: the normal sample it duplicates (else inferred)
 );
 
 -- Analytical results (core fact table)
@@ -137,20 +187,419 @@ CREATE TABLE IF NOT EXISTS fact_results (
     percent_moisture DECIMAL(5,2),
     validation_qualifier VARCHAR(10),
     validated_by VARCHAR,
-    validation_date DATE
+    validation_date DATE,
+    result_value_norm DOUBLE,            -- result_value in the matrix screening unit
+    detection_limit_norm DOUBLE,
+    result_unit_norm VARCHAR             -- NULL when the reported unit can't be converted
 );
 
 -- Field measurements (pH, conductivity, turbidity, etc.)
 CREATE TABLE IF NOT EXISTS fact_field_measurements (
     measurement_id INTEGER PRIMARY KEY,
-    sample_id VARCHAR REFERENCES fact_samples(sample_id),
-    parameter_code VARCHAR,
+    sample_id VARCHAR REFERENCES fact_samples(sample_id),  -- NULL when not tied to a lab sample
+    parameter_code VARCHAR,              -- PH, SC, TEMP, DO, ORP, TURB, DTW
     parameter_name VARCHAR,
     result_value DECIMAL(12,4),
     result_unit VARCHAR,
     measurement_time TIME,
     instrument_id VARCHAR,
-    notes TEXT
+    notes TEXT,
+    location_id VARCHAR,
+    measurement_date DATE
+);
+
+-- ============================================
+-- MATERIALIZED SCREENING TABLES
+-- Maintained by era/screening.py after ingest
+-- ============================================
+
+-- Analyte-to-target-organ bridge (multi-organ entries split into rows)
+CREATE TABLE IF NOT EXISTS ref_analyte_organs (
+    cas_rn VARCHAR,
+    target_organ VARCHAR
+);
+
+-- Hazard index cube by location, matrix, organ and land-use scenario
+CREATE TABLE IF NOT EXISTS scr_hazard_index (
+    location_id VARCHAR,
+    matrix_code VARCHAR,
+    target_organ VARCHAR,
+    scenario VARCHAR,               -- Residential, Industrial/Commercial
+    analyte_count INTEGER,
+    hazard_index DOUBLE,            -- Sum of max HQ per analyte at the location
+    max_hq DOUBLE,
+    dominant_cas_rn VARCHAR,
+    status VARCHAR
+);
+
+-- Per-result human-health screening for every land-use scenario
+CREATE TABLE IF NOT EXISTS scr_results (
+    result_id INTEGER,
+    location_id VARCHAR,
+    sample_date DATE,
+    matrix_code VARCHAR,
+    cas_rn VARCHAR,
+    scenario VARCHAR,
+    result_value DOUBLE,
+    screening_level DECIMAL(15,6),
+    hazard_quotient DOUBLE,
+    screening_status VARCHAR
+);
+
+-- Criteria fingerprint per analyte last used to build scr_results
+CREATE TABLE IF NOT EXISTS scr_results_criteria (
+    cas_rn VARCHAR,
+    criteria_hash UBIGINT
+);
+
+-- New and cleared exceedances caused by criteria changes
+CREATE TABLE IF NOT EXISTS scr_criteria_changes (
+    detected_at TIMESTAMP,
+    result_id INTEGER,
+    location_id VARCHAR,
+    sample_date DATE,
+    matrix_code VARCHAR,
+    cas_rn VARCHAR,
+    scenario VARCHAR,
+    result_value DOUBLE,
+    old_screening_level DOUBLE,
+    new_screening_level DOUBLE,
+    change_type VARCHAR             -- New exceedance, Cleared exceedance
+);
+
+-- Ingest batches (one row per run of era_01_ingest_edd.py)
+CREATE TABLE IF NOT EXISTS meta_ingest_batches (
+    batch_id INTEGER PRIMARY KEY,
+    ingested_at TIMESTAMP,
+    source VARCHAR
+);
+
+-- Current exceedances (latest sample exceeds) snapshotted per ingest batch
+CREATE TABLE IF NOT EXISTS scr_exceedance_snapshots (
+    batch_id INTEGER,
+    location_id VARCHAR,
+    matrix_code VARCHAR,
+    cas_rn VARCHAR,
+    scenario VARCHAR,
+    latest_sample_date DATE,
+    latest_hq DOUBLE,
+    exceedance_count INTEGER
+);
+
+-- Input fingerprint per location, used for incremental cube refresh
+CREATE TABLE IF NOT EXISTS scr_hazard_index_state (
+    location_id VARCHAR PRIMARY KEY,
+    input_hash UBIGINT
+);
+
+-- ============================================
+-- MATERIALIZED STATISTICS TABLES
+-- Maintained by era/ucl.py and related modules
+-- ============================================
+
+-- Robust ROS imputed values for non-detects (multiple detection limits)
+CREATE TABLE IF NOT EXISTS stat_ros_imputed (
+    result_id INTEGER,
+    cas_rn VARCHAR,
+    matrix_code VARCHAR,
+    imputed_value DOUBLE
+);
+
+-- Bootstrap UCL95s by analyte and matrix (deterministic per-group seeds)
+CREATE TABLE IF NOT EXISTS stat_bootstrap_ucls (
+    cas_rn VARCHAR,
+    matrix_code VARCHAR,
+    n_total BIGINT,
+    mean DOUBLE,
+    n_bootstrap BIGINT,
+    ucl95_percentile DOUBLE,
+    ucl95_bca DOUBLE,
+    ucl95_bootstrap_t DOUBLE
+);
+
+-- Goodness-of-fit statistics keyed by a content hash of a group's detects
+CREATE TABLE IF NOT EXISTS stat_gof_cache (
+    data_hash VARCHAR,
+    gof_version VARCHAR,
+    n_gof BIGINT,
+    sw_w DOUBLE,
+    sw_p DOUBLE,
+    sw_log_w DOUBLE,
+    sw_log_p DOUBLE,
+    lilliefors_d DOUBLE,
+    lilliefors_log_d DOUBLE,
+    lilliefors_crit DOUBLE,
+    ad_gamma DOUBLE,
+    ad_gamma_crit DOUBLE,
+    gof_distribution VARCHAR,
+    PRIMARY KEY (data_hash, gof_version)
+);
+
+-- Per-group EPC statistics keyed by a content hash of the group's sorted
+-- (value, DL, detect flag) rows; columns are those of stat_epcs minus the
+-- group keys, attributes and hazard_quotient (created by era/ucl.py)
+-- stat_epc_cache (data_hash VARCHAR, ..., epc_version VARCHAR)
+
+-- Exposure point concentrations by analyte and matrix
+CREATE TABLE IF NOT EXISTS stat_epcs (
+    cas_rn VARCHAR,
+    matrix_code VARCHAR,
+    analyte_name VARCHAR,
+    matrix_name VARCHAR,
+    result_unit VARCHAR,
+    screening_level DOUBLE,
+    is_copc BOOLEAN,                -- Any detect above the residential RSL
+    n_total BIGINT,
+    n_detect BIGINT,
+    n_ros_imputed BIGINT,           -- Non-detects entering mean/sd at their ROS value
+    detect_freq_pct DOUBLE,
+    mean DOUBLE,                    -- Non-detects at ROS value, else 1/2 DL
+    sd DOUBLE,
+    mean_detect DOUBLE,
+    max_detect DOUBLE,
+    max_dl DOUBLE,
+    t_crit DOUBLE,
+    chebyshev_ucl95 DOUBLE,         -- Mean + 4.359 SE (nonparametric)
+    km_mean DOUBLE,                 -- Left-censored Kaplan-Meier estimates
+    km_sd DOUBLE,
+    km_se DOUBLE,
+    km_t_ucl95 DOUBLE,
+    km_cheb_ucl95 DOUBLE,
+    gamma_k_hat DOUBLE,             -- Thom's MLE approximation
+    gamma_k_star DOUBLE,            -- Bias-corrected shape
+    gamma_approx_ucl95 DOUBLE,
+    gamma_adjusted_ucl95 DOUBLE,
+    log_mean DOUBLE,
+    log_sd DOUBLE,
+    land_h DOUBLE,
+    h_ucl95 DOUBLE,                 -- Land's H-UCL
+    n_gof BIGINT,                   -- Goodness of fit on detects (see stat_gof_cache)
+    sw_w DOUBLE,
+    sw_p DOUBLE,
+    sw_log_w DOUBLE,
+    sw_log_p DOUBLE,
+    lilliefors_d DOUBLE,
+    lilliefors_log_d DOUBLE,
+    lilliefors_crit DOUBLE,
+    ad_gamma DOUBLE,
+    ad_gamma_crit DOUBLE,
+    gof_distribution VARCHAR,       -- Normal, Gamma, Lognormal, Nonparametric
+    epc DOUBLE,
+    method VARCHAR,                 -- Decision tree result (see era/ucl.py)
+    hazard_quotient DOUBLE
+);
+
+-- Mann-Kendall trend tests and Sen's slopes by location/analyte series
+-- (one value per sample date; censored values tied below the highest DL)
+CREATE TABLE IF NOT EXISTS stat_trends (
+    location_id VARCHAR,
+    cas_rn VARCHAR,
+    matrix_code VARCHAR,
+    n_samples BIGINT,
+    n_detect BIGINT,
+    n_censored BIGINT,              -- Non-detects plus detects below censor_limit
+    first_date DATE,
+    last_date DATE,
+    censor_limit DOUBLE,            -- Highest non-detect DL in the series
+    mk_s DOUBLE,
+    mk_var_s DOUBLE,                -- Tie-corrected variance of S
+    mk_z DOUBLE,
+    mk_p DOUBLE,                    -- Two-sided
+    kendall_tau DOUBLE,
+    sens_slope_per_year DOUBLE,
+    trend VARCHAR                   -- Increasing, Decreasing, No Trend, Insufficient Data
+);
+
+-- One-sided site > background tests by exposure unit, analyte and matrix
+CREATE TABLE IF NOT EXISTS stat_background_comparison (
+    exposure_unit VARCHAR,
+    cas_rn VARCHAR,
+    matrix_code VARCHAR,
+    n_site BIGINT,
+    n_site_detect BIGINT,
+    n_background BIGINT,
+    n_background_detect BIGINT,
+    site_max_detect DOUBLE,
+    background_max_detect DOUBLE,
+    wmw_u DOUBLE,                   -- Wilcoxon-Mann-Whitney on recensored values
+    wmw_z DOUBLE,
+    wmw_p DOUBLE,
+    gehan_statistic DOUBLE,         -- Gehan generalized Wilcoxon (censored data)
+    gehan_z DOUBLE,
+    gehan_p DOUBLE,
+    test_used VARCHAR,              -- Gehan when there are non-detects, else WMW
+    p_value DOUBLE,
+    conclusion VARCHAR              -- Site > Background, Not Different, Insufficient Data
+);
+
+-- Background threshold values by analyte and matrix, in the normalized
+-- result unit (see era/btv.py); join on cas_rn, matrix_code
+CREATE TABLE IF NOT EXISTS ref_background_thresholds (
+    cas_rn VARCHAR,
+    matrix_code VARCHAR,
+    result_unit VARCHAR,
+    n_background BIGINT,
+    n_detect BIGINT,
+    max_detect DOUBLE,
+    gof_distribution VARCHAR,       -- Normal, Gamma, Lognormal, Nonparametric
+    utl95_95_normal DOUBLE,         -- Upper tolerance limits (95% coverage, 95% confidence)
+    utl95_95_gamma DOUBLE,
+    utl95_95_lognormal DOUBLE,
+    utl95_95_nonparametric DOUBLE,
+    upl95_normal DOUBLE,            -- Upper prediction limits (one future observation)
+    upl95_gamma DOUBLE,
+    upl95_lognormal DOUBLE,
+    upl95_nonparametric DOUBLE,
+    usl95_normal DOUBLE,            -- Upper simultaneous limits
+    usl95_gamma DOUBLE,
+    usl95_lognormal DOUBLE,
+    usl95_nonparametric DOUBLE,
+    nonparametric_utl_rank BIGINT,  -- Order statistic used for the nonparametric UTL
+    btv DOUBLE,
+    btv_method VARCHAR
+);
+
+-- Detected results flagged as outliers (log-scale tests per analyte and
+-- matrix, see era/outliers.py); only flagged results are stored
+CREATE TABLE IF NOT EXISTS stat_outlier_flags (
+    result_id INTEGER,
+    cas_rn VARCHAR,
+    matrix_code VARCHAR,
+    result_value DOUBLE,
+    n_detect BIGINT,
+    test_used VARCHAR,              -- Dixon (3-25 detects), Rosner (> 25), None
+    dixon_flag BOOLEAN,
+    rosner_flag BOOLEAN,
+    iqr_flag BOOLEAN,               -- Outside the Tukey fences (supporting only)
+    is_outlier BOOLEAN              -- Dixon or Rosner; excluded from EPCs on request
+);
+
+-- Statistics-ready results: field duplicates combined with their parent
+-- sample by the duplicate rule, QC samples (TB, EB, MS) left out (see
+-- era/duplicates.py). One row per sample and analyte.
+CREATE TABLE IF NOT EXISTS stat_results (
+    result_id INTEGER,              -- The parent's result where it has one
+    sample_id VARCHAR,              -- Parent sample
+    location_id VARCHAR,
+    sample_date DATE,
+    matrix_code VARCHAR,
+    sample_type VARCHAR,            -- N, or FD for a duplicate without a parent
+    cas_rn VARCHAR,
+    result_value_norm DOUBLE,
+    detection_limit_norm DOUBLE,
+    result_unit_norm VARCHAR,
+    detect_flag VARCHAR,
+    lab_qualifier VARCHAR,
+    n_results BIGINT,               -- Results combined (2 for a parent/duplicate pair)
+    duplicate_rule VARCHAR          -- max, mean or parent
+);
+
+-- Data version and duplicate rule stat_results was built from
+CREATE TABLE IF NOT EXISTS meta_statistics_results (
+    data_version INTEGER,
+    duplicate_rule VARCHAR,
+    built_at TIMESTAMP
+);
+
+-- Cached concentration grids (see era/interpolation.py), keyed by a hash
+-- of analyte, matrix, event, method, parameters and input points
+CREATE TABLE IF NOT EXISTS stat_interpolation_grids (
+    grid_id VARCHAR PRIMARY KEY,
+    cas_rn VARCHAR,
+    matrix_code VARCHAR,
+    sample_date DATE,
+    method VARCHAR,                 -- idw, kriging
+    parameters VARCHAR,             -- JSON
+    n_points BIGINT,
+    origin_latitude DOUBLE,         -- Grid x_ft/y_ft are east/north of this point
+    origin_longitude DOUBLE,
+    cell_size_ft DOUBLE,
+    n_rows BIGINT,
+    n_cols BIGINT,
+    nugget DOUBLE,                  -- Fitted variogram (kriging only)
+    partial_sill DOUBLE,
+    range_ft DOUBLE,
+    created_at TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS stat_interpolation_cells (
+    grid_id VARCHAR,
+    row_index INTEGER,
+    col_index INTEGER,
+    x_ft DOUBLE,
+    y_ft DOUBLE,
+    latitude DOUBLE,
+    longitude DOUBLE,
+    estimate DOUBLE,
+    variance DOUBLE                 -- Kriging variance (NULL for IDW)
+);
+
+-- Groundwater elevation per well and event from depth to water (see era/groundwater.py)
+CREATE TABLE IF NOT EXISTS stat_gw_elevations (
+    sample_date DATE,
+    location_id VARCHAR,
+    latitude DOUBLE,
+    longitude DOUBLE,
+    elevation_ft DOUBLE,            -- Measuring point elevation
+    depth_to_water_ft DOUBLE,       -- Mean of the date's readings
+    n_readings BIGINT,
+    gw_elevation_ft DOUBLE
+);
+
+-- Hydraulic gradient and flow direction per event (least-squares plane)
+CREATE TABLE IF NOT EXISTS stat_gw_gradients (
+    sample_date DATE,
+    n_wells BIGINT,
+    mean_gw_elevation_ft DOUBLE,
+    min_gw_elevation_ft DOUBLE,
+    max_gw_elevation_ft DOUBLE,
+    dh_dx DOUBLE,                   -- ft/ft toward east
+    dh_dy DOUBLE,                   -- ft/ft toward north
+    gradient_ft_per_ft DOUBLE,      -- NULL with fewer than 3 or collinear wells
+    flow_azimuth_deg DOUBLE,        -- Degrees clockwise from north
+    flow_direction VARCHAR,         -- 16-point compass
+    r_squared DOUBLE
+);
+
+-- Data version and depth-to-water reading count the gradients were built from
+CREATE TABLE IF NOT EXISTS meta_gw_gradients (
+    data_version INTEGER,
+    n_readings BIGINT,
+    built_at TIMESTAMP
+);
+
+-- Plume area and mass above the screening level per event (see era/plume.py)
+CREATE TABLE IF NOT EXISTS stat_plume_metrics (
+    cas_rn VARCHAR,
+    matrix_code VARCHAR,
+    sample_date DATE,
+    method VARCHAR,
+    grid_id VARCHAR,                -- stat_interpolation_grids
+    n_points BIGINT,
+    cell_size_ft DOUBLE,
+    screening_level DOUBLE,
+    n_cells_above BIGINT,
+    plume_area_ft2 DOUBLE,
+    plume_area_acres DOUBLE,
+    plume_mass_kg DOUBLE,           -- Mass in cells above the screening level
+    total_mass_kg DOUBLE,           -- Mass over the whole grid
+    max_estimate DOUBLE,
+    centroid_latitude DOUBLE,       -- Mass-weighted plume centroid
+    centroid_longitude DOUBLE
+);
+
+-- Mann-Kendall trend of plume area and mass across events
+CREATE TABLE IF NOT EXISTS stat_plume_stability (
+    cas_rn VARCHAR,
+    matrix_code VARCHAR,
+    metric VARCHAR,                 -- plume_area_ft2, plume_mass_kg
+    n_events BIGINT,
+    first_value DOUBLE,
+    last_value DOUBLE,
+    mk_s DOUBLE,
+    mk_p DOUBLE,
+    sens_slope_per_year DOUBLE,
+    stability VARCHAR               -- Expanding, Shrinking, Stable, Insufficient Data
 );
 
 -- ============================================
@@ -169,9 +618,9 @@ SELECT
     a.analyte_name,
     a.analyte_group,
     r.cas_rn,
-    r.result_value,
-    r.result_unit,
-    r.detection_limit,
+    r.result_value_norm as result_value,
+    r.result_unit_norm as result_unit,
+    r.detection_limit_norm as detection_limit,
     r.detect_flag,
     r.lab_qualifier,
     q.detection_status,
@@ -184,14 +633,15 @@ SELECT
     -- Hazard Quotient calculation
     CASE
         WHEN s.matrix_code = 'SO' AND sl.rsl_residential_soil_mg_kg > 0
-        THEN ROUND(r.result_value / sl.rsl_residential_soil_mg_kg, 4)
+        THEN ROUND(r.result_value_norm / sl.rsl_residential_soil_mg_kg, 4)
         WHEN s.matrix_code IN ('GW', 'DW') AND sl.rsl_residential_tap_ug_l > 0
-        THEN ROUND(r.result_value / sl.rsl_residential_tap_ug_l, 4)
+        THEN ROUND(r.result_value_norm / sl.rsl_residential_tap_ug_l, 4)
     END as hazard_quotient,
     -- Exceedance flag
     CASE
-        WHEN s.matrix_code = 'SO' AND r.result_value > sl.rsl_residential_soil_mg_kg THEN 'EXCEEDS'
-        WHEN s.matrix_code IN ('GW', 'DW') AND r.result_value > sl.rsl_residential_tap_ug_l THEN 'EXCEEDS'
+        WHEN s.matrix_code = 'SO' AND r.result_value_norm > sl.rsl_residential_soil_mg_kg THEN 'EXCEEDS'
+        WHEN s.matrix_code IN ('GW', 'DW') AND r.result_value_norm > sl.rsl_residential_tap_ug_l THEN 'EXCEEDS'
+        WHEN r.result_unit_norm IS NULL THEN 'UNIT MISMATCH'
         ELSE 'BELOW'
     END as screening_status,
     sl.carcinogen
@@ -203,6 +653,56 @@ LEFT JOIN dim_analytes a ON r.cas_rn = a.cas_rn
 LEFT JOIN dim_qualifiers q ON r.lab_qualifier = q.qualifier
 LEFT JOIN ref_screening_levels sl ON r.cas_rn = sl.cas_rn;
 
+-- View: Results compared to the criteria in force on the sample date
+-- (single ASOF join against the criteria history, for reproducing past reports)
+CREATE OR REPLACE VIEW vw_screening_comparison_asof AS
+SELECT
+    s.sample_id,
+    s.location_id,
+    l.location_name,
+    s.sample_date,
+    s.matrix_code,
+    m.matrix_name,
+    a.analyte_name,
+    a.analyte_group,
+    r.cas_rn,
+    r.result_value_norm as result_value,
+    r.result_unit_norm as result_unit,
+    r.detection_limit_norm as detection_limit,
+    r.detect_flag,
+    r.lab_qualifier,
+    q.detection_status,
+    -- Screening levels based on matrix
+    CASE s.matrix_code
+        WHEN 'SO' THEN sl.rsl_residential_soil_mg_kg
+        WHEN 'GW' THEN sl.rsl_residential_tap_ug_l
+        WHEN 'DW' THEN sl.rsl_residential_tap_ug_l
+    END as screening_level,
+    -- Hazard Quotient calculation
+    CASE
+        WHEN s.matrix_code = 'SO' AND sl.rsl_residential_soil_mg_kg > 0
+        THEN ROUND(r.result_value_norm / sl.rsl_residential_soil_mg_kg, 4)
+        WHEN s.matrix_code IN ('GW', 'DW') AND sl.rsl_residential_tap_ug_l > 0
+        THEN ROUND(r.result_value_norm / sl.rsl_residential_tap_ug_l, 4)
+    END as hazard_quotient,
+    -- Exceedance flag
+    CASE
+        WHEN s.matrix_code = 'SO' AND r.result_value_norm > sl.rsl_residential_soil_mg_kg THEN 'EXCEEDS'
+        WHEN s.matrix_code IN ('GW', 'DW') AND r.result_value_norm > sl.rsl_residential_tap_ug_l THEN 'EXCEEDS'
+        WHEN r.result_unit_norm IS NULL THEN 'UNIT MISMATCH'
+        ELSE 'BELOW'
+    END as screening_status,
+    sl.carcinogen,
+    sl.valid_from as criteria_valid_from
+FROM fact_results r
+JOIN fact_samples s ON r.sample_id = s.sample_id
+LEFT JOIN dim_locations l ON s.location_id = l.location_id
+LEFT JOIN dim_matrix m ON s.matrix_code = m.matrix_code
+LEFT JOIN dim_analytes a ON r.cas_rn = a.cas_rn
+LEFT JOIN dim_qualifiers q ON r.lab_qualifier = q.qualifier
+ASOF LEFT JOIN ref_screening_levels_history sl
+    ON r.cas_rn = sl.cas_rn AND s.sample_date >= sl.valid_from;
+
 -- View: Detection summary by analyte
 CREATE OR REPLACE VIEW vw_detection_summary AS
 SELECT
@@ -212,15 +712,14 @@ SELECT
     COUNT(*) as total_samples,
     SUM(CASE WHEN r.detect_flag = 'Y' THEN 1 ELSE 0 END) as detected_count,
     ROUND(100.0 * SUM(CASE WHEN r.detect_flag = 'Y' THEN 1 ELSE 0 END) / COUNT(*), 1) as detection_frequency_pct,
-    MIN(CASE WHEN r.detect_flag = 'Y' THEN r.result_value END) as min_detected,
-    MAX(CASE WHEN r.detect_flag = 'Y' THEN r.result_value END) as max_detected,
-    AVG(CASE WHEN r.detect_flag = 'Y' THEN r.result_value END) as mean_detected,
-    r.result_unit
-FROM fact_results r
-JOIN fact_samples s ON r.sample_id = s.sample_id
+    MIN(CASE WHEN r.detect_flag = 'Y' THEN r.result_value_norm END) as min_detected,
+    MAX(CASE WHEN r.detect_flag = 'Y' THEN r.result_value_norm END) as max_detected,
+    AVG(CASE WHEN r.detect_flag = 'Y' THEN r.result_value_norm END) as mean_detected,
+    r.result_unit_norm as result_unit
+FROM stat_results r
 JOIN dim_analytes a ON r.cas_rn = a.cas_rn
-JOIN dim_matrix m ON s.matrix_code = m.matrix_code
-GROUP BY a.analyte_name, a.analyte_group, m.matrix_name, r.result_unit;
+JOIN dim_matrix m ON r.matrix_code = m.matrix_code
+GROUP BY a.analyte_name, a.analyte_group, m.matrix_name, r.result_unit_norm;
 
 -- View: Location summary with max concentrations
 CREATE OR REPLACE VIEW vw_location_summary AS
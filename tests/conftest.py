@@ -0,0 +1,61 @@
+import sys
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent
+SCHEMA_PATH = PROJECT_ROOT / "sql" / "schema" / "era_schema.sql"
+
+# The era package lives at the project root, as in the notebooks
+sys.path.insert(0, str(PROJECT_ROOT))
+
+
+@pytest.fixture
+def empty_db():
+    """In-memory database with the ERA schema and no data."""
+    conn = duckdb.connect()
+    conn.execute(SCHEMA_PATH.read_text())
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def site_db(empty_db):
+    """
+    Load a small site into the empty database. samples and results are
+    lists of dicts (fact_samples / fact_results columns); normalized
+    result columns default to the reported ones, and the analytes,
+    locations and criteria rows they need are added.
+    """
+    def load(samples, results, criteria=(), locations=()):
+        samples = pd.DataFrame(list(samples))
+        results = pd.DataFrame(list(results))
+        for column, source in [("result_value_norm", "result_value"),
+                               ("detection_limit_norm", "detection_limit"),
+                               ("result_unit_norm", "result_unit")]:
+            if column not in results.columns:
+                results[column] = results[source]
+        criteria = pd.DataFrame(list(criteria), columns=None if criteria else ["cas_rn"])
+        locations = pd.DataFrame(list(locations), columns=None if locations else ["location_id"])
+
+        empty_db.execute("""
+            INSERT INTO dim_analytes (cas_rn, analyte_name)
+            SELECT cas_rn, 'Analyte ' || cas_rn
+            FROM (SELECT cas_rn FROM results UNION SELECT cas_rn FROM criteria)
+        """)
+        empty_db.execute("""
+            INSERT INTO dim_locations BY NAME
+            SELECT * FROM locations
+            UNION ALL BY NAME
+            SELECT DISTINCT location_id FROM samples
+            WHERE location_id NOT IN (SELECT location_id FROM locations)
+        """)
+        empty_db.execute("INSERT INTO fact_samples BY NAME SELECT * FROM samples")
+        empty_db.execute("INSERT INTO fact_results BY NAME SELECT * FROM results")
+        if len(criteria):
+            empty_db.execute("INSERT INTO ref_screening_levels BY NAME SELECT * FROM criteria")
+        return empty_db
+
+    return load
@@ -0,0 +1,86 @@
+"""Checks of the site versus background tests against scipy and a pairwise reference."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from era import background
+
+
+def comparison_data(seed, n_groups=30, censored=True):
+    """Site and background results for random exposure units."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for group in range(n_groups):
+        for is_site, shift in [(True, rng.uniform(0.0, 1.0)), (False, 0.0)]:
+            n = rng.integers(3, 25)
+            # Rounded values so ranks have ties
+            values = np.round(rng.lognormal(shift, 1.0, n), 1) + 0.1
+            limits = rng.choice([0.3, 0.6, 1.0], n) if censored else np.zeros(n)
+            detected = values >= limits
+            rows += [
+                ("EU-1", f"G{group:02d}", "SO", is_site, value if detect else np.nan, limit, "Y" if detect else "N")
+                for value, limit, detect in zip(values, limits, detected)
+            ]
+    columns = ["exposure_unit", "cas_rn", "matrix_code", "is_site", "result_value", "detection_limit", "detect_flag"]
+    return pd.DataFrame(rows, columns=columns)
+
+
+def gehan_reference(observed, detected, is_site):
+    """Gehan statistic and z from explicit pairwise comparisons."""
+    def known_above(i, j):
+        return detected[i] and observed[i] >= observed[j] and (observed[i] > observed[j] or not detected[j])
+
+    n = len(observed)
+    scores = np.array([
+        sum(known_above(i, j) for j in range(n)) - sum(known_above(j, i) for j in range(n))
+        for i in range(n)
+    ], dtype=float)
+    n_site = is_site.sum()
+    statistic = scores[is_site].sum()
+    variance = n_site * (n - n_site) * np.sum(scores ** 2) / (n * (n - 1))
+    return statistic, statistic / np.sqrt(variance)
+
+
+def test_wmw_matches_scipy_mannwhitneyu():
+    data = comparison_data(0, censored=False)
+    comparison = background.compute_background_comparison(data).set_index("cas_rn")
+    assert (comparison["test_used"] == "WMW").all()
+
+    for cas_rn, group in data.groupby("cas_rn"):
+        site = group.loc[group["is_site"], "result_value"]
+        other = group.loc[~group["is_site"], "result_value"]
+        expected = stats.mannwhitneyu(site, other, alternative="greater", method="asymptotic")
+        assert comparison.loc[cas_rn, "wmw_u"] == pytest.approx(expected.statistic)
+        assert comparison.loc[cas_rn, "wmw_p"] == pytest.approx(expected.pvalue)
+
+
+def test_wmw_recensors_below_the_highest_detection_limit():
+    data = comparison_data(1)
+    comparison = background.compute_background_comparison(data).set_index("cas_rn")
+
+    for cas_rn, group in data.groupby("cas_rn"):
+        detect = (group["detect_flag"] == "Y").to_numpy()
+        limit = group.loc[~detect, "detection_limit"].max()
+        value = group["result_value"].to_numpy()
+        recensored = np.where(~detect | (value < limit), limit / 2, value)
+        site = group["is_site"].to_numpy()
+        expected = stats.mannwhitneyu(recensored[site], recensored[~site], alternative="greater", method="asymptotic")
+        assert comparison.loc[cas_rn, "wmw_u"] == pytest.approx(expected.statistic)
+        assert comparison.loc[cas_rn, "wmw_p"] == pytest.approx(expected.pvalue)
+
+
+def test_gehan_matches_pairwise_reference():
+    data = comparison_data(2)
+    comparison = background.compute_background_comparison(data).set_index("cas_rn")
+
+    for cas_rn, group in data.groupby("cas_rn"):
+        detect = (group["detect_flag"] == "Y").to_numpy()
+        observed = np.where(detect, group["result_value"], group["detection_limit"])
+        statistic, z = gehan_reference(observed, detect, group["is_site"].to_numpy())
+        assert comparison.loc[cas_rn, "gehan_statistic"] == pytest.approx(statistic)
+        assert comparison.loc[cas_rn, "gehan_z"] == pytest.approx(z)
+        if not detect.all():
+            assert comparison.loc[cas_rn, "test_used"] == "Gehan"
+            assert comparison.loc[cas_rn, "p_value"] == pytest.approx(stats.norm.sf(z))
@@ -0,0 +1,52 @@
+"""Checks of the bootstrap UCLs against scipy and for reproducibility."""
+
+import numpy as np
+import pytest
+from scipy import stats
+
+from era import bootstrap
+
+
+@pytest.fixture
+def values():
+    return np.random.default_rng(5).lognormal(1.0, 0.8, 40)
+
+
+def test_percentile_and_bca_match_scipy(values):
+    percentile_ucl, bca_ucl, _ = bootstrap.bootstrap_group(
+        values, bootstrap.group_seed(("X", "SO")), n_boot=20_000
+    )
+    # A two-sided 90% interval's upper bound is the one-sided 95% UCL
+    for method, ucl in [("percentile", percentile_ucl), ("BCa", bca_ucl)]:
+        reference = stats.bootstrap(
+            (values,), np.mean, confidence_level=0.90, n_resamples=20_000,
+            method=method, random_state=np.random.default_rng(6),
+        ).confidence_interval.high
+        assert ucl == pytest.approx(reference, rel=0.01)
+
+
+def test_bootstrap_t_approaches_student_t_for_normal_data():
+    normal = np.random.default_rng(7).normal(10.0, 2.0, 200)
+    _, _, boot_t_ucl = bootstrap.bootstrap_group(normal, bootstrap.group_seed(("N",)), n_boot=20_000)
+    se = normal.std(ddof=1) / np.sqrt(len(normal))
+    t_ucl = normal.mean() + stats.t.ppf(0.95, len(normal) - 1) * se
+    assert boot_t_ucl == pytest.approx(t_ucl, abs=0.1 * se)
+
+
+def test_degenerate_groups_have_no_ucl():
+    assert np.isnan(bootstrap.bootstrap_group(np.array([1.0, 2.0]), 1)).all()
+    assert np.isnan(bootstrap.bootstrap_group(np.full(10, 3.0), 1)).all()
+
+
+def test_results_do_not_depend_on_worker_split(monkeypatch, values):
+    groups = [((f"A{i}", "GW"), values[: 10 + i]) for i in range(12)]
+    serial = bootstrap.bootstrap_ucls(groups, n_boot=500, max_workers=1)
+    again = bootstrap.bootstrap_ucls(groups, n_boot=500, max_workers=1)
+    monkeypatch.setattr(bootstrap, "PARALLEL_THRESHOLD", 0)
+    parallel = bootstrap.bootstrap_ucls(groups, n_boot=500, max_workers=2)
+
+    np.testing.assert_array_equal(serial, again)
+    np.testing.assert_array_equal(serial, parallel)
+    # Reordering groups only reorders their results
+    reversed_groups = bootstrap.bootstrap_ucls(groups[::-1], n_boot=500, max_workers=1)
+    np.testing.assert_array_equal(reversed_groups, serial[::-1])
@@ -0,0 +1,77 @@
+"""Checks of the background threshold values against direct formulas."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from era import btv
+
+
+def background_results(sizes, seed=0):
+    """Fully detected lognormal background groups of the given sizes."""
+    rng = np.random.default_rng(seed)
+    rows = [
+        (f"G{group:02d}", "SO", value, value / 10, "Y", "mg/kg")
+        for group, n in enumerate(sizes)
+        for value in rng.lognormal(1.0, 0.6, n)
+    ]
+    return pd.DataFrame(
+        rows, columns=["cas_rn", "matrix_code", "result_value", "detection_limit", "detect_flag", "result_unit"]
+    )
+
+
+def normal_limits(x):
+    """UTL95-95, UPL95 and USL95 of a normal sample from exact quantiles."""
+    n, mean, sd = len(x), x.mean(), x.std(ddof=1)
+    k = stats.nct.ppf(0.95, n - 1, stats.norm.ppf(0.95) * np.sqrt(n)) / np.sqrt(n)
+    d2max = (n - 1) ** 2 / n * stats.beta.ppf(1 - 0.05 / n, 0.5, (n - 2) / 2)
+    return (
+        mean + k * sd,
+        mean + stats.t.ppf(0.95, n - 1) * np.sqrt(1 + 1 / n) * sd,
+        mean + np.sqrt(d2max) * sd,
+    )
+
+
+def test_parametric_limits_match_direct_formulas():
+    data = background_results([5, 8, 12, 20, 33, 60, 150])
+    btvs = btv.compute_btvs(data).set_index("cas_rn")
+
+    for cas_rn, group in data.groupby("cas_rn"):
+        x = group["result_value"].to_numpy()
+        row = btvs.loc[cas_rn]
+        for name, transform, back in [
+            ("normal", lambda v: v, lambda v: v),
+            ("gamma", np.cbrt, lambda v: v ** 3),
+            ("lognormal", np.log, np.exp),
+        ]:
+            expected = [back(limit) for limit in normal_limits(transform(x))]
+            found = [row[f"{label}_{name}"] for label in btv.LIMIT_LABELS.values()]
+            assert found == pytest.approx(expected, rel=2e-3)
+
+
+def test_nonparametric_limits_use_binomial_ranks():
+    # 59 values are the fewest for which the maximum is a UTL95-95, and 93
+    # the fewest for the second largest
+    data = background_results([10, 58, 59, 93, 200], seed=1)
+    btvs = btv.compute_btvs(data).set_index("cas_rn")
+
+    for cas_rn, group in data.groupby("cas_rn"):
+        x = np.sort(group["result_value"].to_numpy())
+        n = len(x)
+        rank = next((r for r in range(1, n + 1) if stats.binom.cdf(r - 1, n, 0.95) >= 0.95), n)
+        row = btvs.loc[cas_rn]
+        assert row["nonparametric_utl_rank"] == rank
+        assert row["utl95_95_nonparametric"] == x[rank - 1]
+        assert row["upl95_nonparametric"] == x[min(int(np.ceil((n + 1) * 0.95)), n) - 1]
+        assert row["usl95_nonparametric"] == x[-1]
+
+    ranks = btvs["nonparametric_utl_rank"]
+    assert list(ranks["G00":"G03"]) == [10, 58, 59, 92]
+
+
+def test_btv_falls_back_to_max_detect():
+    data = background_results([3])
+    btvs = btv.compute_btvs(data)
+    assert btvs.loc[0, "btv_method"] == "Max Detect"
+    assert btvs.loc[0, "btv"] == data["result_value"].max()
@@ -0,0 +1,167 @@
+"""Checks of the censored-data estimators against scalar references."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from era.censored import CENSORED_ORDER, kaplan_meier, ros_impute, with_observed_value
+from era.segments import Segments
+
+
+def censored_segments(groups):
+    """Segments over (group, value, detected) triples, as era.ucl builds them."""
+    frame = pd.DataFrame(groups, columns=["group", "value", "detected"])
+    frame = pd.DataFrame({
+        "group": frame["group"],
+        "result_value": np.where(frame["detected"], frame["value"], np.nan),
+        "detection_limit": frame["value"],
+        "detect_flag": np.where(frame["detected"], "Y", "N"),
+    })
+    seg = Segments(with_observed_value(frame), ["group"], CENSORED_ORDER)
+    return seg, seg.column("observed_value"), seg.data["detect_flag"].to_numpy() == "Y"
+
+
+def random_groups(seed, n_groups=200):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for group in range(n_groups):
+        n = rng.integers(3, 30)
+        values = np.round(rng.lognormal(0, 1, n), 1) + 0.1
+        limits = rng.choice([0.5, 1.0, 2.0], n)
+        detected = values >= limits
+        rows += zip([group] * n, np.where(detected, values, limits), detected)
+    return rows
+
+
+def km_reference(values, detected):
+    """Left-censored Kaplan-Meier by explicit loops over distinct detects."""
+    z = np.unique(values[detected])
+    d = np.array([np.sum(detected & (values == zj)) for zj in z], dtype=float)
+    b = np.array([np.sum(values <= zj) for zj in z], dtype=float)
+    m = len(z)
+
+    cdf = np.ones(m)
+    for j in range(m - 1, 0, -1):
+        cdf[j - 1] = cdf[j] * (1 - d[j] / b[j])
+    mass = np.diff(np.concatenate([[0.0], cdf]))
+    mean = np.sum(z * mass)
+    sd = np.sqrt(max(np.sum(z ** 2 * mass) - mean ** 2, 0.0))
+
+    var_mean = 0.0
+    for j in range(m - 1):
+        area = sum((z[i + 1] - z[i]) * cdf[i] for i in range(j + 1))
+        var_mean += area ** 2 * d[j + 1] / (b[j + 1] * (b[j + 1] - d[j + 1]))
+    k = d.sum()
+    se = np.sqrt(k / (k - 1) * var_mean) if k > 1 else np.nan
+    return mean, sd, se
+
+
+def ros_reference(values, detected, min_detects=3):
+    """
+    Helsel's ROS for one group by explicit loops. Returns the sorted
+    imputed values of each detection limit, or None when not imputed.
+    """
+    limits = np.unique(values[~detected])
+    if detected.sum() < min_detects or len(limits) == 0:
+        return None
+    edges = np.concatenate([[0.0], limits, [np.inf]])
+    n_levels = len(edges) - 1
+    a = [np.sum(detected & (values >= edges[j]) & (values < edges[j + 1])) for j in range(n_levels)]
+    b = [np.sum(detected & (values < edges[j])) + np.sum(~detected & (values <= edges[j]))
+         for j in range(n_levels)]
+
+    # Probability of falling below each level: prod of B / (A + B) above it
+    below = np.zeros(n_levels + 1)
+    below[n_levels] = 1.0
+    for j in range(n_levels - 1, 0, -1):
+        below[j] = below[j + 1] * b[j] / (a[j] + b[j])
+
+    scores, logs = [], []
+    for j in range(n_levels):
+        level = np.sort(values[detected & (values >= edges[j]) & (values < edges[j + 1])])
+        for rank, value in enumerate(level, 1):
+            scores.append(stats.norm.ppf(below[j] + (below[j + 1] - below[j]) * rank / (a[j] + 1)))
+            logs.append(np.log(value))
+    slope, intercept = np.polyfit(scores, logs, 1)
+
+    imputed = {}
+    for j, limit in enumerate(limits, 1):
+        c = np.sum(~detected & (values == limit))
+        positions = below[j] * np.arange(1, c + 1) / (c + 1)
+        imputed[limit] = np.exp(intercept + slope * stats.norm.ppf(positions))
+    return imputed
+
+
+def test_ros_known_case_multiple_limits():
+    # Two detection limits; Helsel plotting positions give
+    # 1 - pe = 9/13 at DL 2 and 2/5 of that at DL 0.5
+    seg, observed, detect = censored_segments(
+        [(0, v, False) for v in (0.5, 0.5, 2, 2, 2, 2)]
+        + [(0, v, True) for v in (0.7, 0.9, 1.5, 2.5, 3, 4.2, 5)]
+    )
+    imputed = ros_impute(seg, observed, detect)
+
+    np.testing.assert_allclose(imputed[~detect & (observed == 0.5)], [0.236716, 0.382876], rtol=1e-5)
+    np.testing.assert_allclose(
+        imputed[~detect & (observed == 2)], [0.309627, 0.539576, 0.824710, 1.219922], rtol=1e-5
+    )
+    assert np.all(imputed[~detect] < observed[~detect])
+    assert np.all(np.isnan(imputed[detect]))
+
+
+def test_ros_single_nondetect_below_detects():
+    # The non-detect's plotting position is (1 - pe) / 2 = 0.05, below
+    # every detect's, so it is imputed below the smallest detect
+    seg, observed, detect = censored_segments(
+        [(0, 1.0, False)] + [(0, float(v), True) for v in range(2, 11)]
+    )
+    imputed = ros_impute(seg, observed, detect)
+
+    assert imputed[0] == pytest.approx(1.466264, rel=1e-6)
+    assert imputed[0] < observed[detect].min()
+
+
+def test_ros_matches_reference():
+    seg, observed, detect = censored_segments(random_groups(seed=1))
+    imputed = ros_impute(seg, observed, detect)
+
+    checked = 0
+    for start, count in zip(seg.starts, seg.counts):
+        rows = slice(start, start + count)
+        expected = ros_reference(observed[rows], detect[rows])
+        if expected is None:
+            assert np.all(np.isnan(imputed[rows]))
+            continue
+        for limit, values in expected.items():
+            at_limit = ~detect[rows] & (observed[rows] == limit)
+            np.testing.assert_allclose(np.sort(imputed[rows][at_limit]), values, rtol=1e-9)
+        checked += 1
+    assert checked > 100
+
+
+def test_kaplan_meier_matches_reference():
+    seg, observed, detect = censored_segments(random_groups(seed=2))
+    km = kaplan_meier(seg, observed, detect)
+
+    for group, (start, count) in enumerate(zip(seg.starts, seg.counts)):
+        rows = slice(start, start + count)
+        if not detect[rows].any():
+            assert np.isnan(km["mean"][group])
+            continue
+        mean, sd, se = km_reference(observed[rows], detect[rows])
+        assert km["mean"][group] == pytest.approx(mean, rel=1e-10)
+        assert km["sd"][group] == pytest.approx(sd, rel=1e-9, abs=1e-6)
+        if np.isnan(se):
+            assert np.isnan(km["se"][group])
+        else:
+            assert km["se"][group] == pytest.approx(se, rel=1e-9, abs=1e-12)
+
+
+def test_kaplan_meier_without_nondetects_is_sample_moments():
+    values = np.array([1.0, 2.0, 2.0, 3.5, 7.0])
+    seg, observed, detect = censored_segments([(0, v, True) for v in values])
+    km = kaplan_meier(seg, observed, detect)
+
+    assert km["mean"][0] == pytest.approx(values.mean())
+    assert km["sd"][0] == pytest.approx(values.std())
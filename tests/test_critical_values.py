@@ -0,0 +1,64 @@
+"""Checks of the critical-value lookup tables against simulation and references."""
+
+import numpy as np
+import pytest
+from scipy import special, stats
+
+from era import critical_values
+
+
+def simulated_lilliefors(n, replicates=20_000, seed=0):
+    """95th percentile of Lilliefors D for normal samples of size n."""
+    rng = np.random.default_rng(seed)
+    x = np.sort(rng.standard_normal((replicates, n)), axis=1)
+    z = (x - x.mean(axis=1, keepdims=True)) / x.std(axis=1, ddof=1, keepdims=True)
+    cdf = special.ndtr(z)
+    i = np.arange(1, n + 1)
+    d = np.maximum(i / n - cdf, cdf - (i - 1) / n).max(axis=1)
+    return np.quantile(d, 0.95)
+
+
+@pytest.mark.parametrize("n, value", critical_values.LILLIEFORS_05)
+def test_lilliefors_table_matches_simulation(n, value):
+    # Lilliefors' published table came from 1000 samples per n and is
+    # within about 2% of a large simulation everywhere
+    assert value == pytest.approx(simulated_lilliefors(n), rel=0.025)
+
+
+def test_lilliefors_critical_interpolates_and_extends():
+    n = np.array([3, 4, 22.5, 25, 30, 100])
+    critical = critical_values.lilliefors_critical(n)
+    assert np.isnan(critical[0])
+    assert critical[1:4] == pytest.approx([0.381, (0.190 + 0.173) / 2, 0.173])
+    assert critical[4] == pytest.approx(0.161)
+    assert critical[5] == pytest.approx(0.0886)
+
+
+def test_chi_square_quantile_matches_scipy():
+    rng = np.random.default_rng(1)
+    df = rng.uniform(0.6, 5000, 500)
+    level = rng.uniform(0.005, 0.995, 500)
+    assert critical_values.chi_square_quantile(level, df) == pytest.approx(stats.chi2.ppf(level, df), rel=2e-3)
+    assert np.isnan(critical_values.chi_square_quantile(0.05, [0.0, np.nan])).all()
+
+
+def test_land_h_ucl_has_nominal_coverage():
+    # Land's H-UCL is exact, so 95% of lognormal samples give a UCL above
+    # the true mean exp(mu + sigma^2 / 2)
+    rng = np.random.default_rng(2)
+    for n, sigma in [(3, 1.0), (5, 0.5), (10, 1.0), (25, 2.0)]:
+        y = rng.normal(0.0, sigma, (20_000, n))
+        s_y = y.std(axis=1, ddof=1)
+        h = critical_values.land_h(n, s_y)
+        ucl = y.mean(axis=1) + s_y ** 2 / 2 + s_y * h / np.sqrt(n - 1)
+        assert np.mean(ucl >= sigma ** 2 / 2) == pytest.approx(0.95, abs=0.006)
+
+
+def test_tolerance_factor_matches_published_values():
+    # One-sided 95% coverage, 95% confidence normal tolerance factors
+    n = np.array([1, 10, 20, 30, 57])
+    k = critical_values.tolerance_factor(n)
+    assert np.isnan(k[0])
+    assert k[1:4] == pytest.approx([2.911, 2.396, 2.220], abs=1e-3)
+    exact = stats.nct.ppf(0.95, 56, stats.norm.ppf(0.95) * np.sqrt(57)) / np.sqrt(57)
+    assert k[4] == pytest.approx(exact, rel=1e-4)
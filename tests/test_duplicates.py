@@ -0,0 +1,139 @@
+"""Checks of field duplicate pairing and QC exclusion for stat_results."""
+
+import pandas as pd
+import pytest
+
+from era import duplicates
+
+# sample_id, location_id, sample_type, parent_sample_id
+SAMPLES = [
+    ("S1", "MW-1", "N", None),
+    ("S1-FD", "MW-1", "FD", None),     # inferred parent S1
+    ("S2", "MW-2", "N", None),
+    ("DUP-7", "MW-9", "FD", "S2"),     # declared parent S2 (no N sample at MW-9)
+    ("ORPHAN", "MW-3", "FD", None),    # no parent anywhere
+    ("S3", "MW-4", "N", None),
+    ("S3-FD", "MW-4", "FD", None),
+    ("S4", "MW-5", "N", None),
+    ("S4-FD", "MW-5", "FD", None),
+    ("TB1", "MW-1", "TB", None),
+    ("EB1", "MW-1", "EB", None),
+    ("MS1", "MW-1", "MS", None),
+]
+
+# result_id, sample_id, cas_rn, result_value_norm, detection_limit_norm, detect_flag
+RESULTS = [
+    (1, "S1", "A", 10.0, 1.0, "Y"),
+    (2, "S1-FD", "A", 14.0, 1.0, "Y"),
+    (3, "S2", "A", 5.0, 1.0, "Y"),
+    (4, "DUP-7", "A", 7.0, 1.0, "Y"),
+    (5, "ORPHAN", "A", 3.0, 1.0, "Y"),
+    (6, "S3", "A", 2.0, 2.0, "N"),
+    (7, "S3-FD", "A", 6.0, 1.0, "Y"),
+    (8, "S1-FD", "B", 4.0, 1.0, "Y"),  # parent S1 has no result for B
+    (9, "S4", "A", 2.0, 2.0, "N"),
+    (10, "S4-FD", "A", 1.0, 1.0, "N"),
+    (11, "TB1", "A", 0.5, 0.1, "Y"),
+    (12, "EB1", "A", 0.5, 0.1, "Y"),
+    (13, "MS1", "A", 20.0, 1.0, "Y"),
+]
+
+# (sample_id, cas_rn) -> (result_value_norm, detection_limit_norm, detect_flag, n_results)
+EXPECTED = {
+    "max": {
+        ("S1", "A"): (14.0, 1.0, "Y", 2),
+        ("S1", "B"): (4.0, 1.0, "Y", 1),
+        ("S2", "A"): (7.0, 1.0, "Y", 2),
+        ("ORPHAN", "A"): (3.0, 1.0, "Y", 1),
+        ("S3", "A"): (6.0, 1.0, "Y", 2),
+        ("S4", "A"): (1.0, 1.0, "N", 2),
+    },
+    "mean": {
+        ("S1", "A"): (12.0, 1.0, "Y", 2),
+        ("S1", "B"): (4.0, 1.0, "Y", 1),
+        ("S2", "A"): (6.0, 1.0, "Y", 2),
+        ("ORPHAN", "A"): (3.0, 1.0, "Y", 1),
+        ("S3", "A"): (6.0, 1.0, "Y", 2),
+        ("S4", "A"): (1.0, 1.0, "N", 2),
+    },
+    "parent": {
+        ("S1", "A"): (10.0, 1.0, "Y", 1),
+        ("S1", "B"): (4.0, 1.0, "Y", 1),
+        ("S2", "A"): (5.0, 1.0, "Y", 1),
+        ("ORPHAN", "A"): (3.0, 1.0, "Y", 1),
+        ("S3", "A"): (2.0, 2.0, "N", 1),
+        ("S4", "A"): (2.0, 2.0, "N", 1),
+    },
+}
+
+
+@pytest.fixture
+def duplicates_db(empty_db):
+    samples = pd.DataFrame(SAMPLES, columns=["sample_id", "location_id", "sample_type", "parent_sample_id"])
+    results = pd.DataFrame(RESULTS, columns=[
+        "result_id", "sample_id", "cas_rn", "result_value_norm", "detection_limit_norm", "detect_flag",
+    ])
+    empty_db.execute("INSERT INTO dim_analytes (cas_rn, analyte_name) VALUES ('A', 'Analyte A'), ('B', 'Analyte B')")
+    empty_db.execute("INSERT INTO dim_locations (location_id) SELECT DISTINCT location_id FROM samples")
+    empty_db.execute("""
+        INSERT INTO fact_samples BY NAME
+        SELECT *, DATE '2024-01-10' as sample_date, 'GW' as matrix_code FROM samples
+    """)
+    empty_db.execute("""
+        INSERT INTO fact_results BY NAME
+        SELECT *, 'mg/L' as result_unit, 'mg/L' as result_unit_norm FROM results
+    """)
+    return empty_db
+
+
+def statistics_results(conn):
+    rows = conn.execute("""
+        SELECT sample_id, cas_rn, result_value_norm, detection_limit_norm, detect_flag, n_results
+        FROM stat_results
+    """).fetchall()
+    return {(sample_id, cas_rn): tuple(rest) for sample_id, cas_rn, *rest in rows}
+
+
+@pytest.mark.parametrize("rule", duplicates.DUPLICATE_RULES)
+def test_duplicates_combined_by_rule(duplicates_db, rule):
+    count = duplicates.materialize_statistics_results(duplicates_db, rule)
+    assert count == len(EXPECTED[rule])
+    assert statistics_results(duplicates_db) == EXPECTED[rule]
+
+
+def test_combined_result_keeps_parent_identity(duplicates_db):
+    duplicates.materialize_statistics_results(duplicates_db, "max")
+    rows = duplicates_db.execute("""
+        SELECT sample_id, result_id, location_id, sample_type
+        FROM stat_results WHERE cas_rn = 'A'
+        ORDER BY sample_id
+    """).fetchall()
+    assert rows == [
+        ("ORPHAN", 5, "MW-3", "FD"),
+        ("S1", 1, "MW-1", "N"),
+        ("S2", 3, "MW-2", "N"),
+        ("S3", 6, "MW-4", "N"),
+        ("S4", 9, "MW-5", "N"),
+    ]
+
+
+def test_statistics_sample_types_are_configurable(duplicates_db, monkeypatch):
+    monkeypatch.setattr(duplicates, "STATISTICS_SAMPLE_TYPES", ("N",))
+    duplicates.materialize_statistics_results(duplicates_db, "max")
+    assert statistics_results(duplicates_db) == {
+        ("S1", "A"): (10.0, 1.0, "Y", 1),
+        ("S2", "A"): (5.0, 1.0, "Y", 1),
+        ("S3", "A"): (2.0, 2.0, "N", 1),
+        ("S4", "A"): (2.0, 2.0, "N", 1),
+    }
+
+
+def test_ensure_keeps_the_last_rule(duplicates_db):
+    assert duplicates.current_duplicate_rule(duplicates_db) == duplicates.DEFAULT_DUPLICATE_RULE
+    duplicates.ensure_statistics_results(duplicates_db, "parent")
+    duplicates.ensure_statistics_results(duplicates_db)
+    assert duplicates.current_duplicate_rule(duplicates_db) == "parent"
+    assert statistics_results(duplicates_db) == EXPECTED["parent"]
+
+    with pytest.raises(ValueError):
+        duplicates.materialize_statistics_results(duplicates_db, "min")
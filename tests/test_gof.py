@@ -0,0 +1,81 @@
+"""Checks of the batched goodness-of-fit tests against scipy."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from era import gof
+from era.segments import Segments
+
+SIZES = [3, 4, 5, 6, 8, 11, 12, 20, 35, 60, 200]
+
+
+def lognormal_groups(seed=1, sizes=SIZES):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for group, n in enumerate(sizes):
+        rows += [(group, value) for value in rng.lognormal(0.0, 1.0, n)]
+    frame = pd.DataFrame(rows, columns=["group", "result_value"])
+    return Segments(frame, ["group"], ["result_value"])
+
+
+def ad_gamma_reference(x):
+    """A^2 for a gamma fit with Thom's shape estimate, one sample at a time."""
+    x = np.sort(x)
+    n = len(x)
+    a = np.log(x.mean()) - np.log(x).mean()
+    k = (3 - a + np.sqrt((a - 3) ** 2 + 24 * a)) / (12 * a)
+    cdf = stats.gamma.cdf(x, k, scale=x.mean() / k)
+    i = np.arange(1, n + 1)
+    return -n - np.sum((2 * i - 1) * (np.log(cdf) + np.log1p(-cdf[::-1]))) / n, k
+
+
+def test_shapiro_wilk_matches_scipy():
+    seg = lognormal_groups()
+    x = seg.column("result_value")
+    w, p = gof.shapiro_wilk(seg, x)
+    for group, (start, count) in enumerate(zip(seg.starts, seg.counts)):
+        expected = stats.shapiro(x[start:start + count])
+        # scipy's AS R94 works in single precision
+        assert w[group] == pytest.approx(expected.statistic, abs=1e-6)
+        assert p[group] == pytest.approx(expected.pvalue, abs=1e-6)
+
+
+def test_lilliefors_matches_kolmogorov_smirnov():
+    seg = lognormal_groups()
+    x = seg.column("result_value")
+    d = gof.lilliefors(seg, x)
+    for group, (start, count) in enumerate(zip(seg.starts, seg.counts)):
+        values = x[start:start + count]
+        if count < 4:
+            assert np.isnan(d[group])
+            continue
+        expected = stats.kstest(values, "norm", args=(values.mean(), values.std(ddof=1)))
+        assert d[group] == pytest.approx(expected.statistic)
+
+
+def test_anderson_darling_gamma_matches_reference():
+    seg = lognormal_groups()
+    x = seg.column("result_value")
+    a2, k = gof.anderson_darling_gamma(seg, x)
+    for group, (start, count) in enumerate(zip(seg.starts, seg.counts)):
+        expected_a2, expected_k = ad_gamma_reference(x[start:start + count])
+        assert a2[group] == pytest.approx(expected_a2)
+        assert k[group] == pytest.approx(expected_k)
+
+
+def test_goodness_of_fit_picks_distribution():
+    rng = np.random.default_rng(5)
+    samples = {
+        "normal": rng.normal(100.0, 5.0, 40),
+        "lognormal": rng.lognormal(0.0, 2.0, 40),
+    }
+    detects = pd.DataFrame(
+        [(name, value) for name, values in samples.items() for value in values],
+        columns=["group", "result_value"],
+    )
+    result = gof.goodness_of_fit(detects, ["group"]).set_index("group")
+    assert result.loc["normal", "gof_distribution"] == "Normal"
+    assert result.loc["lognormal", "gof_distribution"] == "Lognormal"
+    assert (result["n_gof"] == 40).all()
@@ -0,0 +1,95 @@
+"""Checks of groundwater elevations and the fitted gradient against known planes."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from era import groundwater
+from era.spatial import local_to_latlon
+
+ORIGIN = (40.0, -75.0)
+
+# East / north feet of the wells around the origin
+WELL_XY = {"MW-1": (-300.0, -200.0), "MW-2": (250.0, -150.0), "MW-3": (50.0, 320.0), "MW-4": (0.0, 30.0)}
+
+
+def event_elevations(sample_date, plane, wells=WELL_XY, noise=None):
+    """Elevations of wells on a plane h(x, y), optionally with added noise."""
+    x, y = np.array(list(wells.values())).T
+    latitude, longitude = local_to_latlon(x, y, *ORIGIN)
+    h = plane(x, y) + (0.0 if noise is None else noise)
+    return pd.DataFrame({
+        "sample_date": pd.Timestamp(sample_date),
+        "location_id": list(wells),
+        "latitude": latitude,
+        "longitude": longitude,
+        "gw_elevation_ft": h,
+    })
+
+
+def test_fit_gradients_recovers_planes():
+    elevations = pd.concat([
+        event_elevations("2024-01-10", lambda x, y: 100.0 - 0.01 * x),
+        event_elevations("2024-04-10", lambda x, y: 50.0 + 0.003 * x + 0.004 * y),
+        event_elevations("2024-07-10", lambda x, y: 80.0 + 0.002 * y),
+    ], ignore_index=True)
+    gradients = groundwater.fit_gradients(elevations).set_index("sample_date")
+
+    east, southwest, south = gradients.iloc[0], gradients.iloc[1], gradients.iloc[2]
+    assert east["gradient_ft_per_ft"] == pytest.approx(0.01, rel=1e-6)
+    assert east["flow_azimuth_deg"] == pytest.approx(90.0)
+    assert east["flow_direction"] == "E"
+    assert east["r_squared"] == pytest.approx(1.0)
+    assert southwest["gradient_ft_per_ft"] == pytest.approx(0.005, rel=1e-6)
+    assert southwest["flow_azimuth_deg"] == pytest.approx(180 + np.degrees(np.arctan2(3, 4)))
+    assert southwest["flow_direction"] == "SW"
+    assert south["flow_azimuth_deg"] == pytest.approx(180.0)
+    assert south["flow_direction"] == "S"
+
+
+def test_fit_gradients_matches_least_squares():
+    noise = np.random.default_rng(0).normal(0.0, 0.2, len(WELL_XY))
+    elevations = event_elevations("2024-01-10", lambda x, y: 20.0 + 0.004 * x - 0.002 * y, noise=noise)
+    gradient = groundwater.fit_gradients(elevations).iloc[0]
+
+    x, y = np.array(list(WELL_XY.values())).T
+    design = np.column_stack([np.ones_like(x), x, y])
+    coefficients, residual, *_ = np.linalg.lstsq(design, elevations["gw_elevation_ft"], rcond=None)
+    h = elevations["gw_elevation_ft"]
+    assert [gradient["dh_dx"], gradient["dh_dy"]] == pytest.approx(coefficients[1:], rel=1e-6)
+    assert gradient["r_squared"] == pytest.approx(1 - residual[0] / np.sum((h - h.mean()) ** 2), rel=1e-6)
+
+
+def test_fit_gradients_needs_three_wells_off_a_line():
+    line = {"MW-1": (0.0, 0.0), "MW-2": (100.0, 100.0), "MW-3": (200.0, 200.0)}
+    elevations = pd.concat([
+        event_elevations("2024-01-10", lambda x, y: 100.0 - 0.01 * x, wells=line),
+        event_elevations("2024-04-10", lambda x, y: 100.0 - 0.01 * x, wells=dict(list(WELL_XY.items())[:2])),
+    ], ignore_index=True)
+    gradients = groundwater.fit_gradients(elevations)
+    assert gradients["gradient_ft_per_ft"].isna().all()
+    assert gradients["flow_direction"].isna().all()
+
+
+def test_groundwater_elevations_from_depth_to_water(empty_db):
+    conn = empty_db
+    conn.execute("""
+        INSERT INTO dim_locations (location_id, location_type, latitude, longitude, elevation_ft)
+        VALUES ('MW-1', 'MW', 40.0, -75.0, 100.0), ('MW-2', 'MW', 40.001, -75.0, 100.0)
+    """)
+    measurements = pd.DataFrame({
+        "sample_id": None,
+        "location_id": ["MW-1", "MW-1", "MW-2", "MW-2"],
+        "measurement_date": "2024-01-10",
+        "parameter": ["Depth to Water", "Depth to Water", "Depth to Water", "pH"],
+        "result": [10.0, 12.0, 3.0, 7.0],
+        "unit": ["ft", "ft", "m", "SU"],
+        "notes": None,
+    })
+    assert groundwater.load_field_measurements(conn, measurements) == 4
+    elevations = groundwater.load_groundwater_elevations(conn).set_index("location_id")
+
+    # Repeat readings are averaged; meters are converted to feet
+    assert elevations.loc["MW-1", "gw_elevation_ft"] == pytest.approx(89.0)
+    assert elevations.loc["MW-1", "n_readings"] == 2
+    assert elevations.loc["MW-2", "gw_elevation_ft"] == pytest.approx(100.0 - 3.0 * 3.28084)
@@ -0,0 +1,90 @@
+"""Checks of the IDW and kriging estimates and the grid cache."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from era import interpolation
+
+WELLS = {
+    "MW-1": (40.0000, -75.0000),
+    "MW-2": (40.0010, -75.0000),
+    "MW-3": (40.0000, -75.0012),
+    "MW-4": (40.0008, -75.0010),
+    "MW-5": (40.0004, -75.0005),
+}
+
+
+def event_points(dates, seed=0):
+    """Points of every well for each event date, with random values."""
+    rng = np.random.default_rng(seed)
+    rows = [
+        (pd.Timestamp(date), well, latitude, longitude, rng.lognormal(1.0, 0.5))
+        for date in dates
+        for well, (latitude, longitude) in WELLS.items()
+    ]
+    return pd.DataFrame(rows, columns=["sample_date", "location_id", "latitude", "longitude", "value"])
+
+
+def scattered_points(n=20, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(0, 500, (n, 2)), rng.lognormal(1.0, 0.5, n), rng.uniform(-50, 550, (200, 2))
+
+
+def test_idw_matches_explicit_weights():
+    xy, values, nodes = scattered_points()
+    estimate = interpolation.idw(xy, values, nodes, power=2.0, neighbors=5)
+
+    for node, found in zip(nodes, estimate):
+        distance = np.linalg.norm(xy - node, axis=1)
+        nearest = np.argsort(distance)[:5]
+        weights = 1 / distance[nearest] ** 2
+        assert found == pytest.approx(np.sum(weights * values[nearest]) / weights.sum())
+
+    assert interpolation.idw(xy, values, xy) == pytest.approx(values)
+
+
+def test_ordinary_kriging_matches_direct_solve():
+    xy, values, nodes = scattered_points(seed=1)
+    gamma = interpolation.variogram_function("spherical", 0.0, 1.0, 300.0)
+    estimate, variance = interpolation.ordinary_kriging(xy, values, nodes, gamma)
+
+    n = len(values)
+    system = np.ones((n + 1, n + 1))
+    system[:n, :n] = gamma(np.linalg.norm(xy[:, None] - xy[None, :], axis=2))
+    system[n, n] = 0.0
+    for node, found, found_variance in zip(nodes, estimate, variance):
+        rhs = np.append(gamma(np.linalg.norm(xy - node, axis=1)), 1.0)
+        weights = np.linalg.solve(system, rhs)
+        assert weights[:n].sum() == pytest.approx(1.0)
+        assert found == pytest.approx(values @ weights[:n])
+        assert found_variance == pytest.approx(weights @ rhs)
+
+    # Without a nugget kriging honours the data exactly
+    at_points, at_variance = interpolation.ordinary_kriging(xy, values, xy, gamma)
+    assert at_points == pytest.approx(values)
+    assert at_variance == pytest.approx(np.zeros(n), abs=1e-9)
+
+
+def test_interpolation_grids_reuses_cached_grids(empty_db, monkeypatch):
+    points = event_points(["2024-01-10", "2024-04-10"])
+    grids, cells = interpolation.interpolation_grids(empty_db, "A", points=points)
+    assert len(grids) == 2
+
+    calls = []
+    interpolate = interpolation.interpolate
+
+    def counting_interpolate(*args, **kwargs):
+        calls.append(args)
+        return interpolate(*args, **kwargs)
+
+    monkeypatch.setattr(interpolation, "interpolate", counting_interpolate)
+    again, again_cells = interpolation.interpolation_grids(empty_db, "A", points=points)
+    assert calls == []
+    assert list(again["grid_id"]) == list(grids["grid_id"])
+    assert np.allclose(again_cells["estimate"], cells.sort_values(["grid_id", "row_index", "col_index"])["estimate"])
+
+    more = pd.concat([points, event_points(["2024-07-10"], seed=1)], ignore_index=True)
+    grids, _ = interpolation.interpolation_grids(empty_db, "A", points=more)
+    assert len(calls) == 1
+    assert len(grids) == 3
@@ -0,0 +1,84 @@
+"""Checks of the outlier tests against NIST's Rosner example and scalar references."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from era import outliers
+from era.critical_values import dixon_critical, rosner_critical
+from era.segments import Segments
+
+# Rosner's data set from the NIST/SEMATECH e-Handbook (generalized ESD
+# example): three outliers, with R = 3.118, 2.942 and 3.179 against
+# critical values 3.158, 3.151 and 3.143
+ROSNER_DATA = [
+    -0.25, 0.68, 0.94, 1.15, 1.20, 1.26, 1.26, 1.34, 1.38, 1.43, 1.49, 1.49, 1.55, 1.56,
+    1.58, 1.65, 1.69, 1.70, 1.76, 1.77, 1.81, 1.91, 1.94, 1.96, 1.99, 2.06, 2.09, 2.10,
+    2.14, 2.15, 2.23, 2.24, 2.26, 2.35, 2.37, 2.40, 2.47, 2.54, 2.62, 2.64, 2.90, 2.92,
+    2.92, 2.93, 3.21, 3.26, 3.30, 3.59, 3.68, 4.30, 4.64, 5.34, 5.42, 6.01,
+]
+NIST_CRITICAL = [3.158, 3.151, 3.143, 3.136, 3.128, 3.120, 3.111, 3.103, 3.094, 3.085]
+
+
+def sorted_segments(groups):
+    """Segments over {group: values}, values sorted within groups."""
+    frame = pd.DataFrame(
+        [(group, value) for group, values in groups.items() for value in values], columns=["group", "value"]
+    )
+    seg = Segments(frame, ["group"], ["value"])
+    return seg, seg.column("value")
+
+
+def dixon_ratio_reference(x):
+    """Dixon's ratio for the highest value of a sorted sample."""
+    n = len(x)
+    if n <= 7:
+        return (x[-1] - x[-2]) / (x[-1] - x[0])
+    if n <= 10:
+        return (x[-1] - x[-2]) / (x[-1] - x[1])
+    if n <= 13:
+        return (x[-1] - x[-3]) / (x[-1] - x[1])
+    return (x[-1] - x[-3]) / (x[-1] - x[2])
+
+
+def test_rosner_critical_matches_nist():
+    # The handbook truncates to three decimals
+    critical = rosner_critical(np.arange(54, 44, -1))
+    assert np.all((critical >= NIST_CRITICAL) & (critical < np.add(NIST_CRITICAL, 1e-3)))
+
+
+def test_rosner_finds_the_nist_outliers():
+    seg, x = sorted_segments({"A": ROSNER_DATA, "B": ROSNER_DATA[:-3]})
+    flagged = outliers.rosner(seg, x)
+    assert sorted(x[flagged & (seg.ids == 0)]) == [5.34, 5.42, 6.01]
+    assert not flagged[seg.ids == 1].any()
+
+
+def test_dixon_matches_scalar_ratios():
+    rng = np.random.default_rng(0)
+    groups = {}
+    for group in range(200):
+        values = rng.normal(0.0, 1.0, rng.integers(3, 26))
+        values[0] += rng.choice([0.0, 3.0, 6.0])
+        groups[group] = np.sort(values)
+    seg, x = sorted_segments(groups)
+    high, low = outliers.dixon(seg, x)
+
+    expected_high = [dixon_ratio_reference(v) > dixon_critical(len(v)) for v in groups.values()]
+    expected_low = [dixon_ratio_reference(-v[::-1]) > dixon_critical(len(v)) for v in groups.values()]
+    assert list(high) == expected_high
+    assert list(low) == expected_low
+    assert any(expected_high)
+
+
+def test_iqr_fences_match_numpy_quartiles():
+    rng = np.random.default_rng(1)
+    groups = {group: np.sort(rng.standard_t(3, rng.integers(4, 40))) for group in range(100)}
+    seg, x = sorted_segments(groups)
+    flagged = outliers.iqr_fences(seg, x)
+
+    expected = []
+    for values in groups.values():
+        q1, q3 = np.percentile(values, [25, 75])
+        expected += list((values < q1 - 1.5 * (q3 - q1)) | (values > q3 + 1.5 * (q3 - q1)))
+    assert list(flagged) == expected
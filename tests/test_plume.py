@@ -0,0 +1,68 @@
+"""Checks of plume area, mass and stability on grids with known answers."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from era import plume
+
+
+def block_grid(grid_id, inside, outside=1.0, size=10, block=(slice(2, 6), slice(3, 8))):
+    """Cells of a size x size grid with one rectangular block at a higher estimate."""
+    rows, cols = np.meshgrid(np.arange(size), np.arange(size), indexing="ij")
+    estimate = np.full((size, size), outside)
+    estimate[block] = inside
+    return pd.DataFrame({
+        "grid_id": grid_id,
+        "row_index": rows.ravel(),
+        "col_index": cols.ravel(),
+        "latitude": 40.0 + rows.ravel() * 1e-4,
+        "longitude": -75.0 + cols.ravel() * 1e-4,
+        "estimate": estimate.ravel(),
+    })
+
+
+def test_integrate_plumes_groundwater():
+    grids = pd.DataFrame({"grid_id": ["a", "b"], "cell_size_ft": [10.0, 20.0], "screening_level": [5.0, 5.0]})
+    cells = pd.concat([block_grid("a", 100.0), block_grid("b", 2.0)], ignore_index=True)
+    metrics = plume.integrate_plumes(grids, cells).set_index("grid_id")
+
+    # 20 cells of 100 ft2; each holds 100 ft2 x 10 ft x 0.25 porosity of
+    # water = 7079.2 L at 100 ug/L, 0.70792 g
+    assert metrics.loc["a", "n_cells_above"] == 20
+    assert metrics.loc["a", "plume_area_ft2"] == 2000.0
+    assert metrics.loc["a", "plume_area_acres"] == pytest.approx(2000.0 / 43_560)
+    assert metrics.loc["a", "plume_mass_kg"] == pytest.approx(20 * 7079.2117 * 100 * 1e-9)
+    assert metrics.loc["a", "max_estimate"] == 100.0
+    assert metrics.loc["a", "centroid_latitude"] == pytest.approx(40.0 + 3.5e-4)
+    assert metrics.loc["a", "centroid_longitude"] == pytest.approx(-75.0 + 5e-4)
+
+    # Nothing above the screening level: no plume, but the total mass counts every cell
+    assert metrics.loc["b", "plume_area_ft2"] == 0.0
+    assert metrics.loc["b", "plume_mass_kg"] == 0.0
+    assert metrics.loc["b", "total_mass_kg"] == pytest.approx((20 * 2.0 + 80 * 1.0) * 400 * 10 * 0.25 * 28.316847e-9)
+
+
+def test_integrate_plumes_soil():
+    grids = pd.DataFrame({"grid_id": ["s"], "cell_size_ft": [10.0], "screening_level": [10.0]})
+    metrics = plume.integrate_plumes(grids, block_grid("s", 50.0), "SO", thickness_ft=2.0)
+
+    # 100 ft2 x 2 ft = 5.6634 m3 of soil at 1600 kg/m3 and 50 mg/kg per cell
+    assert metrics.loc[0, "plume_mass_kg"] == pytest.approx(20 * 5.6633694 * 1600 * 50 * 1e-6)
+
+
+def test_plume_stability_labels():
+    dates = pd.to_datetime(["2021-01-01", "2021-07-01", "2022-01-01", "2022-07-01", "2023-01-01", "2023-07-01"])
+    metrics = pd.DataFrame({
+        "cas_rn": np.repeat(["GROWING", "SHRINKING", "STEADY"], len(dates)),
+        "matrix_code": "GW",
+        "sample_date": np.tile(dates, 3),
+        "plume_area_ft2": np.r_[np.arange(6) * 100.0 + 500, 1000 - np.arange(6) * 100.0, [500, 520, 490, 510, 500, 495]],
+        "plume_mass_kg": np.r_[np.arange(6) + 1.0, 6 - np.arange(6.0), [1.0, 1.1, 0.9, 1.0, 1.05, 0.95]],
+    })
+    stability = plume.plume_stability(metrics).set_index(["cas_rn", "metric"])["stability"]
+
+    for metric in plume.STABILITY_METRICS:
+        assert stability["GROWING", metric] == "Expanding"
+        assert stability["SHRINKING", metric] == "Shrinking"
+        assert stability["STEADY", metric] == "Stable"
@@ -0,0 +1,249 @@
+"""Checks of the set-based screening tables against hand-computed values."""
+
+import pytest
+
+from era import screening
+
+
+def sample(sample_id, location_id, matrix_code="SO", sample_date="2024-01-10"):
+    return {"sample_id": sample_id, "location_id": location_id,
+            "matrix_code": matrix_code, "sample_date": sample_date}
+
+
+def result(result_id, sample_id, cas_rn, value, detect_flag="Y", unit="mg/kg"):
+    return {"result_id": result_id, "sample_id": sample_id, "cas_rn": cas_rn,
+            "result_value": value, "detection_limit": value / 10, "detect_flag": detect_flag,
+            "result_unit": unit}
+
+
+ECO_CRITERIA = [
+    {"cas_rn": "A", "eco_ssl_plants_mg_kg": 10, "eco_ssl_soil_inverts_mg_kg": 20,
+     "eco_ssl_mammalian_mg_kg": 5},
+    {"cas_rn": "B", "eco_ssl_plants_mg_kg": 2},
+]
+
+
+@pytest.fixture
+def eco_db(site_db):
+    return site_db(
+        samples=[sample("S1", "L1"), sample("S2", "L1", sample_date="2024-04-10"),
+                 sample("SD1", "L2", matrix_code="SE"), sample("W1", "L1", matrix_code="GW")],
+        results=[
+            result(1, "S1", "A", 15.0),
+            result(2, "S2", "A", 4.0),
+            result(3, "S1", "B", 1.0),
+            result(4, "S2", "B", 30.0, detect_flag="N"),   # non-detects are not screened
+            result(5, "SD1", "A", 2.5),
+            result(6, "W1", "A", 100.0, unit="ug/L"),      # groundwater is not eco-screened
+        ],
+        criteria=ECO_CRITERIA,
+    )
+
+
+def test_eco_hq_per_receptor(eco_db):
+    assert screening.materialize_eco_screening(eco_db) == 4
+    hq = eco_db.execute("""
+        SELECT result_id, hq_plants, hq_soil_inverts, hq_avian, hq_mammalian,
+               eco_ssl_min_mg_kg, limiting_receptor, hq_min, screening_status
+        FROM scr_eco_hq ORDER BY result_id
+    """).fetchall()
+    assert hq == [
+        (1, 1.5, 0.75, None, 3.0, 5.0, "Mammalian", 3.0, "EXCEEDS"),
+        (2, 0.4, 0.2, None, 0.8, 5.0, "Mammalian", 0.8, "BELOW"),
+        (3, 0.5, None, None, None, 2.0, "Plants", 0.5, "BELOW"),
+        (5, 0.25, 0.125, None, 0.5, 5.0, "Mammalian", 0.5, "BELOW"),
+    ]
+
+
+def test_eco_hi_sums_each_analytes_maximum_hq(eco_db):
+    screening.materialize_eco_screening(eco_db)
+    hi = eco_db.execute("""
+        SELECT location_id, matrix_code, receptor, analyte_count, hazard_index, dominant_cas_rn, status
+        FROM scr_eco_hi ORDER BY location_id, receptor
+    """).fetchall()
+    assert hi == [
+        ("L1", "SO", "Mammalian", 1, 3.0, "A", "EXCEEDS HI=1"),
+        ("L1", "SO", "Plants", 2, 2.0, "A", "EXCEEDS HI=1"),
+        ("L1", "SO", "Soil Invertebrates", 1, 0.75, "A", "BELOW HI=1"),
+        ("L2", "SE", "Mammalian", 1, 0.5, "A", "BELOW HI=1"),
+        ("L2", "SE", "Plants", 1, 0.25, "A", "BELOW HI=1"),
+        ("L2", "SE", "Soil Invertebrates", 1, 0.125, "A", "BELOW HI=1"),
+    ]
+
+
+HH_CRITERIA = [
+    {"cas_rn": "A", "rsl_residential_soil_mg_kg": 10, "rsl_industrial_soil_mg_kg": 50,
+     "rsl_residential_tap_ug_l": 4, "target_organ": "Liver; Kidney", "carcinogen": "Yes"},
+    {"cas_rn": "B", "rsl_residential_soil_mg_kg": 100, "rsl_industrial_soil_mg_kg": 500,
+     "rsl_residential_tap_ug_l": 20, "target_organ": "Liver", "carcinogen": "No"},
+]
+
+
+@pytest.fixture
+def hh_db(site_db):
+    return site_db(
+        samples=[sample("S1", "L1"), sample("S2", "L1", sample_date="2024-04-10"),
+                 sample("S3", "L2"), sample("W1", "L2", matrix_code="GW")],
+        results=[
+            result(1, "S1", "A", 5.0),
+            result(2, "S2", "A", 20.0),
+            result(3, "S1", "B", 50.0),
+            result(4, "S2", "B", 900.0, detect_flag="N"),
+            result(5, "S3", "A", 2.0),
+            result(6, "W1", "A", 8.0, unit="ug/L"),
+        ],
+        criteria=HH_CRITERIA,
+    )
+
+
+def hazard_index(conn):
+    rows = conn.execute("""
+        SELECT location_id, matrix_code, target_organ, scenario, analyte_count, hazard_index, dominant_cas_rn
+        FROM scr_hazard_index
+    """).fetchall()
+    return {tuple(row[:4]): (row[4], round(row[5], 9), row[6]) for row in rows}
+
+
+def test_hazard_index_splits_organs(hh_db):
+    assert screening.refresh_hazard_index(hh_db) == 2
+    assert hazard_index(hh_db) == {
+        # each analyte's maximum HQ at the location, counted for every organ
+        ("L1", "SO", "Liver", "Residential"): (2, 2.5, "A"),
+        ("L1", "SO", "Kidney", "Residential"): (1, 2.0, "A"),
+        ("L1", "SO", "Liver", "Industrial/Commercial"): (2, 0.5, "A"),
+        ("L1", "SO", "Kidney", "Industrial/Commercial"): (1, 0.4, "A"),
+        ("L2", "SO", "Liver", "Residential"): (1, 0.2, "A"),
+        ("L2", "SO", "Kidney", "Residential"): (1, 0.2, "A"),
+        ("L2", "SO", "Liver", "Industrial/Commercial"): (1, 0.04, "A"),
+        ("L2", "SO", "Kidney", "Industrial/Commercial"): (1, 0.04, "A"),
+        # water is screened against tap water RSLs in every scenario
+        ("L2", "GW", "Liver", "Residential"): (1, 2.0, "A"),
+        ("L2", "GW", "Kidney", "Residential"): (1, 2.0, "A"),
+        ("L2", "GW", "Liver", "Industrial/Commercial"): (1, 2.0, "A"),
+        ("L2", "GW", "Kidney", "Industrial/Commercial"): (1, 2.0, "A"),
+    }
+
+
+def test_hazard_index_refreshes_changed_locations_only(hh_db):
+    screening.refresh_hazard_index(hh_db)
+    assert screening.refresh_hazard_index(hh_db) == 0
+
+    hh_db.execute("UPDATE fact_results SET result_value_norm = 40.0 WHERE result_id = 5")
+    assert screening.refresh_hazard_index(hh_db) == 1
+    full = hazard_index(hh_db)
+    assert full[("L2", "SO", "Liver", "Residential")] == (1, 4.0, "A")
+
+    screening.refresh_hazard_index(hh_db, full=True)
+    assert hazard_index(hh_db) == full
+
+
+def test_cancer_risk_scales_rsl_target_risk(hh_db):
+    # Only A is a carcinogen; its four detects are risked in both scenarios
+    assert screening.materialize_cancer_risk(hh_db) == 8
+    elcr = dict(hh_db.execute("""
+        SELECT result_id || '/' || scenario, elcr FROM scr_cancer_risk
+    """).fetchall())
+    assert elcr["2/Residential"] == pytest.approx(20 / 10 * 1e-6)
+    assert elcr["2/Industrial/Commercial"] == pytest.approx(20 / 50 * 1e-6)
+    assert elcr["6/Industrial/Commercial"] == pytest.approx(8 / 4 * 1e-6)
+
+    cumulative = {
+        tuple(row[:3]): (row[3], pytest.approx(row[4]), row[5])
+        for row in hh_db.execute("""
+            SELECT location_id, matrix_code, scenario, carcinogen_count, cumulative_elcr, risk_range
+            FROM scr_cancer_risk_cumulative
+        """).fetchall()
+    }
+    assert cumulative == {
+        ("L1", "SO", "Residential"): (1, 2e-6, "Within 1E-06 to 1E-04"),
+        ("L1", "SO", "Industrial/Commercial"): (1, 4e-7, "Below 1E-06"),
+        ("L2", "SO", "Residential"): (1, 2e-7, "Below 1E-06"),
+        ("L2", "SO", "Industrial/Commercial"): (1, 4e-8, "Below 1E-06"),
+        ("L2", "GW", "Residential"): (1, 2e-6, "Within 1E-06 to 1E-04"),
+        ("L2", "GW", "Industrial/Commercial"): (1, 2e-6, "Within 1E-06 to 1E-04"),
+    }
+
+
+def test_criteria_in_force_at_sample_date(hh_db):
+    assert screening.record_criteria_history(hh_db) == 2
+    assert screening.record_criteria_history(hh_db) == 0
+
+    # A's soil RSL drops from 10 to 4 on 2024-03-01, then is re-edited to 5 that day
+    for rsl in (4, 5):
+        hh_db.execute("""
+            UPDATE ref_screening_levels SET rsl_residential_soil_mg_kg = ?, update_date = DATE '2024-03-01'
+            WHERE cas_rn = 'A'
+        """, [rsl])
+        assert screening.record_criteria_history(hh_db) == 1
+
+    history = hh_db.execute("""
+        SELECT rsl_residential_soil_mg_kg::DOUBLE, valid_from::VARCHAR, valid_to::VARCHAR
+        FROM ref_screening_levels_history WHERE cas_rn = 'A' ORDER BY valid_from
+    """).fetchall()
+    assert history == [(10.0, "-infinity", "2024-03-01"), (5.0, "2024-03-01", "infinity")]
+
+    asof = dict(hh_db.execute("""
+        SELECT r.result_id, sl.rsl_residential_soil_mg_kg::DOUBLE
+        FROM fact_results r
+        JOIN fact_samples s ON r.sample_id = s.sample_id
+        """ + screening.CRITERIA_BASIS["Criteria in force at sample date"] + """
+        WHERE r.result_id IN (1, 2)
+    """).fetchall())
+    # S1 was sampled 2024-01-10, S2 2024-04-10
+    assert asof == {1: 10.0, 2: 5.0}
+
+
+def screening_results(conn):
+    return sorted(conn.execute("""
+        SELECT result_id, scenario, screening_level::DOUBLE, screening_status FROM scr_results
+    """).fetchall())
+
+
+def test_rescreen_reports_only_this_runs_changes(hh_db):
+    screening.materialize_screening_results(hh_db)
+    assert screening.rescreen_changed_criteria(hh_db)["changed_analytes"] == 0
+
+    hh_db.execute("UPDATE ref_screening_levels SET rsl_residential_soil_mg_kg = 3 WHERE cas_rn = 'A'")
+    first = screening.rescreen_changed_criteria(hh_db)
+    # Result 1 (5 mg/kg) now exceeds; result 2 (20) already did, result 5 (2) still does not
+    assert first == {"changed_analytes": 1, "rescreened_results": 8,
+                     "new_exceedances": 1, "cleared_exceedances": 0}
+    rescreened = screening_results(hh_db)
+    screening.materialize_screening_results(hh_db)
+    assert rescreened == screening_results(hh_db)
+
+    hh_db.execute("UPDATE ref_screening_levels SET rsl_residential_soil_mg_kg = 10 WHERE cas_rn = 'A'")
+    second = screening.rescreen_changed_criteria(hh_db)
+    assert (second["new_exceedances"], second["cleared_exceedances"]) == (0, 1)
+    assert hh_db.execute("SELECT COUNT(*) FROM scr_criteria_changes").fetchone()[0] == 2
+
+
+def test_exceedance_snapshots_and_diff(hh_db):
+    screening.materialize_screening_results(hh_db)
+    assert screening.snapshot_exceedances(hh_db, 1) == 3
+
+    # L1's latest A result drops below its RSL; B newly exceeds at L2
+    hh_db.execute("""
+        INSERT INTO fact_samples (sample_id, location_id, matrix_code, sample_date) VALUES
+            ('S4', 'L1', 'SO', DATE '2024-07-10'), ('S5', 'L2', 'SO', DATE '2024-07-10')
+    """)
+    hh_db.execute("""
+        INSERT INTO fact_results (result_id, sample_id, cas_rn, result_value, result_unit, detect_flag,
+                                  result_value_norm, result_unit_norm) VALUES
+            (7, 'S4', 'A', 1.0, 'mg/kg', 'Y', 1.0, 'mg/kg'),
+            (8, 'S5', 'B', 200.0, 'mg/kg', 'Y', 200.0, 'mg/kg')
+    """)
+    screening.materialize_screening_results(hh_db)
+    assert screening.snapshot_exceedances(hh_db, 2) == 3
+
+    diff = screening.exceedance_diff(hh_db)
+    status = {
+        (row.location_id, row.matrix_code, row.cas_rn, row.scenario): (row.change_status, row.previous_hq, row.current_hq)
+        for row in diff.itertuples()
+    }
+    assert status[("L1", "SO", "A", "Residential")][0] == "No longer exceeding"
+    assert status[("L2", "SO", "B", "Residential")][:1] == ("Newly exceeding",)
+    assert status[("L2", "SO", "B", "Residential")][2] == pytest.approx(2.0)
+    assert status[("L2", "GW", "A", "Residential")] == ("Still exceeding", 2.0, 2.0)
+    assert status[("L2", "GW", "A", "Industrial/Commercial")][0] == "Still exceeding"
+    assert len(status) == 4
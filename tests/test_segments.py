@@ -0,0 +1,67 @@
+"""Checks of the segmented reductions against pandas groupby."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from era.segments import Segments
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    n = 500
+    return pd.DataFrame({
+        "cas_rn": rng.choice(["A", "B", "C", "D"], n),
+        "matrix_code": rng.choice(["GW", "SO"], n),
+        "order": rng.permutation(n),
+        "value": rng.normal(10.0, 3.0, n),
+        "flag": rng.random(n) < 0.3,
+    })
+
+
+def test_reductions_match_groupby(frame):
+    seg = Segments(frame, ["cas_rn", "matrix_code"], ["order"])
+    value, flag = seg.column("value"), seg.column("flag", bool)
+    grouped = seg.data.groupby(["cas_rn", "matrix_code"])
+    flagged = seg.data[seg.data["flag"]].groupby(["cas_rn", "matrix_code"])["value"]
+
+    assert list(seg.groups.itertuples(index=False, name=None)) == list(grouped.groups)
+    assert list(seg.counts) == list(grouped.size())
+    assert seg.sum(value) == pytest.approx(grouped["value"].sum().to_numpy())
+    assert seg.mean(value) == pytest.approx(grouped["value"].mean().to_numpy())
+    assert seg.var(value) == pytest.approx(grouped["value"].var().to_numpy())
+    assert seg.max(value) == pytest.approx(grouped["value"].max().to_numpy())
+    assert seg.min(value) == pytest.approx(grouped["value"].min().to_numpy())
+    assert list(seg.count(flag)) == list(grouped["flag"].sum())
+    assert seg.mean(value, where=flag) == pytest.approx(flagged.mean().to_numpy())
+    assert seg.var(value, where=flag) == pytest.approx(flagged.var().to_numpy())
+    assert seg.max(value, where=flag) == pytest.approx(flagged.max().to_numpy())
+    assert seg.first(value) == pytest.approx(grouped["value"].first().to_numpy())
+    assert seg.cumsum(value) == pytest.approx(grouped["value"].cumsum().to_numpy())
+    assert seg.reverse_cumsum(value) == pytest.approx(
+        seg.data.iloc[::-1].groupby(["cas_rn", "matrix_code"])["value"].cumsum().iloc[::-1].to_numpy()
+    )
+    assert list(seg.position()) == list(grouped.cumcount())
+    assert seg.broadcast(seg.mean(value)) == pytest.approx(grouped["value"].transform("mean").to_numpy())
+    # Rows within groups follow order_by
+    assert (grouped["order"].diff().dropna() > 0).all()
+
+
+def test_hashes_follow_group_content(frame):
+    seg = Segments(frame, ["cas_rn", "matrix_code"], ["order"])
+    shuffled = Segments(frame.sample(frac=1, random_state=1), ["cas_rn", "matrix_code"], ["order"])
+    assert list(seg.hashes(["value", "flag"])) == list(shuffled.hashes(["value", "flag"]))
+
+    changed = frame.copy()
+    changed.loc[changed["cas_rn"] == "A", "value"] += 1.0
+    hashes = Segments(changed, ["cas_rn", "matrix_code"], ["order"]).hashes(["value", "flag"])
+    same = hashes == seg.hashes(["value", "flag"])
+    assert list(same) == list(seg.groups["cas_rn"] != "A")
+
+
+def test_empty_frame():
+    seg = Segments(pd.DataFrame({"group": [], "value": []}), ["group"])
+    assert len(seg) == 0
+    assert len(seg.sum(seg.column("value"))) == 0
+    assert len(seg.max(seg.column("value"))) == 0
@@ -0,0 +1,57 @@
+"""Checks of the in-memory series cache against stat_results."""
+
+import numpy as np
+import pytest
+
+from era import duplicates
+from era.series_cache import SERIES_COLUMNS, SERIES_SQL, load_series_cache
+
+
+@pytest.fixture
+def series_db(site_db):
+    rng = np.random.default_rng(0)
+    dates = ["2024-04-10", "2023-01-10", "2023-10-10", "2024-01-10"]
+    samples = [
+        {"sample_id": f"{well}-{date}", "location_id": well, "matrix_code": "GW", "sample_date": date}
+        for well in ("MW-1", "MW-2") for date in dates
+    ] + [{"sample_id": "MW-1-2024-04-10-FD", "location_id": "MW-1", "matrix_code": "GW",
+          "sample_date": "2024-04-10", "sample_type": "FD"}]
+    results = [
+        {"result_id": i + 1, "sample_id": sample["sample_id"], "cas_rn": cas_rn,
+         "result_value": 100.0 if sample.get("sample_type") == "FD" else rng.uniform(1, 10),
+         "detection_limit": 0.5, "detect_flag": "Y", "result_unit": "ug/L"}
+        for i, (sample, cas_rn) in enumerate((sample, cas_rn) for sample in samples for cas_rn in ("A", "B"))
+    ]
+    return site_db(samples, results)
+
+
+def test_series_match_stat_results(series_db):
+    cache = load_series_cache(series_db)
+    assert len(cache) == 2
+    assert ("A", "GW") in cache and ("A", "SO") not in cache
+
+    for cas_rn in ("A", "B"):
+        expected = series_db.execute(f"""
+            SELECT * FROM ({SERIES_SQL})
+            WHERE cas_rn = ? AND matrix_code = 'GW'
+            ORDER BY sample_date, result_id
+        """, [cas_rn]).fetchdf()
+        series = cache.series(cas_rn, "GW")
+        assert list(series.columns) == list(SERIES_COLUMNS)
+        assert list(series["result_id"]) == list(expected["result_id"])
+        assert series["result_value"].to_numpy() == pytest.approx(expected["result_value"].to_numpy())
+        assert series["sample_date"].is_monotonic_increasing
+    assert len(cache.series("A", "SO")) == 0
+
+
+def test_series_cache_reloads_when_stat_results_change(series_db):
+    duplicates.materialize_statistics_results(series_db, "max")
+    cache = load_series_cache(series_db)
+    assert load_series_cache(series_db) is cache
+
+    duplicates.materialize_statistics_results(series_db, "parent")
+    reloaded = load_series_cache(series_db)
+    assert reloaded is not cache
+    # The field duplicate's 100 wins under "max" but not under "parent"
+    assert 100.0 in set(cache.series("A", "GW")["result_value"])
+    assert 100.0 not in set(reloaded.series("A", "GW")["result_value"])
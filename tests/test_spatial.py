@@ -0,0 +1,79 @@
+"""Checks of the location index against brute-force great-circle queries."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from era import spatial
+
+ORIGIN = (40.0, -75.0)
+
+
+def haversine_ft(latitude, longitude, latitudes, longitudes):
+    lat1, lon1, lat2, lon2 = map(np.radians, (latitude, longitude, latitudes, longitudes))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * spatial.EARTH_RADIUS_FT * np.arcsin(np.sqrt(a))
+
+
+@pytest.fixture
+def locations():
+    """Wells and soil borings around one site, and a few at a distant site."""
+    rng = np.random.default_rng(0)
+    n = 300
+    latitude = ORIGIN[0] + rng.uniform(-0.02, 0.02, n)
+    longitude = ORIGIN[1] + rng.uniform(-0.02, 0.02, n)
+    latitude[:5] += 5.0
+    return pd.DataFrame({
+        "location_id": [f"L{i:03d}" for i in range(n)],
+        "location_name": [f"Location {i}" for i in range(n)],
+        "location_type": rng.choice(["MW", "SB"], n),
+        "location_role": "Site",
+        "latitude": latitude,
+        "longitude": longitude,
+    })
+
+
+def test_one_degree_of_latitude():
+    distance = spatial.chord_to_arc(np.linalg.norm(np.subtract(*spatial.earth_xyz([40.0, 41.0], [-75.0, -75.0]))))
+    assert distance == pytest.approx(np.pi / 180 * spatial.EARTH_RADIUS_FT)
+    assert distance == pytest.approx(364_800, rel=1e-3)
+
+
+def test_within_matches_brute_force(locations):
+    index = spatial.LocationIndex(locations)
+    # The last query is at one of the distant site's locations
+    queries = [(40.001, -75.003), (40.0, -75.0), tuple(locations.loc[0, ["latitude", "longitude"]])]
+    found = index.within([q[0] for q in queries], [q[1] for q in queries], 2000.0)
+
+    for query, (latitude, longitude) in enumerate(queries):
+        distance = haversine_ft(latitude, longitude, locations["latitude"], locations["longitude"])
+        expected = locations.assign(distance_ft=distance)[distance <= 2000.0].sort_values("distance_ft")
+        matches = found[found["query"] == query]
+        assert list(matches["location_id"]) == list(expected["location_id"])
+        assert matches["distance_ft"].to_numpy() == pytest.approx(expected["distance_ft"].to_numpy())
+
+
+def test_nearest_wells_match_brute_force(locations):
+    index = spatial.LocationIndex(locations)
+    found = index.nearest(40.005, -74.995, k=4)
+
+    wells = locations[locations["location_type"] == "MW"]
+    distance = haversine_ft(40.005, -74.995, wells["latitude"], wells["longitude"])
+    expected = wells.assign(distance_ft=distance).nsmallest(4, "distance_ft")
+    assert list(found["location_id"]) == list(expected["location_id"])
+    assert found["distance_ft"].to_numpy() == pytest.approx(expected["distance_ft"].to_numpy())
+
+    bounded = index.nearest(40.005, -74.995, k=4, max_distance_ft=expected["distance_ft"].iloc[1] + 1)
+    assert list(bounded["location_id"]) == list(expected["location_id"].iloc[:2])
+
+
+def test_in_polygon_matches_rectangles(locations):
+    # An L-shaped (concave) polygon in (longitude, latitude); the local
+    # projection is linear, so inside means inside one of two rectangles
+    polygon = [(-75.01, 39.99), (-74.99, 39.99), (-74.99, 40.0), (-75.0, 40.0), (-75.0, 40.01), (-75.01, 40.01)]
+    inside = spatial.LocationIndex(locations).in_polygon(polygon)
+
+    lat, lon = locations["latitude"], locations["longitude"]
+    lower = lat.between(39.99, 40.0) & lon.between(-75.01, -74.99)
+    upper = lat.between(40.0, 40.01) & lon.between(-75.01, -75.0)
+    assert set(inside["location_id"]) == set(locations.loc[lower | upper, "location_id"])
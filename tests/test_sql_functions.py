@@ -0,0 +1,71 @@
+"""Checks of the DuckDB statistics functions against numpy and era.ucl."""
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from era import ucl
+from era.sql_functions import register_functions
+
+
+def random_results(seed=3, n_groups=40):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for group in range(n_groups):
+        n = rng.integers(2, 30)
+        values = rng.lognormal(0.0, 1.0, n)
+        limits = rng.choice([0.2, 0.5, 1.0], n)
+        detected = values >= limits
+        rows += zip([f"G{group:02d}"] * n, np.where(detected, values, np.nan), limits,
+                    np.where(detected, "Y", "N"))
+    return pd.DataFrame(rows, columns=["cas_rn", "result_value", "detection_limit", "detect_flag"])
+
+
+@pytest.fixture
+def conn():
+    conn = register_functions(duckdb.connect())
+    yield conn
+    conn.close()
+
+
+def test_t_ppf_matches_scipy(conn):
+    p, df = 0.95, [1.0, 2.5, 9.0, 120.0]
+    quantiles = [conn.execute("SELECT t_ppf($p, $df)", {"p": p, "df": d}).fetchone()[0] for d in df]
+    assert quantiles == pytest.approx(stats.t.ppf(p, df))
+
+
+def test_aggregates_match_era_ucl(conn):
+    results = random_results()
+    conn.register("results", results)
+    summary = conn.execute("""
+        SELECT cas_rn,
+               detect_freq_pct(detect_flag) AS detect_freq_pct,
+               t_ucl95(half_dl(result_value, detection_limit, detect_flag)) AS t_ucl95,
+               chebyshev_ucl95(half_dl(result_value, detection_limit, detect_flag)) AS chebyshev_ucl95,
+               percentile(half_dl(result_value, detection_limit, detect_flag), 0.9) AS p90,
+               km_mean(result_value, detection_limit, detect_flag) AS km_mean,
+               km_ucl95(result_value, detection_limit, detect_flag) AS km_ucl95
+        FROM results
+        GROUP BY cas_rn
+        ORDER BY cas_rn
+    """).fetchdf()
+    epcs = ucl.compute_epcs(results.assign(matrix_code="SO")).sort_values("cas_rn")
+
+    values = np.where(results["detect_flag"] == "Y", results["result_value"], results["detection_limit"] / 2)
+    by_group = pd.Series(values).groupby(results["cas_rn"])
+    n = by_group.count().to_numpy()
+    t_ucl = by_group.mean() + stats.t.ppf(0.95, np.maximum(n - 1, 1)) * by_group.std() / np.sqrt(n)
+
+    assert summary["detect_freq_pct"].to_numpy() == pytest.approx(epcs["detect_freq_pct"].to_numpy())
+    assert summary["t_ucl95"].to_numpy() == pytest.approx(t_ucl.to_numpy())
+    assert summary["chebyshev_ucl95"].to_numpy() == pytest.approx(epcs["chebyshev_ucl95"].to_numpy())
+    assert summary["p90"].to_numpy() == pytest.approx(by_group.quantile(0.9).to_numpy())
+    assert summary["km_mean"].to_numpy() == pytest.approx(epcs["km_mean"].to_numpy(), nan_ok=True)
+    assert summary["km_ucl95"].to_numpy() == pytest.approx(epcs["km_t_ucl95"].to_numpy(), nan_ok=True)
+
+
+def test_register_functions_twice(conn):
+    register_functions(conn)
+    assert conn.execute("SELECT half_dl(NULL, 2.0, 'N'), observed_value(3.0, 1.0, 'Y')").fetchone() == (1.0, 3.0)
@@ -0,0 +1,78 @@
+"""Checks of the batched Mann-Kendall / Sen's slope engine."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from era import trends
+from era.segments import Segments
+
+
+def mixed_series(seed, lengths):
+    """Series of the given lengths with tied values and some repeated times."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for series, n in enumerate(lengths):
+        times = np.sort(rng.integers(0, 3 * n, n)).astype(float)
+        values = np.round(rng.normal(0.05 * series * times / max(n, 1), 1.0), 1)
+        rows += zip([series] * n, times, values)
+    frame = pd.DataFrame(rows, columns=["series", "time", "value"])
+    return Segments(frame, ["series"], ["time"])
+
+
+def mk_reference(values, times):
+    """S, tie-corrected var(S) and Sen's slope by explicit loops over pairs."""
+    n = len(values)
+    s, slopes = 0.0, []
+    for i in range(n):
+        for j in range(i + 1, n):
+            s += np.sign(values[j] - values[i])
+            if times[j] > times[i]:
+                slopes.append((values[j] - values[i]) / (times[j] - times[i]))
+    _, tied = np.unique(values, return_counts=True)
+    var_s = (n * (n - 1) * (2 * n + 5) - np.sum(tied * (tied - 1) * (2 * tied + 5))) / 18
+    return s, var_s, np.median(slopes) if slopes else np.nan
+
+
+@pytest.mark.parametrize("budget", [trends.PAIR_BUDGET, 500])
+def test_mann_kendall_matches_reference(monkeypatch, budget):
+    monkeypatch.setattr(trends, "PAIR_BUDGET", budget)
+    lengths = [1, 2, 3, 4, 4, 5, 7, 12, 25, 40, 3, 60, 9, 2, 17]
+    seg = mixed_series(seed=3, lengths=lengths)
+    values, times = seg.column("value"), seg.column("time")
+    mk = trends.mann_kendall(seg, values, times)
+
+    for series, (start, count) in enumerate(zip(seg.starts, seg.counts)):
+        rows = slice(start, start + count)
+        s, var_s, sens = mk_reference(values[rows], times[rows])
+        assert mk["s"][series] == s
+        assert mk["var_s"][series] == pytest.approx(var_s)
+        if np.isnan(sens):
+            assert np.isnan(mk["sens_slope"][series])
+        else:
+            assert mk["sens_slope"][series] == pytest.approx(sens)
+
+
+def test_mann_kendall_chunks_stay_within_budget(monkeypatch):
+    budget = 20_000
+    monkeypatch.setattr(trends, "PAIR_BUDGET", budget)
+    chunk_sizes = []
+    pairwise = trends._pairwise
+
+    def recording_pairwise(x, t, n):
+        chunk_sizes.append(x.shape[0] * x.shape[1] ** 2)
+        return pairwise(x, t, n)
+
+    monkeypatch.setattr(trends, "_pairwise", recording_pairwise)
+    # Many short series and one long one, which must not share a chunk
+    seg = mixed_series(seed=4, lengths=[4] * 2000 + [120])
+    trends.mann_kendall(seg, seg.column("value"), seg.column("time"))
+
+    assert max(chunk_sizes) <= max(budget, 120 ** 2)
+
+
+def test_materialize_trends_on_empty_database(empty_db):
+    table = trends.materialize_trends(empty_db)
+    assert len(table) == 0
+    assert {"mk_s", "sens_slope_per_year", "trend"} <= set(table.columns)
+    assert empty_db.execute("SELECT COUNT(*) FROM stat_trends").fetchone()[0] == 0
@@ -0,0 +1,96 @@
+"""Checks of the EPC statistics, the EPC table and its cache."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from era import ucl
+from era.segments import Segments
+from era.db import table_exists
+
+
+def test_materialize_epcs_on_empty_database(empty_db):
+    for _ in range(2):
+        epcs, hits, misses = ucl.materialize_epcs(empty_db)
+        assert (len(epcs), hits, misses) == (0, 0, 0)
+        assert {"epc", "method", "hazard_quotient", "screening_level"} <= set(epcs.columns)
+
+    stored = empty_db.execute("SELECT * FROM stat_epcs").fetchdf()
+    assert len(stored) == 0
+    assert list(stored.columns) == list(epcs.columns)
+    # Nothing to cache, so no cache table with guessed column types
+    assert not table_exists(empty_db, "stat_epc_cache")
+
+
+def epc_inputs(seed=2, n_groups=60):
+    """Results of random groups with a mix of detects and non-detects."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for group in range(n_groups):
+        n = rng.integers(2, 40)
+        values = rng.lognormal(0.5, 0.8, n)
+        limits = rng.choice([0.5, 1.0, 2.0], n)
+        detected = values >= limits
+        rows += zip([f"G{group:02d}"] * n, ["SO"] * n, np.where(detected, values, np.nan), limits,
+                    np.where(detected, "Y", "N"))
+    return pd.DataFrame(rows, columns=["cas_rn", "matrix_code", "result_value", "detection_limit", "detect_flag"])
+
+
+def test_compute_epcs_matches_per_group_statistics():
+    data = epc_inputs()
+    epcs = ucl.compute_epcs(data.sample(frac=1, random_state=0)).set_index("cas_rn")
+
+    for cas_rn, group in data.groupby("cas_rn"):
+        row = epcs.loc[cas_rn]
+        detect = group["detect_flag"] == "Y"
+        # Without ROS values non-detects enter at half their detection limit
+        values = np.where(detect, group["result_value"], group["detection_limit"] / 2)
+        n = len(values)
+        mean, sd = values.mean(), values.std(ddof=1)
+        assert row["n_total"] == n
+        assert row["n_detect"] == detect.sum()
+        assert row["mean"] == pytest.approx(mean)
+        assert row["sd"] == pytest.approx(sd, nan_ok=True)
+        assert row["t_crit"] == pytest.approx(stats.t.ppf(0.95, max(n - 1, 1)))
+        assert row["chebyshev_ucl95"] == pytest.approx(mean + np.sqrt(19) * sd / np.sqrt(n), nan_ok=True)
+        if detect.any():
+            assert row["max_detect"] == group.loc[detect, "result_value"].max()
+        if (~detect).any():
+            assert row["max_dl"] == group.loc[~detect, "detection_limit"].max()
+
+
+def test_compute_epcs_method_selection():
+    rng = np.random.default_rng(4)
+    normal = rng.normal(100.0, 5.0, 20)
+    frame = pd.DataFrame(
+        [("NORMAL", value, 1.0, "Y") for value in normal]
+        + [("NONDETECT", np.nan, limit, "N") for limit in (1.0, 4.0, 2.0)]
+        + [("SPARSE", 3.0, 1.0, "Y")] + [("SPARSE", np.nan, 1.0, "N")] * 3,
+        columns=["cas_rn", "result_value", "detection_limit", "detect_flag"],
+    ).assign(matrix_code="GW")
+    epcs = ucl.compute_epcs(frame).set_index("cas_rn")
+
+    t_ucl = normal.mean() + stats.t.ppf(0.95, 19) * normal.std(ddof=1) / np.sqrt(20)
+    assert epcs.loc["NORMAL", "method"] == "t-UCL95"
+    assert epcs.loc["NORMAL", "epc"] == pytest.approx(t_ucl)
+    assert epcs.loc["NONDETECT", "method"] == "1/2 DL"
+    assert epcs.loc["NONDETECT", "epc"] == 2.0
+    assert epcs.loc["SPARSE", "method"] == "Max Detect"
+    assert epcs.loc["SPARSE", "epc"] == 3.0
+
+
+@pytest.mark.parametrize("n, level", [(10, 0.0267), (20, 0.0380)])
+def test_gamma_ucls_match_scalar_formula(n, level):
+    values = np.random.default_rng(n).gamma(0.8, 5.0, n)
+    seg = Segments(pd.DataFrame({"group": 0, "value": values}), ["group"])
+    gamma = ucl.gamma_ucls(seg, seg.column("value"))
+
+    mean = values.mean()
+    a = np.log(mean) - np.log(values).mean()
+    k_hat = (3 - a + np.sqrt((a - 3) ** 2 + 24 * a)) / (12 * a)
+    k_star = (n - 3) * k_hat / n + 2 / (3 * n)
+    nu = 2 * n * k_star
+    assert gamma["k_star"][0] == pytest.approx(k_star)
+    assert gamma["approx_ucl"][0] == pytest.approx(nu * mean / stats.chi2.ppf(0.05, nu), rel=2e-3)
+    assert gamma["adjusted_ucl"][0] == pytest.approx(nu * mean / stats.chi2.ppf(level, nu), rel=2e-3)
@@ -0,0 +1,59 @@
+"""Checks of result unit normalization."""
+
+import pytest
+
+from era import units
+
+# (result_id, matrix, reported unit, value) -> (normalized value, unit, summary status)
+CASES = {
+    (1, "SO", "ug/kg", 2500.0): (2.5, "mg/kg", "Converted"),
+    (2, "SO", "MG/KG", 3.0): (3.0, "mg/kg", "Native"),
+    (3, "SO", "ug/g", 4.0): (4.0, "mg/kg", "Converted"),
+    (4, "SO", "g/kg", 0.002): (2.0, "mg/kg", "Converted"),
+    (5, "GW", "µg/L", 7.0): (7.0, "ug/L", "Native"),
+    (6, "GW", "mg/L", 0.05): (50.0, "ug/L", "Converted"),
+    (7, "GW", "ng/L", 300.0): (0.3, "ug/L", "Converted"),
+    (8, "SO", "ug/L", 1.0): (None, None, "Unconvertible"),   # wrong dimension
+    (9, "GW", "ppm", 1.0): (None, None, "Unconvertible"),    # unknown unit
+}
+
+
+@pytest.fixture
+def units_db(site_db):
+    return site_db(
+        samples=[
+            {"sample_id": "S1", "location_id": "L1", "matrix_code": "SO", "sample_date": "2024-01-10"},
+            {"sample_id": "W1", "location_id": "L1", "matrix_code": "GW", "sample_date": "2024-01-10"},
+        ],
+        results=[
+            {"result_id": result_id, "sample_id": "S1" if matrix == "SO" else "W1", "cas_rn": "A",
+             "result_value": value, "detection_limit": value / 10, "detect_flag": "Y",
+             "result_unit": unit, "result_value_norm": None, "detection_limit_norm": None,
+             "result_unit_norm": None}
+            for result_id, matrix, unit, value in CASES
+        ],
+    )
+
+
+def test_normalize_results(units_db):
+    unconvertible = units.normalize_results(units_db)
+    assert unconvertible == 2
+    rows = units_db.execute("""
+        SELECT result_id, result_value_norm, detection_limit_norm, result_unit_norm
+        FROM fact_results ORDER BY result_id
+    """).fetchall()
+    for (result_id, *_), (value, unit, _) in CASES.items():
+        row = rows[result_id - 1]
+        assert row[3] == unit
+        if value is None:
+            assert row[1] is None and row[2] is None
+        else:
+            assert row[1] == pytest.approx(value)
+            assert row[2] == pytest.approx(value / 10)
+
+
+def test_unit_summary_labels(units_db):
+    units.normalize_results(units_db)
+    summary = units.unit_summary(units_db)
+    status = dict(zip(summary["result_unit"], summary["status"]))
+    assert status == {unit: expected[2] for (_, _, unit, _), expected in CASES.items()}